@@ -1,35 +1,42 @@
 import streamlit as st
-import sqlite3, pandas as pd, io
+from pathlib import Path
 from app.services.auth import check_user_logged_in
+from app.services import exportacao, repositorio
 
-DB_PATH = "app/database/frota.db"
+ATIVAS = ["fila", "rodando"]
+INTERVALO_S = 2
+ROTULOS = {"fila": "⏳ Na fila", "rodando": "⚙️ Gerando", "pronto": "✅ Pronto",
+           "erro": "❌ Erro", "expirada": "🗑️ Expirada"}
 
-# ───────── helpers ─────────
-def ler_equipamentos(ano:int, where:str="", params:tuple=()) -> pd.DataFrame:
-    with sqlite3.connect(DB_PATH) as con:
-        return pd.read_sql(f"SELECT * FROM equipamentos WHERE ano=? {where}", con,
-                           params=(ano,*params))
+# ───────── minhas exportações ─────────
+def listar_exportacoes(df):
+    if df.empty:
+        st.caption("Nenhuma exportação pedida ainda.")
+        return
+    for r in df.itertuples():
+        c1, c2 = st.columns([3, 2])
+        c1.markdown(f"**{r.nome}** — {ROTULOS.get(r.status, r.status)}  \n"
+                    f"<small>pedida em {r.criado_em.replace('T', ' ')}</small>",
+                    unsafe_allow_html=True)
+        with c2:
+            if r.status in ATIVAS:
+                st.progress(float(r.progresso), text=f"{r.progresso:.0%}")
+            elif r.status == "pronto" and not r.linhas:
+                st.warning("Sem registros para exportar.")
+            elif r.status == "pronto" and Path(r.arquivo).exists():
+                # o arquivo só é lido quando o usuário clica
+                st.download_button("📥 Baixar", lambda a=r.arquivo: Path(a).read_bytes(),
+                                   r.nome, mime=exportacao.FORMATOS[r.formato]["mime"],
+                                   key=f"baixar_{r.id}")
+            elif r.status == "erro":
+                st.error(f"Erro ao gerar arquivo: {r.erro}")
 
-def montar_excel(planilhas: dict[str, pd.DataFrame]) -> bytes:
-    """planilhas = {"nome_aba": df, ...}  →  bytes .xlsx"""
-    buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine="xlsxwriter") as wr:
-        wb = wr.book
-        header_fmt = wb.add_format({
-            "bold": True, "fg_color": "#D7E4BC",
-            "align": "center", "valign": "vcenter", "border":1
-        })
-        cell_fmt   = wb.add_format({"border":1, "valign":"top"})
-
-        for aba, df in planilhas.items():
-            df.to_excel(wr, sheet_name=aba, index=False, startrow=1, header=False)
-            ws = wr.sheets[aba]
-
-            for col, nome in enumerate(df.columns):
-                ws.write(0, col, nome, header_fmt)
-                largura = max(len(nome), df.iloc[:, col].astype(str).map(len).max()) + 2
-                ws.set_column(col, col, largura, cell_fmt)
-    return buf.getvalue()
+def acompanhar_exportacoes(uid: int):
+    """Roda como fragmento a cada INTERVALO_S enquanto houver tarefa ativa."""
+    df = exportacao.minhas(uid)
+    listar_exportacoes(df)
+    if not df.status.isin(ATIVAS).any():
+        st.rerun()
 
 # ───────── página ─────────
 def run():
@@ -39,31 +46,38 @@ def run():
     st.title("📤 Exportação de Equipamentos")
 
     if user["tipo_usuario"] == "admin":
-        st.info("Você é **administrador** — o arquivo terá duas abas: 2024 e 2025 (todos os dados).")
+        st.info("Você é **administrador** — escolha os anos (uma aba por ano) e, se quiser, os setores.")
+        anos_disp = repositorio.anos()
+        anos = st.multiselect("Anos", anos_disp, default=[a for a in (2024, 2025) if a in anos_disp])
+        df_s = repositorio.listar_setores()
+        rotulo = dict(zip(df_s.codigo, df_s.nome + " (" + df_s.sigla + ")"))
+        setores = st.multiselect("Setores (vazio = todos)", list(rotulo), format_func=rotulo.get)
     else:
         st.info("Você é **usuário comum** — o arquivo terá apenas seus equipamentos de 2025.")
 
-    if st.button("Gerar arquivo Excel"):
+    formato = st.radio("Formato", list(exportacao.FORMATOS), horizontal=True,
+                       format_func=lambda f: exportacao.FORMATOS[f]["rotulo"],
+                       help="Parquet e CSV.gz saem num arquivo só (a coluna ano separa os anos); "
+                            "são bem mais rápidos para gerar e ler em análises.")
+
+    if st.button("Gerar arquivo", disabled=user["tipo_usuario"] == "admin" and not anos):
         try:
             if user["tipo_usuario"] == "admin":
-                df24 = ler_equipamentos(2024)
-                df25 = ler_equipamentos(2025)
-                if df24.empty and df25.empty:
-                    st.warning("Não há registros em 2024 nem 2025.")
-                    return
-                xlsx = montar_excel({"equipamentos_2024": df24,
-                                     "equipamentos_2025": df25})
-                nome = "equipamentos_2024_2025_COMPLETO.xlsx"
-
+                abas = exportacao.abas_por_ano(anos, setores)
+                nome = (f"equipamentos_{'_'.join(map(str, sorted(anos)))}_"
+                        + (f"{len(setores)}_setores" if setores else "COMPLETO"))
             else:  # comum
-                df25 = ler_equipamentos(2025, "AND centro_custo_uc=?", (user["setor_codigo"],))
-                if df25.empty:
-                    st.warning("Você não possui registros de 2025.")
-                    return
-                xlsx = montar_excel({f"equipamentos_{user['setor_codigo']}_2025": df25})
-                nome = f"equipamentos_2025_setor_{user['setor_codigo']}.xlsx"
-
-            st.download_button("📥 Baixar Excel", xlsx, nome,
-                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                abas = {f"equipamentos_{user['setor_codigo']}_2025":
+                        exportacao.consulta_ano(2025, user["setor_codigo"])}
+                nome = f"equipamentos_2025_setor_{user['setor_codigo']}"
+            # gera em segundo plano: a página segue livre e sobrevive a um refresh
+            exportacao.solicitar(user["id"], abas, nome + exportacao.FORMATOS[formato]["sufixo"], formato)
         except Exception as e:
-            st.error(f"Erro ao gerar arquivo: {e}")
+            st.error(f"Erro ao pedir a exportação: {e}")
+
+    st.subheader("Minhas exportações")
+    df = exportacao.minhas(user["id"])
+    if df.status.isin(ATIVAS).any():
+        st.fragment(run_every=INTERVALO_S)(acompanhar_exportacoes)(user["id"])
+    else:
+        listar_exportacoes(df)
@@ -1,29 +1,41 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from app.services.db import get_connection          # usa conexão centralizada
 from app.services.auth import check_user_logged_in
+from app.services import consultas, repositorio
 
 # ------------------------------------------------------------------ #
-# Consulta todos os equipamentos do setor do usuário                 #
+# Consultas do setor do usuário                                      #
 # ------------------------------------------------------------------ #
-def carregar_dados_frota(setor_codigo: int) -> pd.DataFrame:
-    sql = """
-        SELECT  e.*,
-                s.nome  AS setor_nome,
-                s.sigla AS setor_sigla
-        FROM    equipamentos  e
-        JOIN    setor         s ON s.codigo = e.centro_custo_uc
-        WHERE   e.centro_custo_uc = ?
-    """
+def carregar_resumo(setor_codigo: int) -> pd.DataFrame:
+    """Contagens por (ano, dimensao, valor): KPIs e gráficos saem daqui."""
     try:
-        with get_connection() as con:
-            df = pd.read_sql_query(sql, con, params=(setor_codigo,))
+        return repositorio.resumo_setor(setor_codigo)
     except Exception as exc:
         st.error(f"Erro ao carregar a frota: {exc}")
-        df = pd.DataFrame()
+        return pd.DataFrame(columns=["ano", "dimensao", "valor", "quantidade"])
+
+
+def contagens(resumo: pd.DataFrame) -> tuple[int, dict[str, dict]]:
+    """(total, {dimensao: {valor: quantidade}}) somando os anos; os valores
+    saem sem NULL e da maior para a menor quantidade — como value_counts.
+    O resumo tem poucas linhas: dict puro sai mais barato que groupby."""
+    total, soma = 0, {d: {} for d in consultas.DIMENSOES_RESUMO}
+    for dim, valor, qtd in resumo[["dimensao", "valor", "quantidade"]].itertuples(index=False):
+        if dim == "status":
+            total += int(qtd)
+        if not pd.isna(valor):
+            soma[dim][valor] = soma[dim].get(valor, 0) + int(qtd)
+    return total, {d: dict(sorted(v.items(), key=lambda kv: -kv[1])) for d, v in soma.items()}
+
 
-    return df
+def carregar_dados_frota(setor_codigo: int) -> pd.DataFrame:
+    """Tabela detalhada: só as colunas mostradas, só quando a aba é aberta."""
+    try:
+        return repositorio.tabela_setor(setor_codigo)
+    except Exception as exc:
+        st.error(f"Erro ao carregar a frota: {exc}")
+        return pd.DataFrame()
 
 
 # ------------------------------------------------------------------ #
@@ -39,29 +51,31 @@ def run():
         st.error("Seu setor não está definido. Verifique seu cadastro.")
         return
 
-    df = carregar_dados_frota(setor_codigo)
-    if df.empty:
+    resumo = carregar_resumo(setor_codigo)
+    total, cont = contagens(resumo)
+    if total == 0:
         st.warning("Nenhum equipamento encontrado para o seu setor.")
         return
 
-    setor_nome = df.iloc[0]["setor_nome"]
+    setor_nome = repositorio.nome_setor(setor_codigo)
     st.title(f"📊 Frota – Setor: {setor_nome}")
     st.success(f"Bem-vindo, **{usuario['nome']}**!")
 
     # ---------------- KPIs ---------------- #
     st.subheader("🔢 Resumo da Frota")
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total de Equipamentos", len(df))
-    col2.metric("Ativos", df[df["status"] == "Ativo"].shape[0])
-    col3.metric("Tipos de Combustível", df["tipo_combustivel"].nunique())
+    col1.metric("Total de Equipamentos", total)
+    col2.metric("Ativos", int(cont["status"].get("Ativo", 0)))
+    col3.metric("Tipos de Combustível", len(cont["tipo_combustivel"]))
 
     # ---------------- Abas ---------------- #
-    aba_graf, aba_tab = st.tabs(["📈 Gráficos", "📋 Tabela"])
+    # só a aba escolhida roda: a tabela não é consultada enquanto fechada
+    aba = st.radio("Visualização", ["📈 Gráficos", "📋 Tabela"],
+                   horizontal=True, label_visibility="collapsed")
 
-    with aba_graf:
+    if aba == "📈 Gráficos":
         st.subheader("Distribuição por Modelo")
-        modelos = df["modelo"].value_counts().reset_index()
-        modelos.columns = ["Modelo", "Quantidade"]
+        modelos = pd.DataFrame(cont["modelo"].items(), columns=["Modelo", "Quantidade"])
         st.plotly_chart(
             px.bar(modelos, x="Modelo", y="Quantidade",
                    title="Equipamentos por Modelo"),
@@ -69,16 +83,17 @@ def run():
         )
 
         st.subheader("Tipo de Controle de Uso")
-        controle = df["controle_desempenho"].value_counts().reset_index()
-        controle.columns = ["Tipo de Controle", "Quantidade"]
+        controle = pd.DataFrame(cont["controle_desempenho"].items(),
+                                columns=["Tipo de Controle", "Quantidade"])
         st.plotly_chart(
             px.pie(controle, names="Tipo de Controle", values="Quantidade",
                    title="Tipos de Controle na Frota"),
             use_container_width=True
         )
 
-    with aba_tab:
+    else:
         st.subheader("🧾 Tabela Detalhada")
+        df = carregar_dados_frota(setor_codigo)
         mostra = df[[
             "identificacao", "modelo", "ano_fabricacao",
             "tipo_combustivel", "controle_desempenho",
@@ -1,36 +1,31 @@
 import streamlit as st
-import pandas as pd, sqlite3, re
-from datetime import datetime, date
+import pandas as pd, re
+from datetime import date
 from app.services.auth import check_user_logged_in
+from app.services import duplicados, repositorio, validacao, vocabulario
 
 # ───────────────────────── helpers ─────────────────────────
-DB = "app/database/frota.db"
-def get_connection(): return sqlite3.connect(DB)
-
-def get_equip_setor_ano(setor:int, ano:int)->pd.DataFrame:
-    sql = "SELECT * FROM equipamentos WHERE centro_custo_uc=? AND ano=?"
-    with get_connection() as con:
-        return pd.read_sql(sql, con, params=(setor, ano))
-
-def get_distinct(col:str)->list[str]:
-    with get_connection() as con:
-        return (
-            pd.read_sql(f"SELECT DISTINCT {col} FROM equipamentos "
-                        f"WHERE {col} IS NOT NULL", con)[col]
-            .astype(str).dropna().sort_values().tolist()
-        )
 
-# map status → oficial
-STATUS_MAP = {
-    "novo": "Novo (Bem em perfeito estado, sem uso ou com uso muito recente, sem sinais de desgaste.)",
-    "bom": "Bom (Bem usado, mas em boas condições físicas e de funcionamento.)",
-    "regular": "Regular (Bem com sinais evidentes de uso, algum desgaste, mas ainda funcional.)",
-    "ocioso": "Ocioso (Bem em bom estado, mas sem uso por falta de necessidade ou planejamento.)",
-    "ocioso_ocioso": "Ocioso Ocioso (Bem totalmente parado e sem previsão de uso. Pode ser considerado para desfazimento.)",
-    "antieconomico": "Antieconômico (Bem que gera mais custos de manutenção do que benefícios ou que é obsoleto.)",
-    "irrecuperavel": "Irrecuperável (Bem danificado ou inservível, sem possibilidade de recuperação ou reaproveitamento.)"
-}
-status_oficiais = sorted(set(STATUS_MAP.values()))
+def possiveis_duplicados(item:dict, lista:list[dict])->list[str]:
+    """Mensagens para cada item de 2025 (banco, qualquer setor) ou da lista
+    temporária com placa, chassi, RENAVAM ou patrimônio igual ao do item."""
+    chaves = duplicados.chaves_item(item)
+    if not chaves:
+        return []
+    msgs = [f"{r.identificacao} ({r.setor_nome}) já cadastrado em 2025 — mesmo {r.em_comum}."
+            for r in repositorio.conflitos(chaves).itertuples()]
+    for it in lista:
+        outras = duplicados.chaves_item(it)
+        iguais = [t for t, v in chaves.items() if outras.get(t) == v]
+        if iguais:
+            msgs.append(f"{it['identificacao']} já está na lista — mesmo {', '.join(iguais)}.")
+    return msgs
+
+# status oficiais (lista única em vocabulario, usada também pela validação)
+status_oficiais = vocabulario.STATUS_OFICIAIS
+
+# itens 2024 pendentes por página
+POR_PAGINA = 50
 
 # anos para select
 ANOS = [""] + list(reversed(range(1970, date.today().year+2)))
@@ -63,13 +58,16 @@ def run():
     st.markdown(f"## Equipamentos da Unidade {usr.get('setor_nome','')}")
 
     # ---------------------- tabela 2024 ----------------------
-    df24 = get_equip_setor_ano(setor, 2024)
-
-    # descarta ident. que já estão na lista temp ou já inseridos em 2025
+    # só os itens 2024 ainda sem registro 2025 (vw_migracao_pendente),
+    # fora os que já estão na lista temp, uma página por vez
     if "frota_temp" not in st.session_state: st.session_state["frota_temp"]=[]
-    ident_temp = {d["identificacao"] for d in st.session_state["frota_temp"]}
-    ident_25   = set(get_equip_setor_ano(setor, 2025)["identificacao"].dropna().astype(str))
-    df24 = df24[~df24["identificacao"].astype(str).isin(ident_temp|ident_25)]
+    ident_temp = sorted({d["identificacao"] for d in st.session_state["frota_temp"]})
+    pagina = st.session_state.get("pendentes_pagina", 1)
+    df24, total_pend = repositorio.migracao_pendente(setor, ident_temp, POR_PAGINA, pagina-1)
+    n_paginas = max(1, -(-total_pend // POR_PAGINA))
+    if pagina > n_paginas:   # a lista encolheu (itens migrados)
+        pagina = st.session_state["pendentes_pagina"] = n_paginas
+        df24, total_pend = repositorio.migracao_pendente(setor, ident_temp, POR_PAGINA, pagina-1)
 
     defaults = {c:"" for c in [
       "identificacao","codigo_renavam","numero_serie_chassi","ordem_num_patrimonio",
@@ -79,23 +77,29 @@ def run():
     ]}
 
     if not df24.empty:
-        st.markdown(" Equipamentos 2024 ainda NÃO migrados (Identificação ↓")
+        st.markdown(f" Equipamentos 2024 ainda NÃO migrados: {total_pend} (Identificação ↓)")
+        if n_paginas > 1:
+            st.number_input(f"Página (de {n_paginas})", min_value=1, max_value=n_paginas,
+                            key="pendentes_pagina")
         st.markdown(f'<div class="frota-card">{df24[["identificacao","fabricante","modelo","ordem_num_patrimonio"]].rename(columns={"identificacao":"Identificação","ordem_num_patrimonio":"Patrimônio"}).to_html(index=False,classes="frota-table",border=0)}</div>',unsafe_allow_html=True)
         escolha = st.selectbox("Copiar dados de 2024", [""]+df24["identificacao"].astype(str).unique().tolist())
         if escolha:
             row=df24[df24["identificacao"]==escolha].iloc[0]
             for k in defaults:
-                if k in row and pd.notna(row[k]): defaults[k]=str(row[k])
-
-    # opções dinâmicas
-    tipos      = get_distinct("tipo_bem")
-    subtipos   = get_distinct("subtipo_bem")
-    props      = get_distinct("proprietario")
-    tipo_props = get_distinct("tipo_propriedade")
-    controle_l = get_distinct("controle_desempenho")
-    combust_l  = get_distinct("tipo_combustivel")
-    acopl_l    = get_distinct("tipo_acoplamento")
-    motor_l    = get_distinct("motorizacao")
+                if k in row and pd.notna(row[k]):
+                    v=row[k]   # uso_km vem float: 1200.0 → "1200"
+                    defaults[k]=str(int(v)) if isinstance(v,float) and v.is_integer() else str(v)
+
+    # opções dinâmicas (uma consulta, em cache até a próxima escrita em equipamentos)
+    op         = vocabulario.listas()
+    tipos      = op["tipo_bem"]
+    subtipos   = op["subtipo_bem"]
+    props      = op["proprietario"]
+    tipo_props = op["tipo_propriedade"]
+    controle_l = op["controle_desempenho"]
+    combust_l  = op["tipo_combustivel"]
+    acopl_l    = op["tipo_acoplamento"]
+    motor_l    = op["motorizacao"]
 
     # ---------------------- formulário ----------------------
     st.markdown("---"); st.markdown("#### Adicionar / Editar equipamento 2025")
@@ -133,33 +137,42 @@ def run():
         campos_add = st.text_area("Campos Adicionais", value=defaults["campos_adicionais"])
         obs        = st.text_area("Observações", value=defaults["observacoes"])
 
+        forcar = st.checkbox("Adicionar mesmo com possível duplicado")
         add = st.form_submit_button("Adicionar à lista")
 
     # --------------- validação & append ---------------
     if add:
-        if not identificacao.strip():
-            st.error("Identificação é obrigatória.")
-        elif not sem_patr and not patr.strip():
-            st.error("Patrimônio é obrigatório.")
-        elif sem_patr and not justif.strip():
-            st.error("Justifique ausência do patrimônio.")
+        item = dict(
+            identificacao=identificacao,
+            codigo_renavam=renavam or "Não se aplica",
+            numero_serie_chassi=chassi or "Não se aplica",
+            ordem_num_patrimonio= patr if not sem_patr else f"JUST: {justif}",
+            fabricante=fabricante or "Não informado",
+            modelo=modelo or "Não informado",
+            tipo_bem=tipo_bem, subtipo_bem=subtipo_bem,
+            proprietario=proprietario, tipo_propriedade=tipo_prop,
+            tipo_acoplamento=tipo_acopl, motorizacao=motorizacao,
+            controle_desempenho=controle, uso_km=uso_km or "0",
+            tipo_combustivel=combust, status=status, cor=cor or "Não informado",
+            campos_adicionais=campos_add, observacoes=obs,
+            ano_fabricacao=str(ano_fab) if ano_fab else "",
+            ano_modelo=str(ano_mod) if ano_mod else ""
+        )
+        # mesmas regras da grade do admin e das importações
+        relatorio = validacao.validar(pd.DataFrame([{**item, "ano": 2025}]))
+        for msg in validacao.avisos(relatorio)["mensagem"]:
+            st.warning(msg)
+        dups = possiveis_duplicados(item, st.session_state.frota_temp)
+        for msg in dups:
+            st.warning(f"Possível duplicado: {msg}")
+        if not validacao.erros(relatorio).empty:
+            for msg in validacao.erros(relatorio)["mensagem"]:
+                st.error(msg)
+        elif dups and not forcar:
+            st.error("Confira os possíveis duplicados; para incluir assim mesmo, "
+                     "marque \"Adicionar mesmo com possível duplicado\".")
         else:
-            st.session_state.frota_temp.append(dict(
-                identificacao=identificacao,
-                codigo_renavam=renavam or "Não se aplica",
-                numero_serie_chassi=chassi or "Não se aplica",
-                ordem_num_patrimonio= patr if not sem_patr else f"JUST: {justif}",
-                fabricante=fabricante or "Não informado",
-                modelo=modelo or "Não informado",
-                tipo_bem=tipo_bem, subtipo_bem=subtipo_bem,
-                proprietario=proprietario, tipo_propriedade=tipo_prop,
-                tipo_acoplamento=tipo_acopl, motorizacao=motorizacao,
-                controle_desempenho=controle, uso_km=uso_km or "0",
-                tipo_combustivel=combust, status=status, cor=cor or "Não informado",
-                campos_adicionais=campos_add, observacoes=obs,
-                ano_fabricacao=str(ano_fab) if ano_fab else "",
-                ano_modelo=str(ano_mod) if ano_mod else ""
-            ))
+            st.session_state.frota_temp.append(item)
             st.success("Item colocado na lista.")
 
     # --------------- lista temp ---------------
@@ -171,35 +184,8 @@ def run():
     if st.session_state.frota_temp:
         if st.button("Salvar todos os itens", key="save_button"):
             try:
-                with get_connection() as con:
-                    sql_eqp = """
-                    INSERT INTO equipamentos (
-                      ano, centro_custo_uc, identificacao, codigo_renavam,
-                      numero_serie_chassi, ordem_num_patrimonio, fabricante,
-                      modelo, tipo_bem, subtipo_bem, proprietario, tipo_acoplamento,
-                      motorizacao, controle_desempenho, uso_km, campos_adicionais,
-                      tipo_propriedade, tipo_combustivel, status, cor, observacoes,
-                      data_aquisicao, ano_fabricacao, ano_modelo
-                    ) VALUES (2025,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-                    """
-                    sql_log = "INSERT INTO historico_atualizacoes (usuario_id,equipamento_codigo,acao,detalhes) VALUES (?,?, 'insercao',?)"
-                    uid, hoje = usr["id"], datetime.today().date()
-
-                    for it in st.session_state.frota_temp:
-                        cur = con.execute(sql_eqp, (
-                            setor, it["identificacao"], it["codigo_renavam"],
-                            it["numero_serie_chassi"], it["ordem_num_patrimonio"],
-                            it["fabricante"], it["modelo"], it["tipo_bem"], it["subtipo_bem"],
-                            it["proprietario"], it["tipo_acoplamento"], it["motorizacao"],
-                            it["controle_desempenho"], it["uso_km"], it["campos_adicionais"],
-                            it["tipo_propriedade"], it["tipo_combustivel"], it["status"],
-                            it["cor"], it["observacoes"], hoje,
-                            it["ano_fabricacao"] or None, it["ano_modelo"] or None
-                        ))
-                        eid = cur.lastrowid
-                        con.execute(sql_log, (uid, eid, f"inclusão por usuário {uid}"))
-
-                    con.commit()
+                repositorio.salvar_itens_2025(setor, usr["id"],
+                                              list(st.session_state.frota_temp))
                 st.session_state.frota_temp.clear()
                 st.success("Itens salvos – tabela 2024 atualizada.")
                 st.rerun()
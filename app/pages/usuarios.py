@@ -1,78 +1,49 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 import hashlib
 from app.services.auth import check_user_logged_in
+from app.services import cache, repositorio
 
 # ---------------- DB helpers ----------------
 
-def get_connection():
-    return sqlite3.connect("app/database/frota.db", check_same_thread=False)
-
 def hash_password(pwd: str) -> str:
     return hashlib.sha256(pwd.encode()).hexdigest()
 
 # --------------- CRUD Usuários ---------------
 
 def get_all_users() -> pd.DataFrame:
-    sql = """
-    SELECT u.id, u.username, u.nome, u.cpf, u.email, u.setor_codigo, u.tipo_usuario,
-           s.nome AS setor_nome, s.sigla AS setor_sigla
-      FROM usuario u
-      LEFT JOIN setor s ON s.codigo = u.setor_codigo
-     ORDER BY u.nome;
-    """
-    with get_connection() as con:
-        return pd.read_sql(sql, con)
-
-def create_user(username, nome, cpf, email, senha, setor_codigo, tipo):
-    with get_connection() as con:
-        con.execute(
-            "INSERT INTO usuario (username, nome, cpf, email, senha, setor_codigo, tipo_usuario) VALUES (?,?,?,?,?,?,?)",
-            (username, nome, cpf, email, hash_password(senha), setor_codigo, tipo)
-        )
+    return repositorio.listar_usuarios()
+
+def create_user(username, nome, cpf, email, senha, setor_codigo, tipo) -> bool:
+    return repositorio.criar_usuario(username, nome, cpf, email, hash_password(senha), setor_codigo, tipo)
 
 def update_user(user_id, username, nome, cpf, email, setor_codigo, tipo, reset_pwd=None):
-    cols = "username=?, nome=?, cpf=?, email=?, setor_codigo=?, tipo_usuario=?"
-    params = [username, nome, cpf, email, setor_codigo, tipo]
+    campos = {"username": username, "nome": nome, "cpf": cpf, "email": email,
+              "setor_codigo": setor_codigo, "tipo_usuario": tipo}
     if reset_pwd:
-        cols += ", senha=?"
-        params.append(hash_password(reset_pwd))
-    params.append(user_id)
-    with get_connection() as con:
-        con.execute(f"UPDATE usuario SET {cols} WHERE id=?", params)
+        campos["senha"] = hash_password(reset_pwd)
+    repositorio.atualizar_usuario(user_id, campos)
 
 def delete_user(uid):
-    with get_connection() as con:
-        adm = con.execute("SELECT tipo_usuario FROM usuario WHERE id=?", (uid,)).fetchone()
-        if adm and adm[0] == "admin":
-            qtd = con.execute("SELECT COUNT(*) FROM usuario WHERE tipo_usuario='admin'").fetchone()[0]
-            if qtd <= 1:
-                st.error("Não dá pra excluir o último admin!")
-                return
-        con.execute("DELETE FROM usuario WHERE id=?", (uid,))
+    erro = repositorio.excluir_usuario(uid)
+    if erro:
+        st.error(erro)
 
 # --------------- CRUD Setores ----------------
 
 def get_all_sectors() -> pd.DataFrame:
-    with get_connection() as con:
-        return pd.read_sql("SELECT codigo, nome, sigla, cnuc FROM setor ORDER BY nome", con)
+    return repositorio.listar_setores()
 
-def create_sector(nome, sigla, cnuc):
-    with get_connection() as con:
-        con.execute("INSERT INTO setor (nome, sigla, cnuc) VALUES (?,?,?)", (nome, sigla, cnuc))
+def create_sector(nome, sigla, cnuc) -> bool:
+    return repositorio.criar_setor(nome, sigla, cnuc)
 
-def update_sector(cod, nome, sigla, cnuc):
-    with get_connection() as con:
-        con.execute("UPDATE setor SET nome=?, sigla=?, cnuc=? WHERE codigo=?", (nome, sigla, cnuc, cod))
+def update_sector(cod, nome, sigla, cnuc) -> bool:
+    return repositorio.atualizar_setor(cod, nome, sigla, cnuc)
 
 def delete_sector(cod):
-    with get_connection() as con:
-        vinc = con.execute("SELECT COUNT(*) FROM usuario WHERE setor_codigo=?", (cod,)).fetchone()[0]
-        if vinc:
-            st.error("Setor com usuários vinculados não pode ser excluído.")
-            return
-        con.execute("DELETE FROM setor WHERE codigo=?", (cod,))
+    erro = repositorio.excluir_setor(cod)
+    if erro:
+        st.error(erro)
 
 # ---------------- Utils ----------------
 
@@ -175,8 +146,9 @@ def render_sector_card(row: pd.Series):
             if c1.form_submit_button("💾 Salvar"):
                 if not s_nome or not s_sigla:
                     st.error("Preencha todos os campos obrigatórios.")
+                elif not update_sector(sid, s_nome, s_sigla, s_cnuc):
+                    st.error("Já existe um setor com esse nome.")
                 else:
-                    update_sector(sid, s_nome, s_sigla, s_cnuc)
                     st.session_state.pop("edit_sector", None)
                     st.success("Atualizado.")
                     rerun()
@@ -230,8 +202,9 @@ def dialog_new_user():
     if st.button("Salvar Novo Usuário"):
         if not all([d["username"], d["nome"], d["email"], d["senha"], d["setor"]]):
             st.error("Preencha campos obrigatórios.")
+        elif not create_user(d["username"], d["nome"], d["cpf"], d["email"], d["senha"], d["setor"], d["tipo"]):
+            st.error("Usuário ou CPF já cadastrado.")
         else:
-            create_user(d["username"], d["nome"], d["cpf"], d["email"], d["senha"], d["setor"], d["tipo"])
             st.success("Usuário criado!")
             st.session_state.pop("_new_user", None)
             rerun()
@@ -245,12 +218,35 @@ def dialog_new_sector():
     if st.button("Salvar Novo Setor"):
         if not d["nome"] or not d["sigla"]:
             st.error("Preencha todos os campos obrigatórios.")
+        elif not create_sector(d["nome"], d["sigla"], d["cnuc"]):
+            st.error("Já existe um setor com esse nome.")
         else:
-            create_sector(d["nome"], d["sigla"], d["cnuc"])
             st.success("Setor criado!")
             st.session_state.pop("_new_sector", None)
             rerun()
 
+# ---------- Cache de consultas ----------
+
+def render_cache_stats():
+    s = cache.stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Acertos", s["acertos"])
+    c2.metric("Falhas", s["falhas"])
+    c3.metric("Taxa de acerto", f"{s['taxa_acerto']:.0%}")
+    c4.metric("Entradas", f"{s['entradas']} ({s['bytes'] / 2**20:.1f} MB)")
+    if s["por_funcao"]:
+        st.dataframe(
+            pd.DataFrame.from_dict(s["por_funcao"], orient="index")
+                .rename_axis("Consulta").reset_index()
+                .rename(columns={"acertos": "Acertos", "falhas": "Falhas", "entradas": "Entradas"}),
+            hide_index=True, use_container_width=True,
+        )
+    st.caption(f"Versões das tabelas: {s['versoes']}")
+    if st.button("Esvaziar cache"):
+        cache.limpar()
+        rerun()
+
+
 # ---------- Página Principal ----------
 
 def run():
@@ -259,7 +255,7 @@ def run():
         st.error("Acesso só pra administradores.")
         return
 
-    aba_usr, aba_set = st.tabs(["Gestão de Usuários", "Gestão de Setores"])
+    aba_usr, aba_set, aba_cache = st.tabs(["Gestão de Usuários", "Gestão de Setores", "Cache"])
 
     # Usuários
     with aba_usr:
@@ -317,10 +313,13 @@ def run():
                 column_config={"Código": st.column_config.TextColumn(disabled=True)}
             )
             if st.button("Salvar Alterações (Lista)", key="save_setores"):
-                for _, r in edit_df.iterrows():
-                    update_sector(r["Código"], r["Nome"], r["Sigla"], r["CNUC"])
-                st.success("Atualizado!")
-                rerun()
+                repetidos = [r["Nome"] for _, r in edit_df.iterrows()
+                             if not update_sector(r["Código"], r["Nome"], r["Sigla"], r["CNUC"])]
+                if repetidos:
+                    st.error("Já existe um setor com esse nome: " + ", ".join(repetidos))
+                else:
+                    st.success("Atualizado!")
+                    rerun()
         else:
             for chunk in chunkify(df_s.itertuples(), 3):
                 cols = st.columns(len(chunk))
@@ -328,5 +327,9 @@ def run():
                     with c:
                         render_sector_card(pd.Series(row._asdict()))
 
+    # Cache
+    with aba_cache:
+        render_cache_stats()
+
 if __name__ == "__main__":
     run()
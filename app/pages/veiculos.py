@@ -1,31 +1,81 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 from app.services.auth import check_user_logged_in
+from app.services import consultas, repositorio, validacao, vocabulario
+
+# linhas por página na grade do admin
+TAMANHOS_PAGINA = [50, 100, 200, 500]
+
+# Usuário comum: só os equipamentos que ele atualizou
+# (o admin usa a grade paginada no banco, abaixo)
+def load_data(user_id: int) -> pd.DataFrame:
+    return repositorio.equipamentos_do_usuario(user_id)
+
+# ---------- grade do admin (paginada no banco) ----------
+def filtros_grade() -> dict:
+    setores = repositorio.listar_setores()
+    op = vocabulario.listas()
+    c = st.columns([3, 1, 3, 2, 2, 1])
+    return {
+        "setor": c[0].selectbox(
+            "Setor", [None] + setores.codigo.tolist(),
+            format_func=lambda x: "Todos" if x is None else
+            f"{setores.loc[setores.codigo==x,'nome'].values[0]} ({setores.loc[setores.codigo==x,'sigla'].values[0]})"),
+        "ano": c[1].selectbox("Ano", [None] + repositorio.anos(),
+                              format_func=lambda x: "Todos" if x is None else str(x)),
+        "status": c[2].selectbox("Status", [""] + op["status"]),
+        "combustivel": c[3].selectbox("Combustível", [""] + op["tipo_combustivel"]),
+        "modelo": c[4].text_input("Modelo contém"),
+        "_limite": c[5].selectbox("Linhas", TAMANHOS_PAGINA, index=1),
+        **ordem_grade(),
+    }
+
+
+def ordem_grade() -> dict:
+    c = st.columns([3, 2, 7])
+    return {
+        "_ordem": c[0].selectbox("Ordenar por", consultas.ORDENS_GRADE),
+        "_desc": c[1].radio("Sentido", [False, True], horizontal=True,
+                            format_func=lambda d: "↓ desc." if d else "↑ cresc."),
+    }
+
+
+def pagina_grade(filtros: dict) -> tuple[pd.DataFrame, bool]:
+    """Página atual da grade. Guarda em sessão só ela e a pilha de cursores
+    (última linha de cada página anterior, ver repositorio.cursor_grade);
+    filtro ou ordem nova volta à página 1."""
+    ss = st.session_state
+    chave_filtros = tuple(sorted(filtros.items()))
+    if ss.get("grade_filtros") != chave_filtros:
+        ss.grade_filtros = chave_filtros
+        ss.grade_cursores = [None]
+        ss.pop("grade_chave", None)
+    chave = (chave_filtros, ss.grade_cursores[-1])
+    if ss.get("grade_chave") != chave:
+        busca = {k: v for k, v in filtros.items() if not k.startswith("_")}
+        ss.grade_pagina, ss.grade_tem_mais = repositorio.pagina_equipamentos(
+            busca, ss.grade_cursores[-1], filtros["_limite"], filtros["_ordem"], filtros["_desc"])
+        ss.grade_total = repositorio.contar_equipamentos(busca)
+        ss.grade_chave = chave
+    return ss.grade_pagina, ss.grade_tem_mais
+
+
+def navegar_grade(df: pd.DataFrame, tem_mais: bool, ordem: str) -> None:
+    ss = st.session_state
+    c = st.columns([1, 3, 1])
+    if c[0].button("◀ Anterior", disabled=len(ss.grade_cursores) == 1):
+        ss.grade_cursores.pop()
+        st.rerun()
+    c[1].caption(f"Página {len(ss.grade_cursores)} · {ss.grade_total} equipamento(s) no filtro")
+    if c[2].button("Próxima ▶", disabled=not tem_mais):
+        ss.grade_cursores.append(repositorio.cursor_grade(df.iloc[-1], ordem))
+        st.rerun()
+
+
+def refazer_pagina() -> None:
+    """Depois de salvar: relê a página atual do banco."""
+    st.session_state.pop("grade_chave", None)
 
-# Caminho do banco de dados SQLite
-DB = "app/database/frota.db"
-
-# Função para obter conexão com o banco
-def get_connection():
-    return sqlite3.connect(DB, check_same_thread=False)
-
-# Carrega todos os registros da tabela equipamentos para admin
-# ou apenas os equipamentos que o usuário atualizou em seu setor
-def load_data(user_id: int, setor: int, is_admin: bool) -> pd.DataFrame:
-    with get_connection() as con:
-        if is_admin:
-            sql = "SELECT * FROM equipamentos"
-            return pd.read_sql(sql, con)
-        # usuário comum: só vê equipamentos que ele atualizou
-        codes_sql = "SELECT DISTINCT equipamento_codigo FROM historico_atualizacoes WHERE usuario_id = ?"
-        codes = [r[0] for r in con.execute(codes_sql, (user_id,)).fetchall()]
-        if not codes:
-            return pd.DataFrame(columns=[])  # nenhum equipamento atualizado
-        # montar placeholders dinamicamente
-        placeholders = ",".join("?" for _ in codes)
-        sql = f"SELECT * FROM equipamentos WHERE codigo IN ({placeholders})"
-        return pd.read_sql(sql, con, params=codes)
 
 # Página principal
 def run():
@@ -33,32 +83,40 @@ def run():
     user = st.session_state.user
     is_admin = user.get("tipo_usuario") == "admin"
     user_id = user.get("id")
-    setor = user.get("setor_codigo")
 
     st.title("📋 Equipamentos")
 
-    df = load_data(user_id, setor, is_admin)
-    if df.empty:
-        if is_admin:
-            st.info("Nenhum equipamento cadastrado.")
-        else:
-            st.info("Você não atualizou nenhum equipamento neste setor.")
-        return
-
     if is_admin:
         st.subheader("✏️ Modo Admin: edição habilitada")
-        edited = st.data_editor(df, use_container_width=True)
+        filtros = filtros_grade()
+        df, tem_mais = pagina_grade(filtros)
+        if df.empty:
+            st.info("Nenhum equipamento encontrado.")
+            return
+        edited = st.data_editor(df, use_container_width=True, hide_index=True,
+                                disabled=["codigo"])
+        navegar_grade(df, tem_mais, filtros["_ordem"])
         if st.button("💾 Salvar alterações"):
-            with get_connection() as con:
-                for _, row in edited.iterrows():
-                    codigo = row['codigo']
-                    cols = [c for c in df.columns if c != 'codigo']
-                    set_clause = ", ".join(f"{c}=?" for c in cols)
-                    params = [row[c] for c in cols] + [codigo]
-                    con.execute(f"UPDATE equipamentos SET {set_clause} WHERE codigo = ?", params)
-                con.commit()
-            st.success("Alterações salvas com sucesso.")
-            st.rerun()
+            # mesmas regras do formulário, só nas células alteradas
+            relatorio = validacao.validar_edicao(df, edited)
+            for r in validacao.avisos(relatorio).itertuples():
+                st.warning(f"Equipamento {r.linha}: {r.mensagem}")
+            if not validacao.erros(relatorio).empty:
+                for r in validacao.erros(relatorio).itertuples():
+                    st.error(f"Equipamento {r.linha}: {r.mensagem}")
+                return
+            n = repositorio.atualizar_equipamentos(df, edited, user_id)
+            if n:
+                refazer_pagina()
+                st.success(f"Alterações salvas com sucesso ({n} equipamento(s)).")
+                st.rerun()
+            else:
+                st.info("Nenhuma alteração para salvar.")
+        return
+
+    df = load_data(user_id)
+    if df.empty:
+        st.info("Você não atualizou nenhum equipamento neste setor.")
     else:
         st.subheader("👀 Modo Leitura: apenas visualização")
         st.dataframe(df, use_container_width=True)
@@ -0,0 +1,147 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import pandas as pd
+
+from app.services import backend
+
+# ------------------------------------------------------------------ #
+# Cache de consultas compartilhado entre sessões                     #
+# ------------------------------------------------------------------ #
+# Guarda o resultado das leituras do repositório por (função, parâmetros),
+# para todas as sessões do processo. Uma entrada sai quando:
+#   - passa o TTL;
+#   - alguma tabela que ela lê mudou de versão (versao_dados, mantida por
+#     gatilhos: pega escritas da aplicação, da importação e de outros
+#     processos);
+#   - o cache passa do limite de entradas ou de bytes (sai a usada há
+#     mais tempo).
+# As versões são relidas no máximo a cada VERIFICAR_S; uma escrita feita
+# por este processo (repositorio) chama tocar() e força a releitura.
+#
+# O resultado é compartilhado: quem recebe um DataFrame do cache não
+# pode alterá-lo no lugar.
+
+TTL_S = 300
+MAX_ENTRADAS = 512
+MAX_BYTES = 256 * 1024 * 1024
+VERIFICAR_S = 1.0
+
+_lock = threading.Lock()
+_entradas: OrderedDict = OrderedDict()   # chave → (valor, bytes, expira_em, versões)
+_bytes = 0
+_versoes: dict = {"lidas_em": 0.0, "backend": None, "valores": {}}
+_stats: dict[str, dict] = {}
+
+
+def _hashavel(v):
+    if isinstance(v, dict):
+        return tuple(sorted((k, _hashavel(x)) for k, x in v.items()))
+    if isinstance(v, (list, tuple, set)):
+        return tuple(_hashavel(x) for x in v)
+    return v
+
+
+def _tamanho(v) -> int:
+    if isinstance(v, pd.DataFrame):
+        return int(v.memory_usage(deep=True).sum())
+    if isinstance(v, dict):
+        return sys.getsizeof(v) + sum(_tamanho(x) for x in v.values())
+    if isinstance(v, (list, tuple)):
+        return sys.getsizeof(v) + sum(_tamanho(x) for x in v)
+    return sys.getsizeof(v)
+
+
+def _versoes_atuais(b) -> dict:
+    """{tabela: versao}, relido do banco no máximo a cada VERIFICAR_S."""
+    agora = time.monotonic()
+    with _lock:
+        if _versoes["backend"] is b and agora - _versoes["lidas_em"] < VERIFICAR_S:
+            return _versoes["valores"]
+    valores = dict(b.linhas("SELECT tabela, versao FROM versao_dados"))
+    with _lock:
+        _versoes.update(lidas_em=agora, backend=b, valores=valores)
+    return valores
+
+
+def _descartar(chave) -> None:
+    global _bytes
+    _, tam, _, _ = _entradas.pop(chave)
+    _bytes -= tam
+
+
+def em_cache(*tabelas: str, ttl: float = TTL_S):
+    """Decorador: guarda o resultado por parâmetros enquanto as ``tabelas``
+    não mudarem e o TTL não vencer."""
+    def decorador(func):
+        nome = func.__name__
+
+        @wraps(func)
+        def embrulho(*args, **kwargs):
+            global _bytes
+            b = backend.atual()
+            chave = (id(b), nome, _hashavel(args), _hashavel(kwargs))
+            versoes = _versoes_atuais(b)
+            marca = tuple(versoes.get(t) for t in tabelas)
+            agora = time.monotonic()
+            st = _stats.setdefault(nome, {"acertos": 0, "falhas": 0})
+            with _lock:
+                entrada = _entradas.get(chave)
+                if entrada and entrada[2] > agora and entrada[3] == marca:
+                    _entradas.move_to_end(chave)
+                    st["acertos"] += 1
+                    return entrada[0]
+                st["falhas"] += 1
+                if entrada:
+                    _descartar(chave)
+
+            valor = func(*args, **kwargs)
+            tam = _tamanho(valor)
+            with _lock:
+                if chave in _entradas:
+                    _descartar(chave)
+                _entradas[chave] = (valor, tam, agora + ttl, marca)
+                _bytes += tam
+                while _entradas and (len(_entradas) > MAX_ENTRADAS or _bytes > MAX_BYTES):
+                    _descartar(next(iter(_entradas)))
+            return valor
+
+        embrulho.sem_cache = func
+        return embrulho
+    return decorador
+
+
+def tocar() -> None:
+    """Chamado após escritas deste processo: a próxima leitura relê as versões."""
+    with _lock:
+        _versoes["lidas_em"] = 0.0
+
+
+def limpar() -> None:
+    global _bytes
+    with _lock:
+        _entradas.clear()
+        _bytes = 0
+        _versoes["lidas_em"] = 0.0
+
+
+def stats() -> dict:
+    """Contadores por função e ocupação, para a tela do admin."""
+    with _lock:
+        por_funcao = {n: {**s, "entradas": 0} for n, s in _stats.items()}
+        for (_, nome, _, _) in _entradas:
+            por_funcao[nome]["entradas"] += 1
+        acertos = sum(s["acertos"] for s in _stats.values())
+        falhas = sum(s["falhas"] for s in _stats.values())
+        return {
+            "entradas": len(_entradas),
+            "bytes": _bytes,
+            "acertos": acertos,
+            "falhas": falhas,
+            "taxa_acerto": acertos / (acertos + falhas) if acertos + falhas else 0.0,
+            "por_funcao": por_funcao,
+            "versoes": dict(_versoes["valores"]),
+        }
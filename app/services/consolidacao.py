@@ -0,0 +1,367 @@
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from app.services import db, duplicados
+from app.services.correspondencia import Correspondencia
+from app.services.migracoes import migrar
+
+# ------------------------------------------------------------------ #
+# Consolidação do veiculos.db no frota.db                            #
+# ------------------------------------------------------------------ #
+# O veiculos.db (planilhas antigas) guarda tudo como TEXT e com outros
+# nomes de coluna. Aqui ele é anexado (ATTACH, só leitura) e cada tabela
+# é mapeada para o esquema tipado do frota.db com INSERT…SELECT:
+#
+#   frota, frota_2025          → equipamentos (ano 2024 / 2025)
+#   estrutura                  → estrutura
+#   correspondentes,
+#   nao_correspondentes        → centro_custo_legado (nome antigo → setor;
+#                                 os sem par passam pelo índice de
+#                                 app/services/correspondencia.py)
+#   dimensao_frota_2024        → dimensao_frota_2024
+#   usuario                    → só vincula ao usuario de mesmo e-mail
+#
+# A tabela consolidacao guarda origem → destino de cada linha já
+# tratada, então rodar de novo só olha o que faltou. Uma linha de frota
+# que já existe em equipamentos (mesma identificação e chassi, no mesmo
+# ano) é vinculada, não duplicada. O que não dá para mapear (setor
+# desconhecido, ano que não é ano, usuário sem par) vai para
+# consolidacao_pendencias, refeita a cada rodada. No fim, na mesma
+# transação, chaves_equipamento (app/services/duplicados.py) é posta em dia.
+#
+# Roda sobre o arquivo SQLite (ATTACH); no PostgreSQL, consolide o
+# frota.db antes da carga.
+
+ORIGEM = "legado"
+
+
+def _txt(c: str) -> str:
+    return f"NULLIF(TRIM(CAST({c} AS TEXT)), '')"
+
+
+def _ano(c: str) -> str:
+    return (f"CASE WHEN TRIM(CAST({c} AS TEXT)) GLOB '[12][0-9][0-9][0-9]' "
+            f"THEN CAST(TRIM(CAST({c} AS TEXT)) AS INTEGER) END")
+
+
+def _num(c: str) -> str:
+    return (f"CASE WHEN {_txt(c)} NOT GLOB '*[^0-9.]*' "
+            f"THEN CAST(TRIM(CAST({c} AS TEXT)) AS NUMERIC) END")
+
+
+CONVERSORES = {"txt": _txt, "ano": _ano, "num": _num}
+MOTIVOS = {"ano": "não é um ano (aaaa)", "num": "não é um número"}
+
+# origem → ano de destino, coluna do setor e {coluna de equipamentos: (conversor, coluna de origem)}
+EQUIPAMENTOS = {
+    "frota": (2024, "centro_custo", {
+        "identificacao": ("txt", "identificacao"),
+        "proprietario": ("txt", "proprietario"),
+        "lotacao": ("txt", "lotacao"),
+        "codigo_renavam": ("txt", "codigo_renavam"),
+        "numero_serie_chassi": ("txt", "numero_chassi"),
+        "fabricante": ("txt", "fabricante"),
+        "modelo": ("txt", "modelo"),
+        "ano_fabricacao": ("ano", "ano_fabricacao"),
+        "ano_modelo": ("ano", "ano_modelo"),
+        "tipo_acoplamento": ("txt", "tipo_acoplamento"),
+        "motorizacao": ("txt", "motorizacao"),
+        "subtipo_bem": ("txt", '"tipo veiculo"'),
+        "status": ("txt", "status"),
+        "controle_desempenho": ("txt", "controle_desempenho"),
+        "uso_km": ("num", "uso_km"),
+        "campos_adicionais": ("txt", "campos_adicionais"),
+        "tipo_propriedade": ("txt", "tipo_prioridade"),
+        "tipo_combustivel": ("txt", "tipo_combustivel"),
+        "data_aquisicao": ("txt", "data_aquisicao"),
+        "cor": ("txt", "cor"),
+        "ordem_num_patrimonio": ("txt", "numero_patrimonio"),
+        "observacoes": ("txt", "obs"),
+    }),
+    "frota_2025": (2025, "setor_id", {
+        "identificacao": ("txt", "placa"),
+        "proprietario": ("txt", "proprietario"),
+        "codigo_renavam": ("txt", "renavam"),
+        "numero_serie_chassi": ("txt", "numero_chassi"),
+        "fabricante": ("txt", "marca"),
+        "modelo": ("txt", "modelo"),
+        "ano_fabricacao": ("ano", "ano_fabricacao"),
+        "ano_modelo": ("ano", "ano_modelo"),
+        "tipo_bem": ("txt", "tipo_bem"),
+        "subtipo_bem": ("txt", "subtipo_bem"),
+        "status": ("txt", "status"),
+        "tipo_combustivel": ("txt", "combustivel"),
+        "cor": ("txt", "cor"),
+        "ordem_num_patrimonio": ("txt", "numero_patrimonio"),
+        "observacoes": ("txt", "observacao"),
+    }),
+}
+
+DIMENSAO = {
+    "gerencia_regional": "gerencia_regional",
+    "tipo_bem": "tipo_bem",
+    "subtipo_bem": "subtipo_bem",
+    "identificacao": "placa",
+    "numero_serie_chassi": "numero_chassi",
+    "codigo_renavam": "renavam",
+    "ordem_num_patrimonio": "numero_patrimonio",
+    "proprietario": "proprietario",
+    "fabricante": "marca",
+    "modelo": "modelo",
+    "cor": "cor",
+    "tipo_combustivel": "combustivel",
+    "status": "status",
+}
+
+
+def _setor(c: str) -> str:
+    """Código do setor: nome exato, nome antigo já correspondido ou código inteiro."""
+    return f"""COALESCE(
+        (SELECT codigo FROM setor WHERE nome = {_txt(c)}),
+        (SELECT setor_codigo FROM centro_custo_legado WHERE nome = {_txt(c)}),
+        CASE WHEN typeof({c}) = 'integer' THEN (SELECT codigo FROM setor WHERE codigo = {c}) END)"""
+
+
+def _pendencias(con, origem: str, sql: str, params=()) -> int:
+    """Grava as pendências de ``sql`` (origem_id, coluna, valor, motivo)."""
+    return con.execute(
+        f"INSERT INTO consolidacao_pendencias (origem, origem_id, coluna, valor, motivo) "
+        f"SELECT ?, * FROM ({sql}) WHERE true ON CONFLICT DO NOTHING", (origem, *params)
+    ).rowcount
+
+
+# ------------------------------------------------------------------ #
+# Tabelas de referência                                              #
+# ------------------------------------------------------------------ #
+def _estrutura(con) -> dict:
+    ins = con.execute(f"""
+        INSERT INTO estrutura (id, sigla, uorg)
+        SELECT id, {_txt('Sigla')}, {_txt('uorg')} FROM {ORIGEM}.estrutura
+         WHERE {_txt('Sigla')} IS NOT NULL
+        ON CONFLICT (id) DO NOTHING
+    """).rowcount
+    pend = _pendencias(con, "estrutura", f"""
+        SELECT id, 'sigla', uorg, 'sigla vazia' FROM {ORIGEM}.estrutura
+         WHERE {_txt('Sigla')} IS NULL""")
+    return {"inseridas": ins, "pendentes": pend}
+
+
+def _centros_de_custo(con) -> dict:
+    grav = con.execute(f"""
+        INSERT INTO centro_custo_legado (nome, cnuc, setor_codigo)
+        SELECT nome, MAX(cnuc), MAX(setor_codigo) FROM (
+            SELECT {_txt('centro_de_custo_uc')} AS nome, {_txt('cnuc')} AS cnuc,
+                   (SELECT codigo FROM setor WHERE nome = {_txt('nome_uc')}) AS setor_codigo
+              FROM {ORIGEM}.correspondentes
+            UNION ALL
+            SELECT {_txt('centro_custo_uc')}, NULL, NULL FROM {ORIGEM}.nao_correspondentes
+            UNION ALL
+            SELECT DISTINCT {_txt('centro_custo')}, NULL, NULL FROM {ORIGEM}.frota
+            UNION ALL
+            SELECT DISTINCT {_txt('setor_id')}, NULL, NULL FROM {ORIGEM}.frota_2025
+             WHERE typeof(setor_id) = 'text'
+        ) WHERE nome IS NOT NULL
+        GROUP BY nome
+        ON CONFLICT (nome) DO UPDATE SET
+            cnuc = COALESCE(centro_custo_legado.cnuc, excluded.cnuc),
+            setor_codigo = COALESCE(centro_custo_legado.setor_codigo, excluded.setor_codigo)
+    """).rowcount
+    # nomes ainda sem setor: nome normalizado, CNUC, sigla ou aproximado
+    corr = Correspondencia.do_banco(lambda sql: con.execute(sql).fetchall())
+    sem_setor = [r[0] for r in con.execute(
+        "SELECT nome FROM centro_custo_legado WHERE setor_codigo IS NULL")]
+    achados = [(c, n) for n, c in zip(sem_setor, corr.resolver_todos(sem_setor)) if c is not None]
+    con.executemany("UPDATE centro_custo_legado SET setor_codigo = ? WHERE nome = ?", achados)
+    pend = _pendencias(con, "correspondentes", f"""
+        SELECT id, 'nome_uc', nome_uc, 'nome_uc não é um setor' FROM {ORIGEM}.correspondentes c
+         WHERE {_txt('centro_de_custo_uc')} IS NOT NULL
+           AND NOT EXISTS (SELECT 1 FROM setor s WHERE s.nome = {_txt('c.nome_uc')})""")
+    pend += _pendencias(con, "nao_correspondentes", f"""
+        SELECT id, 'centro_custo_uc', centro_custo_uc,
+               CASE WHEN {_txt('centro_custo_uc')} IS NULL THEN 'nome vazio'
+                    ELSE 'sem setor correspondente' END
+          FROM {ORIGEM}.nao_correspondentes n
+         WHERE NOT EXISTS (SELECT 1 FROM centro_custo_legado l
+                            WHERE l.nome = {_txt('n.centro_custo_uc')} AND l.setor_codigo IS NOT NULL)""")
+    # setor.cnuc ainda vazio recebe o CNUC da planilha de correspondência
+    con.execute("""
+        UPDATE setor SET cnuc = (SELECT MIN(l.cnuc) FROM centro_custo_legado l
+                                  WHERE l.setor_codigo = setor.codigo)
+         WHERE cnuc IS NULL
+           AND EXISTS (SELECT 1 FROM centro_custo_legado l
+                        WHERE l.setor_codigo = setor.codigo AND l.cnuc IS NOT NULL)
+    """)
+    return {"gravadas": grav, "correspondidas": len(achados), "pendentes": pend}
+
+
+def _dimensao(con) -> dict:
+    cols = ", ".join(DIMENSAO)
+    sel = ", ".join(_txt(c) for c in DIMENSAO.values())
+    ins = con.execute(f"""
+        INSERT INTO dimensao_frota_2024 (id, {cols})
+        SELECT id, {sel} FROM {ORIGEM}.dimensao_frota_2024 WHERE true
+        ON CONFLICT (id) DO NOTHING
+    """).rowcount
+    return {"inseridas": ins, "pendentes": 0}
+
+
+def _usuarios(con, agora: str) -> dict:
+    vinc = con.execute(f"""
+        INSERT INTO consolidacao (origem, origem_id, destino, destino_id, consolidado_em)
+        SELECT 'usuario', l.id, 'usuario', u.id, ? FROM {ORIGEM}.usuario l
+          JOIN usuario u ON LOWER(u.email) = LOWER(TRIM(l.email))
+        WHERE true
+        ON CONFLICT DO NOTHING
+    """, (agora,)).rowcount
+    # senha em bcrypt e sem CPF: não dá para criar o login; o usuário se recadastra
+    pend = _pendencias(con, "usuario", f"""
+        SELECT id, 'email', email, 'sem usuário com este e-mail no frota.db' FROM {ORIGEM}.usuario l
+         WHERE NOT EXISTS (SELECT 1 FROM consolidacao c
+                            WHERE c.origem = 'usuario' AND c.origem_id = l.id)""")
+    return {"vinculadas": vinc, "pendentes": pend}
+
+
+# ------------------------------------------------------------------ #
+# Equipamentos                                                       #
+# ------------------------------------------------------------------ #
+def _equipamentos(con, origem: str, agora: str) -> dict:
+    ano, col_setor, mapa = EQUIPAMENTOS[origem]
+    cols = list(mapa)
+    sel = ", ".join(f"{CONVERSORES[conv](c)} AS {dest}" for dest, (conv, c) in mapa.items())
+
+    # valores que não couberam no tipo da coluna (a linha entra com NULL)
+    pend = 0
+    for dest, (conv, c) in mapa.items():
+        if conv != "txt":
+            pend += _pendencias(con, origem, f"""
+                SELECT id, '{dest}', {c}, '{MOTIVOS[conv]}' FROM {ORIGEM}.{origem}
+                 WHERE {_txt(c)} IS NOT NULL AND {CONVERSORES[conv](c)} IS NULL""")
+
+    con.execute("DROP TABLE IF EXISTS temp._entrada")
+    con.execute(f"""
+        CREATE TEMP TABLE _entrada AS
+        SELECT o.id AS origem_id, {_txt(col_setor)} AS setor_origem,
+               {_setor(col_setor)} AS centro_custo_uc, {sel}
+          FROM {ORIGEM}.{origem} o
+         WHERE NOT EXISTS (SELECT 1 FROM consolidacao c
+                            WHERE c.origem = ? AND c.origem_id = o.id)
+    """, (origem,))
+    con.execute("CREATE UNIQUE INDEX temp.ix_entrada_origem ON _entrada (origem_id)")
+
+    # já existe no ano: pareia pela (identificação, chassi); repetidos
+    # pareiam na ordem (1º com 1º, 2º com 2º…)
+    con.execute("DROP TABLE IF EXISTS temp._candidatos")
+    con.execute(f"""
+        CREATE TEMP TABLE _candidatos AS
+        SELECT codigo, identificacao, COALESCE({_txt('numero_serie_chassi')}, '') AS chassi,
+               ROW_NUMBER() OVER (PARTITION BY identificacao, {_txt('numero_serie_chassi')}
+                                  ORDER BY codigo) AS n
+          FROM equipamentos e
+         WHERE ano = ? AND identificacao IN (SELECT identificacao FROM _entrada)
+           AND NOT EXISTS (SELECT 1 FROM consolidacao c
+                            WHERE c.destino = 'equipamentos' AND c.destino_id = e.codigo)
+    """, (ano,))
+    con.execute("CREATE INDEX temp.ix_candidatos ON _candidatos (identificacao, chassi, n)")
+    con.execute("DROP TABLE IF EXISTS temp._destino")
+    con.execute("""
+        CREATE TEMP TABLE _destino AS
+        WITH o AS (
+            SELECT origem_id, identificacao, COALESCE(numero_serie_chassi, '') AS chassi,
+                   ROW_NUMBER() OVER (PARTITION BY identificacao, numero_serie_chassi
+                                      ORDER BY origem_id) AS n
+              FROM _entrada WHERE identificacao IS NOT NULL
+        )
+        SELECT o.origem_id, d.codigo, 0 AS novo
+          FROM o JOIN _candidatos d ON d.identificacao = o.identificacao
+                                   AND d.chassi = o.chassi AND d.n = o.n
+    """)
+    con.execute("CREATE UNIQUE INDEX temp.ix_destino_origem ON _destino (origem_id)")
+    vinc = con.execute("SELECT COUNT(*) FROM _destino").fetchone()[0]
+
+    # o resto entra como linha nova, com códigos reservados em bloco
+    base = con.execute("SELECT COALESCE(MAX(codigo), 0) FROM equipamentos").fetchone()[0]
+    ins = con.execute("""
+        INSERT INTO _destino (origem_id, codigo, novo)
+        SELECT origem_id, ? + ROW_NUMBER() OVER (ORDER BY origem_id), 1 FROM _entrada e
+         WHERE centro_custo_uc IS NOT NULL
+           AND NOT EXISTS (SELECT 1 FROM _destino d WHERE d.origem_id = e.origem_id)
+    """, (base,)).rowcount
+    con.execute(f"""
+        INSERT INTO equipamentos (codigo, ano, centro_custo_uc, {', '.join(cols)})
+        SELECT d.codigo, ?, e.centro_custo_uc, {', '.join('e.' + c for c in cols)}
+          FROM _destino d JOIN _entrada e ON e.origem_id = d.origem_id
+         WHERE d.novo = 1
+    """, (ano,))
+    con.execute("""
+        INSERT INTO consolidacao (origem, origem_id, destino, destino_id, consolidado_em)
+        SELECT ?, origem_id, 'equipamentos', codigo, ? FROM _destino
+    """, (origem, agora))
+
+    pend += _pendencias(con, origem, """
+        SELECT origem_id, 'setor', setor_origem,
+               CASE WHEN setor_origem IS NULL THEN 'sem setor' ELSE 'setor não encontrado' END
+          FROM _entrada e
+         WHERE NOT EXISTS (SELECT 1 FROM _destino d WHERE d.origem_id = e.origem_id)""")
+    return {"vinculadas": vinc, "inseridas": ins, "pendentes": pend}
+
+
+# ------------------------------------------------------------------ #
+# Execução                                                           #
+# ------------------------------------------------------------------ #
+def consolidar(destino: str | Path = db._DB_PATH, origem: str | Path = db.VEICULOS_DB_PATH,
+               log=print) -> dict:
+    """Consolida o veiculos.db no frota.db numa única transação.
+
+    Idempotente: rodar de novo não duplica nada e só tenta o que ficou
+    pendente (por exemplo, depois de cadastrar um setor que faltava).
+    Devolve {tabela de origem: contagens}.
+    """
+    con = sqlite3.connect(Path(destino).resolve().as_uri(), uri=True, isolation_level=None)
+    try:
+        con.execute("PRAGMA foreign_keys = ON")
+        con.execute("PRAGMA busy_timeout = 5000")
+        migrar(con, log=log)
+        con.execute(f"ATTACH DATABASE ? AS {ORIGEM}", (Path(origem).resolve().as_uri() + "?mode=ro",))
+        agora = datetime.now().isoformat(timespec="seconds")
+        relatorio = {}
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute("DELETE FROM consolidacao_pendencias")
+            for nome, passo in (("estrutura", _estrutura),
+                                ("correspondentes", _centros_de_custo),
+                                ("dimensao_frota_2024", _dimensao)):
+                inicio = time.perf_counter()
+                relatorio[nome] = passo(con)
+                log(f"→ {nome}: {relatorio[nome]} ({time.perf_counter() - inicio:.2f}s)")
+            for nome in EQUIPAMENTOS:
+                inicio = time.perf_counter()
+                relatorio[nome] = _equipamentos(con, nome, agora)
+                log(f"→ {nome}: {relatorio[nome]} ({time.perf_counter() - inicio:.2f}s)")
+            relatorio["usuario"] = _usuarios(con, agora)
+            log(f"→ usuario: {relatorio['usuario']}")
+            relatorio["chaves_equipamento"] = {"atualizadas": duplicados.atualizar_chaves(con)}
+            for tabela in ("_entrada", "_candidatos", "_destino"):
+                con.execute(f"DROP TABLE IF EXISTS temp.{tabela}")
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute(f"DETACH DATABASE {ORIGEM}")
+        con.execute("ANALYZE")
+        return relatorio
+    finally:
+        con.close()
+
+
+def pendencias(destino: str | Path = db._DB_PATH) -> pd.DataFrame:
+    """Linhas e valores que a última consolidação não conseguiu mapear."""
+    con = sqlite3.connect(destino)
+    try:
+        return pd.read_sql_query(
+            "SELECT * FROM consolidacao_pendencias ORDER BY origem, motivo, origem_id", con)
+    finally:
+        con.close()
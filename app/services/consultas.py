@@ -0,0 +1,123 @@
+# ------------------------------------------------------------------ #
+# Consultas de produção                                              #
+# ------------------------------------------------------------------ #
+# Ficam aqui (e não soltas nas páginas) para que a checagem de plano
+# em app/services/indices.py rode exatamente o SQL que a aplicação usa.
+
+# repositorio.frota_setor (frota completa do setor, com nome/sigla)
+FROTA_SETOR = """
+    SELECT  e.*,
+            s.nome  AS setor_nome,
+            s.sigla AS setor_sigla
+    FROM    equipamentos  e
+    JOIN    setor         s ON s.codigo = e.centro_custo_uc
+    WHERE   e.centro_custo_uc = ?
+"""
+
+# home: contagens do setor por (ano, dimensão, valor), direto do índice
+# (centro_custo_uc, ...). Os KPIs e os gráficos saem daqui, sem trazer
+# as linhas; valor NULL vem como NULL (os gráficos ignoram, como o
+# value_counts fazia).
+DIMENSOES_RESUMO = ("modelo", "controle_desempenho", "tipo_combustivel", "status")
+RESUMO_SETOR = "\nUNION ALL\n".join(
+    f"SELECT ano, '{d}' AS dimensao, {d} AS valor, COUNT(*) AS quantidade "
+    f"FROM equipamentos WHERE centro_custo_uc = ? GROUP BY ano, {d}"
+    for d in DIMENSOES_RESUMO
+)
+
+# home: aba da tabela (só as colunas mostradas)
+TABELA_SETOR = """
+    SELECT identificacao, modelo, ano_fabricacao, tipo_combustivel,
+           controle_desempenho, uso_km, status
+      FROM equipamentos
+     WHERE centro_custo_uc = ?
+"""
+
+# repositorio.equipamentos_setor_ano (frota_service)
+EQUIP_SETOR_ANO = "SELECT * FROM equipamentos WHERE centro_custo_uc=? AND ano=?"
+
+# preenchimento: itens 2024 do setor ainda sem registro 2025 (paginado;
+# o repositório pode inserir "AND identificacao NOT IN (...)" antes do ORDER BY)
+PENDENTES_SETOR = "SELECT * FROM vw_migracao_pendente WHERE centro_custo_uc=?"
+PENDENTES_PAGINA = " ORDER BY identificacao, codigo LIMIT ? OFFSET ?"
+
+# exportacao.consulta_ano (o filtro extra é concatenado no final)
+EQUIP_ANO = "SELECT * FROM equipamentos WHERE ano=?"
+
+# equipamentos tocados por um usuário (veiculos.load_data, usuário comum).
+# Semijunção com o histórico: o SQLite resolve a subconsulta pelo índice
+# (usuario_id, equipamento_codigo) e busca cada equipamento pela chave;
+# um EXISTS correlacionado varreria equipamentos. O trecho serve de
+# filtro em qualquer consulta sobre equipamentos.
+TOCADOS_POR_USUARIO = ("codigo IN (SELECT equipamento_codigo FROM historico_atualizacoes "
+                       "WHERE usuario_id = ?)")
+EQUIP_DO_USUARIO = f"SELECT * FROM equipamentos WHERE {TOCADOS_POR_USUARIO}"
+
+# veiculos: grade do admin, paginada por keyset em (coluna de ordem,
+# codigo): os filtros de FILTROS_GRADE entram em {filtros}, o cursor da
+# página (última linha da anterior) em {apos} e a ordem em {ordem}
+GRADE = "SELECT * FROM equipamentos WHERE 1=1 {filtros}{apos} ORDER BY {ordem} LIMIT ?"
+# colunas que a grade ordena: o nome vem da tela, só estes entram no SQL
+ORDENS_GRADE = ("codigo", "ano", "identificacao", "modelo", "fabricante",
+                "tipo_bem", "status", "tipo_combustivel", "uso_km")
+# por codigo: a chave primária já dá a ordem, sem ordenar
+ORDEM_CODIGO = "codigo {dir}"
+APOS_CODIGO = " AND codigo {op} ?"
+# outras colunas: NULL por último nos dois bancos e nos dois sentidos;
+# codigo desempata. Cursor NULL: já está no bloco dos NULL.
+ORDEM_COLUNA = "({col} IS NULL), {col} {dir}, codigo {dir}"
+APOS_COLUNA = " AND ({col} {op} ? OR ({col} = ? AND codigo {op} ?) OR {col} IS NULL)"
+APOS_NULO = " AND {col} IS NULL AND codigo {op} ?"
+GRADE_CONTAGEM = "SELECT COUNT(*) FROM equipamentos WHERE 1=1 {filtros}"
+FILTROS_GRADE = {
+    "setor":       "centro_custo_uc = ?",
+    "ano":         "ano = ?",
+    "status":      "status = ?",
+    "combustivel": "tipo_combustivel = ?",
+    "modelo":      "UPPER(modelo) LIKE UPPER(?)",
+    "usuario":     TOCADOS_POR_USUARIO,
+}
+
+# preenchimento: equipamentos do ano com alguma chave de duplicidade
+# igual às do item (app/services/duplicados.py); cada termo do OR usa
+# o índice (chave, ano) da migração 10. Chave que o item não tem vai NULL.
+CONFLITOS = """
+    SELECT  e.codigo, e.centro_custo_uc, s.nome AS setor_nome, e.identificacao,
+            e.tipo_bem, e.modelo, e.codigo_renavam, e.numero_serie_chassi,
+            e.ordem_num_patrimonio, k.placa, k.chassi, k.renavam, k.patrimonio
+    FROM    chaves_equipamento k
+    JOIN    equipamentos       e ON e.codigo = k.codigo
+    LEFT JOIN setor            s ON s.codigo = e.centro_custo_uc
+    WHERE   (k.placa = ? AND k.ano = ?) OR (k.chassi = ? AND k.ano = ?)
+       OR   (k.renavam = ? AND k.ano = ?) OR (k.patrimonio = ? AND k.ano = ?)
+"""
+
+# auth
+LOGIN = "SELECT id FROM usuario WHERE cpf = ? AND senha = ?"
+USUARIO_POR_CPF = ("SELECT id, nome, cpf, setor_codigo, tipo_usuario "
+                   "FROM usuario WHERE cpf = ?")
+
+# Consultas filtradas: nenhuma pode cair em varredura completa.
+FILTRADAS = {
+    "repositorio.frota_setor": FROTA_SETOR,
+    "home.resumo": RESUMO_SETOR,
+    "home.tabela": TABELA_SETOR,
+    "repositorio.equipamentos_setor_ano": EQUIP_SETOR_ANO,
+    "preenchimento.pendentes": PENDENTES_SETOR + PENDENTES_PAGINA,
+    "exportacao.consulta_ano": EQUIP_ANO,
+    "exportacao.consulta_ano(setor)": EQUIP_ANO + " AND centro_custo_uc=?",
+    "exportacao.consulta_ano(setores)": EQUIP_ANO + " AND centro_custo_uc IN (?,?,?)",
+    "veiculos.grade": GRADE.format(
+        filtros="", apos=APOS_CODIGO.format(op=">"), ordem=ORDEM_CODIGO.format(dir="ASC")),
+    "veiculos.grade(setor, ano)": GRADE.format(
+        filtros=f"AND {FILTROS_GRADE['setor']} AND {FILTROS_GRADE['ano']}",
+        apos=APOS_CODIGO.format(op=">"), ordem=ORDEM_CODIGO.format(dir="ASC")),
+    "veiculos.grade(setor, ano, modelo desc)": GRADE.format(
+        filtros=f"AND {FILTROS_GRADE['setor']} AND {FILTROS_GRADE['ano']}",
+        apos=APOS_COLUNA.format(col="modelo", op="<"),
+        ordem=ORDEM_COLUNA.format(col="modelo", dir="DESC")),
+    "veiculos.load_data": EQUIP_DO_USUARIO,
+    "preenchimento.conflitos": CONFLITOS,
+    "auth.login_user": LOGIN,
+    "auth.get_user_info": USUARIO_POR_CPF,
+}
@@ -0,0 +1,182 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Callable, Iterable
+
+# ------------------------------------------------------------------ #
+# Correspondência de nomes de setor                                  #
+# ------------------------------------------------------------------ #
+# As planilhas trazem o centro de custo de várias formas: nome atual,
+# nome antigo (às vezes cortado ou dentro de "NOME NÃO ENCONTRADO ANTIGO
+# NOME (...)"), CNUC ou sigla da estrutura. O índice é montado uma vez
+# por importação a partir de setor, centro_custo_legado e estrutura, e
+# resolve nesta ordem:
+#
+#   1. CNUC (0000.00.0000)
+#   2. nome — do setor ou de um nome antigo conhecido — comparado do
+#      mais estrito ao mais solto: exato, sem acento/caixa/pontuação e,
+#      por fim, também sem "de/do/da…". Se dois setores empatam num
+#      nível, aquele nível não decide (há setores quase homônimos)
+#   3. sigla da estrutura (SETOR-PARNA-CAPARAÓ → uorg → setor)
+#   4. aproximado: trigramas do nome normalizado; só aceita se o melhor
+#      candidato passar do LIMIAR e ficar MARGEM à frente do segundo
+#
+# Cada valor distinto é resolvido uma vez e guardado, então o custo por
+# linha da planilha é uma consulta a dict.
+
+LIMIAR = 0.7
+MARGEM = 0.1
+PALAVRAS_VAZIAS = {"DE", "DA", "DO", "DAS", "DOS", "E"}
+ANTIGO = re.compile(r"^NOME N[AÃ]O ENCONTRADO ANTIGO NOME \((.*)\)$", re.IGNORECASE)
+CNUC = re.compile(r"^\d{4}\.\d{2}\.\d{4}$")
+NAO_ALFANUM = re.compile(r"[^0-9A-Z]+")
+
+
+def chave(nome) -> str:
+    """'Flona  de Ipanema (SP)' → 'FLONA DE IPANEMA SP'."""
+    s = unicodedata.normalize("NFKD", str(nome))
+    s = "".join(c for c in s if not unicodedata.combining(c)).upper()
+    return NAO_ALFANUM.sub(" ", s).strip()
+
+
+def normalizar(nome) -> str:
+    """'Flona  de Ipanema (SP)' → 'FLONA IPANEMA SP'."""
+    return " ".join(p for p in chave(nome).split() if p not in PALAVRAS_VAZIAS)
+
+
+NIVEIS = (str.strip, chave, normalizar)
+_AMBIGUO = object()
+
+
+def trigramas(norm: str) -> set[str]:
+    s = f"  {norm} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class Correspondencia:
+    """Índice nome/CNUC/sigla → setor.codigo, com busca aproximada."""
+
+    def __init__(self, setores: Iterable, legados: Iterable = (), estrutura: Iterable = (),
+                 limiar: float = LIMIAR, margem: float = MARGEM):
+        """``setores``: (codigo, nome, cnuc); ``legados``: (nome, cnuc, setor_codigo);
+        ``estrutura``: (sigla, uorg)."""
+        self.limiar, self.margem = limiar, margem
+        self._niveis: list[dict] = [{} for _ in NIVEIS]
+        self._cnuc: dict[str, int] = {}
+        self._siglas: dict[str, int] = {}
+        self._memo: dict = {}
+        self.metodos = Counter()
+
+        # nome antigo só entra onde nenhum setor já responde pela chave
+        nomes = [(nome, codigo, 0) for codigo, nome, _ in setores if nome]
+        nomes += [(nome, codigo, 1) for nome, _, codigo in legados if nome and codigo is not None]
+        for nivel, mapa, prioridades in ((n, m, {}) for n, m in zip(NIVEIS, self._niveis)):
+            for nome, codigo, prio in nomes:
+                k = nivel(nome)
+                if k not in mapa or prio < prioridades[k]:
+                    mapa[k], prioridades[k] = codigo, prio
+                elif prio == prioridades[k] and mapa[k] != codigo:
+                    mapa[k] = _AMBIGUO
+        for cnuc, codigo in [(c, k) for k, _, c in setores] + [(c, k) for _, c, k in legados]:
+            if cnuc and codigo is not None:
+                self._cnuc.setdefault(cnuc.strip(), codigo)
+
+        normalizados = self._niveis[-1]
+        for sigla, uorg in estrutura:
+            codigo = normalizados.get(normalizar(uorg or ""))
+            k = normalizar(sigla or "")
+            if codigo is None or not k:
+                continue
+            if self._siglas.setdefault(k, codigo) != codigo:
+                self._siglas[k] = _AMBIGUO
+
+        # índice invertido trigrama → (nome normalizado, setor)
+        self._alvos = sorted({(normalizar(nome), codigo) for nome, codigo, _ in nomes})
+        self._tamanhos = []
+        self._indice: dict[str, list[int]] = defaultdict(list)
+        for i, (norm, _) in enumerate(self._alvos):
+            tri = trigramas(norm)
+            self._tamanhos.append(len(tri))
+            for t in tri:
+                self._indice[t].append(i)
+
+    @classmethod
+    def do_banco(cls, consultar: Callable[[str], list], **kw) -> "Correspondencia":
+        """Monta o índice com ``consultar(sql) -> linhas`` (sqlite3, backend ou
+        SQLAlchemy). setor.cnuc e as tabelas da consolidação são opcionais
+        (esquemas ainda não migrados)."""
+        def opcional(sql):
+            try:
+                return consultar(sql)
+            except Exception:
+                return []
+        return cls(
+            opcional("SELECT codigo, nome, cnuc FROM setor")
+            or consultar("SELECT codigo, nome, NULL FROM setor"),
+            opcional("SELECT nome, cnuc, setor_codigo FROM centro_custo_legado"),
+            opcional("SELECT sigla, uorg FROM estrutura"),
+            **kw,
+        )
+
+    # ---------- busca ----------
+    def _aproximado(self, norm: str) -> int | None:
+        tri = trigramas(norm)
+        comuns = Counter()
+        for t in tri:
+            for i in self._indice.get(t, ()):
+                comuns[i] += 1
+        melhor: dict[int, float] = {}
+        for i, n in comuns.items():
+            # Dice, ou quanto do valor está contido no nome (nomes cortados)
+            nota = max(2 * n / (len(tri) + self._tamanhos[i]), 0.95 * n / len(tri))
+            codigo = self._alvos[i][1]
+            if nota > melhor.get(codigo, 0.0):
+                melhor[codigo] = nota
+        if not melhor:
+            return None
+        ordem = sorted(melhor.items(), key=lambda kv: kv[1], reverse=True)
+        codigo, nota = ordem[0]
+        segunda = ordem[1][1] if len(ordem) > 1 else 0.0
+        if nota >= self.limiar and nota - segunda >= self.margem:
+            return codigo
+        return None
+
+    def como(self, valor) -> tuple[int | None, str | None]:
+        """(codigo, método) — método é 'cnuc', 'nome', 'sigla', 'aproximado' ou None."""
+        if valor is None:
+            return None, None
+        bruto = str(valor).strip()
+        if CNUC.match(bruto):
+            codigo = self._cnuc.get(bruto)
+            return codigo, "cnuc" if codigo is not None else None
+        if m := ANTIGO.match(bruto):
+            bruto = m.group(1)
+        for nivel, mapa in zip(NIVEIS, self._niveis):
+            codigo = mapa.get(nivel(bruto))
+            if codigo is _AMBIGUO:
+                return None, None
+            if codigo is not None:
+                return codigo, "nome"
+        norm = normalizar(bruto)
+        if not norm:
+            return None, None
+        codigo = self._siglas.get(norm)
+        if codigo is not None:
+            return (None, None) if codigo is _AMBIGUO else (codigo, "sigla")
+        codigo = self._aproximado(norm)
+        return codigo, "aproximado" if codigo is not None else None
+
+    def resolver(self, valor) -> int | None:
+        """Código do setor de ``valor`` ou None (memorizado por valor)."""
+        try:
+            return self._memo[valor]
+        except KeyError:
+            pass
+        codigo, metodo = self.como(valor)
+        self.metodos[metodo or "sem_setor"] += 1
+        self._memo[valor] = codigo
+        return codigo
+
+    def resolver_todos(self, valores: Iterable) -> list[int | None]:
+        memo, resolver = self._memo, self.resolver
+        return [memo[v] if v in memo else resolver(v) for v in valores]
@@ -1,10 +1,115 @@
 import sqlite3
+import threading
+import time
 from pathlib import Path
 
 _DB_PATH = Path(__file__).parent.parent / "database" / "frota.db"
+VEICULOS_DB_PATH = _DB_PATH.parent / "veiculos.db"
 
-def get_connection(db_path: str | Path = _DB_PATH) -> sqlite3.Connection:
+# ------------------------------------------------------------------ #
+# Pool de conexões SQLite                                            #
+# ------------------------------------------------------------------ #
+# Cada thread (o Streamlit roda cada sessão numa thread) reaproveita a
+# mesma conexão por banco; os PRAGMAs são aplicados uma única vez na
+# abertura e não a cada chamada.
+PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",        # espera o lock antes de "database is locked"
+    "PRAGMA mmap_size = 268435456",      # 256 MB
+    "PRAGMA cache_size = -65536",        # 64 MB (negativo = KiB)
+    "PRAGMA temp_store = MEMORY",
+)
+
+_local = threading.local()
+_lock = threading.Lock()
+_conexoes: dict[tuple[int, str], sqlite3.Connection] = {}
+_metricas = {
+    "aberturas": 0,
+    "reusos": 0,
+    "reconexoes": 0,
+    "espera_total_s": 0.0,
+    "espera_max_s": 0.0,
+}
+
+
+def _abrir(db_path: str) -> sqlite3.Connection:
     conn = sqlite3.connect(db_path, check_same_thread=False)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
     conn.row_factory = sqlite3.Row          # pra devolver dict-like
     return conn
+
+
+def _saudavel(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("SELECT 1").fetchone()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def _descartar_orfas() -> None:
+    """Fecha conexões de threads que já morreram (chamar com _lock)."""
+    vivas = {t.ident for t in threading.enumerate()}
+    for chave in [k for k in _conexoes if k[0] not in vivas]:
+        try:
+            _conexoes.pop(chave).close()
+        except sqlite3.Error:
+            pass
+
+
+def get_connection(db_path: str | Path = _DB_PATH) -> sqlite3.Connection:
+    """Conexão reaproveitável da thread atual para ``db_path``.
+
+    Não feche a conexão devolvida: use ``with get_connection() as con``,
+    que só faz commit/rollback e mantém a conexão no pool.
+    """
+    inicio = time.perf_counter()
+    chave = str(Path(db_path).resolve())
+    cache = _local.__dict__.setdefault("conexoes", {})
+
+    conn = cache.get(chave)
+    if conn is not None and _saudavel(conn):
+        with _lock:
+            _metricas["reusos"] += 1
+        return conn
+
+    with _lock:
+        if conn is not None:
+            _metricas["reconexoes"] += 1
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _descartar_orfas()
+        conn = _abrir(chave)
+        cache[chave] = conn
+        _conexoes[(threading.get_ident(), chave)] = conn
+        espera = time.perf_counter() - inicio
+        _metricas["aberturas"] += 1
+        _metricas["espera_total_s"] += espera
+        _metricas["espera_max_s"] = max(_metricas["espera_max_s"], espera)
+    return conn
+
+
+def close_connection(db_path: str | Path = _DB_PATH) -> None:
+    """Fecha e remove do pool a conexão da thread atual."""
+    chave = str(Path(db_path).resolve())
+    conn = _local.__dict__.get("conexoes", {}).pop(chave, None)
+    with _lock:
+        _conexoes.pop((threading.get_ident(), chave), None)
+    if conn is not None:
+        conn.close()
+
+
+def pool_stats() -> dict:
+    """Tamanho do pool e tempos de espera para abrir conexões."""
+    with _lock:
+        _descartar_orfas()
+        stats = dict(_metricas)
+        stats["conexoes_abertas"] = len(_conexoes)
+    aberturas = stats["aberturas"] or 1
+    stats["espera_media_s"] = stats["espera_total_s"] / aberturas
+    return stats
@@ -0,0 +1,234 @@
+import re
+
+import pandas as pd
+
+# ------------------------------------------------------------------ #
+# Chaves de duplicidade de equipamentos                              #
+# ------------------------------------------------------------------ #
+# O mesmo bem aparece escrito de jeitos diferentes: placa com hífen ou
+# no padrão Mercosul, RENAVAM com ou sem os zeros à esquerda (e com o
+# ".0" do Excel), chassi com O no lugar de 0, patrimônio "000123". Cada
+# identificador vira uma chave normalizada, guardada em
+# chaves_equipamento (migração 10, um índice por chave):
+#
+#   placa       identificacao          só VEÍCULO (os outros bens usam
+#                                      códigos internos como "ROC0012",
+#                                      que se repetem entre setores)
+#   chassi      numero_serie_chassi
+#   renavam     codigo_renavam         só VEÍCULO
+#   patrimonio  ordem_num_patrimonio   "JUST: ..." não é patrimônio
+#
+# Valor que não passa no tamanho mínimo, sem nenhum dígito ("NAO SE
+# APLICA") ou um caractere repetido ("0000000", "99999999") não gera
+# chave.
+#
+# Usos: repositorio.conflitos() na hora de incluir itens de 2025
+# (consulta pelos índices) e agrupar() na varredura da tabela inteira
+# (banco/duplicados.py), que junta por hash (ano, tipo de chave, chave)
+# em vez de comparar pares.
+
+CHAVES: dict[str, str] = {
+    "placa": "identificacao",
+    "chassi": "numero_serie_chassi",
+    "renavam": "codigo_renavam",
+    "patrimonio": "ordem_num_patrimonio",
+}
+TIPOS = tuple(CHAVES)
+MINIMO = {"placa": 5, "chassi": 8, "renavam": 7, "patrimonio": 4}
+NAO_ALFANUM = re.compile(r"[^0-9A-Z]")
+EXCEL = re.compile(r"\.0$")
+DIGITO = re.compile(r"\d")
+# Mercosul → antiga: ABC1D23 ↔ ABC1323 (a letra no 5º caractere é o dígito)
+MERCOSUL = re.compile(r"^([A-Z]{3}\d)([A-J])(\d{2})$")
+LETRA_DIGITO = str.maketrans("ABCDEFGHIJ", "0123456789")
+# chassi: I, O e Q não existem no VIN; são 1, 0 e 0 digitados errado
+TROCAS_CHASSI = str.maketrans("IOQ", "100")
+# bloco (mesmo ano, tipo e chave) maior que isso é valor de preenchimento
+# ("1111111111", código de modelo no lugar do chassi), não duplicidade
+LIMITE_BLOCO = 20
+LOTE = 500
+SQL_GRAVAR = (
+    "INSERT INTO chaves_equipamento (codigo, ano, placa, chassi, renavam, patrimonio) "
+    "VALUES {linhas} ON CONFLICT (codigo) DO UPDATE SET ano = excluded.ano, "
+    "placa = excluded.placa, chassi = excluded.chassi, "
+    "renavam = excluded.renavam, patrimonio = excluded.patrimonio"
+)
+
+
+# ---------- normalização ----------
+# Uma função por valor: o formulário normaliza um item sem passar pelo
+# pandas, e chaves() aplica as mesmas funções uma vez por valor distinto.
+def _limpo(v) -> str:
+    """Maiúsculas, sem ".0" do Excel, só letras e dígitos."""
+    if v is None or v != v:              # None, NaN
+        return ""
+    return NAO_ALFANUM.sub("", EXCEL.sub("", str(v).strip().upper()))
+
+
+def _valida(s: str, minimo: int) -> str | None:
+    # sem dígito ("NAOSEAPLICA") ou um caractere só repetido ("0000000")
+    if len(s) < minimo or not DIGITO.search(s) or not s.strip(s[0]):
+        return None
+    return s
+
+
+def placa(v) -> str | None:
+    s = _limpo(v)
+    if m := MERCOSUL.match(s):
+        s = m[1] + m[2].translate(LETRA_DIGITO) + m[3]
+    return _valida(s, MINIMO["placa"])
+
+
+def chassi(v) -> str | None:
+    s = _limpo(v)
+    # dígito que só apareceria na troca ("NÃO SE APLICA") não conta
+    if not DIGITO.search(s):
+        return None
+    return _valida(s.translate(TROCAS_CHASSI), MINIMO["chassi"])
+
+
+def renavam(v) -> str | None:
+    """Só dígitos; os antigos, de 9, e os com zeros à esquerda batem."""
+    s = _limpo(v)
+    if not s.isdigit():
+        return None
+    s = _valida(s.lstrip("0"), MINIMO["renavam"])
+    return s and s.zfill(11)
+
+
+def patrimonio(v) -> str | None:
+    if isinstance(v, str) and v.strip().upper().startswith("JUST"):
+        return None
+    return _valida(_limpo(v).lstrip("0"), MINIMO["patrimonio"])
+
+
+NORMALIZAR = {"placa": placa, "chassi": chassi, "renavam": renavam, "patrimonio": patrimonio}
+SO_VEICULO = ("placa", "renavam")
+
+
+def _veiculo(tipo_bem) -> bool:
+    return isinstance(tipo_bem, str) and tipo_bem.strip().upper() == "VEÍCULO"
+
+
+def chaves_item(item: dict) -> dict:
+    """{tipo: chave} de um item do formulário, só as que existem."""
+    veiculo = _veiculo(item.get("tipo_bem"))
+    saida = {}
+    for tipo, col in CHAVES.items():
+        if tipo in SO_VEICULO and not veiculo:
+            continue
+        if (k := NORMALIZAR[tipo](item.get(col))) is not None:
+            saida[tipo] = k
+    return saida
+
+
+def chaves(df: pd.DataFrame) -> pd.DataFrame:
+    """As chaves de cada linha de ``df`` (colunas de equipamentos; a que
+    faltar não gera chave), com o mesmo índice. None onde não há chave."""
+    veiculo = (df["tipo_bem"].map(_veiculo).astype(bool) if "tipo_bem" in df
+               else pd.Series(False, index=df.index))
+    saida = pd.DataFrame(index=df.index)
+    for tipo, col in CHAVES.items():
+        if col not in df:
+            saida[tipo] = None
+            continue
+        valores = df[col].astype(object)
+        unicos = pd.unique(valores)
+        k = valores.map(dict(zip(unicos, map(NORMALIZAR[tipo], unicos))))
+        k = k.astype(object).where(k.notna(), None)
+        saida[tipo] = k.where(veiculo, None) if tipo in SO_VEICULO else k
+    return saida
+
+
+# ---------- chaves_equipamento ----------
+def _ler_equipamentos(con, codigos) -> pd.DataFrame:
+    cols = ["codigo", "ano", "tipo_bem", *CHAVES.values()]
+    sql = f"SELECT {', '.join(cols)} FROM equipamentos"
+    if codigos is None:
+        linhas = con.execute(sql).fetchall()
+    else:
+        linhas = []
+        for parte in _lotes(codigos):
+            linhas += con.execute(f"{sql} WHERE codigo IN ({','.join('?' * len(parte))})",
+                                  parte).fetchall()
+    return pd.DataFrame.from_records(linhas, columns=cols)
+
+
+def atualizar_chaves(con, codigos: list[int] | None = None) -> int:
+    """Recalcula as chaves dos ``codigos`` (None: tabela inteira, apagando
+    as de equipamento que não existe mais). Só grava as linhas que mudaram;
+    devolve quantas. O commit fica com quem chama."""
+    codigos = None if codigos is None else [int(c) for c in codigos]
+    df = _ler_equipamentos(con, codigos)
+    k = chaves(df)
+    novas = {
+        int(c): (int(a), *resto)
+        for c, a, *resto in zip(df["codigo"], df["ano"], *(k[t] for t in TIPOS))
+    }
+    atuais = {}
+    if codigos is None:
+        atuais = {int(c): tuple(resto) for c, *resto in con.execute(
+            f"SELECT codigo, ano, {', '.join(TIPOS)} FROM chaves_equipamento").fetchall()}
+        for parte in _lotes(sorted(atuais.keys() - novas.keys())):
+            con.execute("DELETE FROM chaves_equipamento WHERE codigo IN "
+                        f"({','.join('?' * len(parte))})", parte)
+    gravar = [(c, *v) for c, v in novas.items() if atuais.get(c) != v]
+    for parte in _lotes(gravar):
+        con.execute(SQL_GRAVAR.format(linhas=",".join(["(?,?,?,?,?,?)"] * len(parte))),
+                    [v for linha in parte for v in linha])
+    return len(gravar)
+
+
+def _lotes(itens: list):
+    for ini in range(0, len(itens), LOTE):
+        yield itens[ini:ini + LOTE]
+
+
+# ---------- varredura ----------
+def agrupar(df: pd.DataFrame, limite: int = LIMITE_BLOCO) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Grupos de prováveis duplicados em ``df`` (codigo, ano e as colunas
+    de TIPOS, como em chaves_equipamento).
+
+    Cada (ano, tipo, chave) é um bloco; linhas que dividem um bloco estão
+    ligadas, e os grupos são as componentes ligadas (union-find). Custo
+    linear no número de chaves, sem comparar pares.
+
+    Devolve (grupos, ignorados): grupos tem uma linha por equipamento
+    (grupo, codigo, ano, chaves em comum); ignorados, os blocos acima de
+    ``limite`` (tipo, chave, ano, quantidade).
+    """
+    longo = df.melt(id_vars=["codigo", "ano"], value_vars=list(TIPOS),
+                    var_name="tipo", value_name="chave").dropna(subset=["chave"])
+    bloco = longo.groupby(["ano", "tipo", "chave"], sort=False, observed=True).ngroup()
+    longo = longo.assign(bloco=bloco.to_numpy())
+    tamanho = longo.groupby("bloco")["codigo"].transform("size")
+    ignorados = (longo[tamanho > limite].groupby(["tipo", "chave", "ano"], observed=True)
+                 .size().rename("quantidade").reset_index()
+                 .sort_values("quantidade", ascending=False, ignore_index=True))
+    longo = longo[(tamanho > 1) & (tamanho <= limite)]
+
+    pai: dict[int, int] = {}
+
+    def raiz(x: int) -> int:
+        while pai[x] != x:
+            pai[x] = pai[pai[x]]
+            x = pai[x]
+        return x
+
+    primeiro: dict[int, int] = {}
+    for b, c in zip(longo["bloco"].tolist(), longo["codigo"].tolist()):
+        pai.setdefault(c, c)
+        p = primeiro.setdefault(b, c)
+        ra, rb = raiz(p), raiz(c)
+        if ra != rb:
+            pai[max(ra, rb)] = min(ra, rb)
+
+    if longo.empty:
+        return (pd.DataFrame(columns=["grupo", "codigo", "ano", "em_comum"]), ignorados)
+    em_comum = longo.groupby("codigo")["tipo"].agg(lambda t: ", ".join(sorted(set(t))))
+    grupos = pd.DataFrame({"codigo": list(pai)})
+    grupos["grupo"] = [raiz(c) for c in grupos["codigo"]]
+    grupos = grupos.merge(df[["codigo", "ano"]], on="codigo")
+    grupos["em_comum"] = grupos["codigo"].map(em_comum)
+    return (grupos[["grupo", "codigo", "ano", "em_comum"]]
+            .sort_values(["grupo", "codigo"], ignore_index=True), ignorados)
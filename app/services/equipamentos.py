@@ -0,0 +1,133 @@
+import json
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.services import duplicados
+from app.services.tipos import para_python
+
+# ------------------------------------------------------------------ #
+# Escritas em equipamentos (rodam via backend.escrever)             #
+# ------------------------------------------------------------------ #
+COLUNAS_2025 = (
+    "centro_custo_uc", "identificacao", "codigo_renavam",
+    "numero_serie_chassi", "ordem_num_patrimonio", "fabricante",
+    "modelo", "tipo_bem", "subtipo_bem", "proprietario", "tipo_acoplamento",
+    "motorizacao", "controle_desempenho", "uso_km", "campos_adicionais",
+    "tipo_propriedade", "tipo_combustivel", "status", "cor", "observacoes",
+    "data_aquisicao", "ano_fabricacao", "ano_modelo",
+)
+SQL_INSERIR_2025 = f"INSERT INTO equipamentos (ano, {', '.join(COLUNAS_2025)}) VALUES "
+LINHA_2025 = "(2025," + ",".join("?" * len(COLUNAS_2025)) + ")"
+SQL_LOG = "INSERT INTO historico_atualizacoes (usuario_id,equipamento_codigo,acao,detalhes) VALUES "
+LINHA_LOG = "(?,?,'insercao',?)"
+LINHA_LOG_EDICAO = "(?,?,'edicao',?)"
+
+# colunas que entram nas chaves de duplicidade (app/services/duplicados.py)
+COLUNAS_CHAVES = {"ano", "tipo_bem", *duplicados.CHAVES.values()}
+
+# linhas por INSERT multi-linha: 500 × 23 parâmetros fica longe do
+# limite de variáveis do SQLite (32766)
+LOTE_INSERCAO = 500
+
+
+def _parametros(setor: int, hoje, it: dict) -> tuple:
+    return (
+        setor, it["identificacao"], it["codigo_renavam"],
+        it["numero_serie_chassi"], it["ordem_num_patrimonio"],
+        it["fabricante"], it["modelo"], it["tipo_bem"], it["subtipo_bem"],
+        it["proprietario"], it["tipo_acoplamento"], it["motorizacao"],
+        it["controle_desempenho"], it["uso_km"], it["campos_adicionais"],
+        it["tipo_propriedade"], it["tipo_combustivel"], it["status"],
+        it["cor"], it["observacoes"], hoje,
+        it["ano_fabricacao"] or None, it["ano_modelo"] or None,
+    )
+
+
+def checar_duplicados(con, setor: int, itens: list[dict]) -> None:
+    """ValueError se alguma identificação se repete na lista ou já existe
+    em 2025 no setor. Roda na mesma transação da gravação."""
+    idents = [it["identificacao"] for it in itens]
+    repetidas = sorted(i for i, n in Counter(idents).items() if n > 1)
+    if repetidas:
+        raise ValueError(f"Identificação repetida na lista: {', '.join(repetidas)}")
+    existentes = set()
+    for ini in range(0, len(idents), LOTE_INSERCAO):
+        parte = idents[ini:ini + LOTE_INSERCAO]
+        existentes.update(r[0] for r in con.execute(
+            "SELECT identificacao FROM equipamentos WHERE centro_custo_uc=? AND ano=2025 "
+            f"AND identificacao IN ({','.join('?' * len(parte))})",
+            (setor, *parte),
+        ).fetchall())
+    if existentes:
+        raise ValueError(f"Identificação já cadastrada em 2025: {', '.join(sorted(existentes))}")
+
+
+def inserir_itens_2025(con, setor: int, uid: int,
+                       itens: list[dict]) -> int:
+    """Grava os itens da lista temporária do formulário como 2025.
+
+    Por lote: um INSERT multi-linha com RETURNING e outro para o histórico
+    (o executemany do psycopg2 seria um comando por linha).
+    O commit, único, fica com quem chama.
+    """
+    checar_duplicados(con, setor, itens)
+    hoje = datetime.today().date()
+    codigos = []
+    for ini in range(0, len(itens), LOTE_INSERCAO):
+        parte = itens[ini:ini + LOTE_INSERCAO]
+        params = [v for it in parte for v in _parametros(setor, hoje, it)]
+        sql = SQL_INSERIR_2025 + ",".join([LINHA_2025] * len(parte)) + " RETURNING codigo"
+        novos = [r[0] for r in con.execute(sql, params).fetchall()]
+        # o histórico tem o mesmo texto para todos: a ordem do RETURNING não importa
+        detalhe = f"inclusão por usuário {uid}"
+        con.execute(SQL_LOG + ",".join([LINHA_LOG] * len(novos)),
+                    [v for c in novos for v in (uid, c, detalhe)])
+        codigos += novos
+    duplicados.atualizar_chaves(con, codigos)
+    return len(codigos)
+
+
+# ------------------------------------------------------------------ #
+# Edição do admin (veiculos): grava só as células alteradas          #
+# ------------------------------------------------------------------ #
+def diferencas(antes: pd.DataFrame, depois: pd.DataFrame) -> list[tuple[int, dict]]:
+    """[(codigo, {coluna: (antes, depois)})] só das células que mudaram.
+
+    Compara vetorizado, alinhando pela coluna ``codigo``.
+    """
+    cols = [c for c in antes.columns if c != "codigo" and c in depois.columns]
+    a = para_python(antes.set_index("codigo")[cols])
+    d = para_python(depois.set_index("codigo").reindex(a.index)[cols])
+    va, vd = a.to_numpy(), d.to_numpy()
+    mudou = va != vd                     # objeto a objeto: None == None
+    saida = []
+    for i in np.flatnonzero(mudou.any(axis=1)):
+        js = np.flatnonzero(mudou[i])
+        saida.append((int(a.index[i]), {cols[j]: (va[i, j], vd[i, j]) for j in js}))
+    return saida
+
+
+def gravar_alteracoes(con, uid: int, alteracoes: list[tuple[int, dict]]) -> int:
+    """UPDATE só das colunas alteradas + uma linha de histórico por equipamento
+    com antes/depois (JSON em detalhes). Recalcula as chaves de duplicidade
+    de quem mudou de identificador."""
+    for codigo, campos in alteracoes:
+        sets = ", ".join(f"{c}=?" for c in campos)
+        con.execute(f"UPDATE equipamentos SET {sets} WHERE codigo=?",
+                    [depois for _, depois in campos.values()] + [codigo])
+    if alteracoes:
+        detalhes = [
+            json.dumps({c: {"antes": a, "depois": d} for c, (a, d) in campos.items()},
+                       ensure_ascii=False, default=str)
+            for _, campos in alteracoes
+        ]
+        for ini in range(0, len(alteracoes), LOTE_INSERCAO):
+            parte = range(ini, min(ini + LOTE_INSERCAO, len(alteracoes)))
+            con.execute(SQL_LOG + ",".join([LINHA_LOG_EDICAO] * len(parte)),
+                        [v for i in parte for v in (uid, alteracoes[i][0], detalhes[i])])
+    duplicados.atualizar_chaves(con, [codigo for codigo, campos in alteracoes
+                                      if campos.keys() & COLUNAS_CHAVES])
+    return len(alteracoes)
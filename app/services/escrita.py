@@ -0,0 +1,120 @@
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+from app.services import db
+
+# ------------------------------------------------------------------ #
+# Política de retentativa                                            #
+# ------------------------------------------------------------------ #
+TENTATIVAS = 6
+ESPERA_BASE_S = 0.05
+ESPERA_MAX_S = 2.0
+
+
+def _bloqueado(exc: Exception) -> bool:
+    msg = str(exc).lower()
+    return isinstance(exc, sqlite3.OperationalError) and (
+        "locked" in msg or "busy" in msg
+    )
+
+
+def com_retentativa(func, *args, tentativas: int = TENTATIVAS, **kwargs):
+    """Executa ``func`` repetindo quando o SQLite responde locked/busy.
+
+    A espera entre tentativas é um backoff exponencial com jitter total,
+    para que vários escritores não acordem juntos de novo.
+    """
+    for tentativa in range(tentativas):
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.OperationalError as exc:
+            if not _bloqueado(exc) or tentativa == tentativas - 1:
+                raise
+            teto = min(ESPERA_MAX_S, ESPERA_BASE_S * 2 ** tentativa)
+            time.sleep(random.uniform(0, teto))
+
+
+# ------------------------------------------------------------------ #
+# Fila única de escrita                                              #
+# ------------------------------------------------------------------ #
+class FilaEscrita:
+    """Uma thread escritora por banco; as escritas entram numa fila FIFO.
+
+    Cada tarefa recebe a conexão da escritora e roda dentro de uma
+    transação própria (commit se terminar, rollback se levantar erro).
+    Com WAL, os leitores continuam lendo enquanto a fila trabalha.
+    """
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = db_path
+        self._fila: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._loop, name=f"escritora-{Path(db_path).name}", daemon=True
+        )
+        self.processadas = 0
+        self.falhas = 0
+        self._thread.start()
+
+    def enviar(self, func, *args, **kwargs) -> Future:
+        fut: Future = Future()
+        self._fila.put((func, args, kwargs, fut))
+        return fut
+
+    def pendentes(self) -> int:
+        return self._fila.qsize()
+
+    def _transacao(self, func, args, kwargs):
+        con = db.get_connection(self.db_path)
+        with con:
+            return func(con, *args, **kwargs)
+
+    def _loop(self):
+        while True:
+            func, args, kwargs, fut = self._fila.get()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(com_retentativa(self._transacao, func, args, kwargs))
+                self.processadas += 1
+            except BaseException as exc:
+                fut.set_exception(exc)
+                self.falhas += 1
+
+
+_filas: dict[str, FilaEscrita] = {}
+_filas_lock = threading.Lock()
+
+
+def fila(db_path: str | Path = db._DB_PATH) -> FilaEscrita:
+    chave = str(Path(db_path).resolve())
+    with _filas_lock:
+        if chave not in _filas:
+            _filas[chave] = FilaEscrita(chave)
+        return _filas[chave]
+
+
+def executar_escrita(func, *args, db_path: str | Path = db._DB_PATH,
+                     timeout: float | None = None, **kwargs):
+    """Enfileira ``func(con, *args, **kwargs)`` e espera o resultado.
+
+    Exceções levantadas pela tarefa (ex.: IntegrityError) chegam ao
+    chamador como se a escrita tivesse rodado localmente.
+    """
+    return fila(db_path).enviar(func, *args, **kwargs).result(timeout)
+
+
+def fila_stats() -> dict:
+    with _filas_lock:
+        return {
+            Path(k).name: {
+                "pendentes": f.pendentes(),
+                "processadas": f.processadas,
+                "falhas": f.falhas,
+            }
+            for k, f in _filas.items()
+        }
@@ -0,0 +1,401 @@
+import gzip
+import hashlib
+import json
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import xlsxwriter
+
+from app.services import backend, consultas, repositorio
+
+# ------------------------------------------------------------------ #
+# Exportação por streaming, abas em paralelo                         #
+# ------------------------------------------------------------------ #
+# Cada aba (sql, params) é lida em partes (backend.ler_em_partes, que no
+# SQLite abre uma conexão de leitura própria — WAL, não trava ninguém) e
+# preparada para o formato numa thread do pool; o arquivo é montado na
+# ordem das abas pela thread que chamou, consumindo filas curtas (no
+# máximo FILA_PARTES partes prontas por aba), então a memória não cresce
+# com o tamanho da exportação.
+#
+# Excel: xlsxwriter em modo constant_memory (cada linha vai para o disco
+# assim que a próxima começa); a largura das colunas vem de um
+# MAX(LENGTH()) no banco, sem converter a tabela em texto no pandas.
+# O arquivo final fica em PASTA.
+
+PASTA = Path(tempfile.gettempdir()) / "frota_exportacoes"
+TRABALHADORES_ABAS = max(2, min(8, os.cpu_count() or 1))
+FILA_PARTES = 2
+LARGURA_MAX = 60
+FORMATO_CABECALHO = {"bold": True, "fg_color": "#D7E4BC",
+                     "align": "center", "valign": "vcenter", "border": 1}
+FORMATO_CELULA = {"border": 1, "valign": "top"}
+
+
+def consulta_ano(ano: int, setores: int | list[int] | None = None) -> tuple[str, tuple]:
+    """(sql, params) dos equipamentos do ano, opcionalmente só dos ``setores``."""
+    if setores is None:
+        return consultas.EQUIP_ANO, (ano,)
+    if isinstance(setores, int):
+        return consultas.EQUIP_ANO + " AND centro_custo_uc=?", (ano, setores)
+    marcas = ",".join("?" * len(setores))
+    return consultas.EQUIP_ANO + f" AND centro_custo_uc IN ({marcas})", (ano, *setores)
+
+
+def abas_por_ano(anos: list[int], setores: list[int] | None = None) -> dict[str, tuple[str, tuple]]:
+    """Uma aba por ano, na ordem; sem ``setores``, todos."""
+    return {f"equipamentos_{ano}": consulta_ano(ano, setores or None) for ano in sorted(anos)}
+
+
+def colunas(b, sql: str, params) -> list[str]:
+    return list(b.ler(f"SELECT * FROM ({sql}) q LIMIT 0", params).columns)
+
+
+def larguras(b, sql: str, params, colunas: list[str]) -> list[int]:
+    """Largura de cada coluna: o maior texto (cabeçalho incluído) + 2."""
+    maximos = ", ".join(f"MAX(LENGTH(CAST({c} AS TEXT)))" for c in colunas)
+    linha = b.linhas(f"SELECT {maximos} FROM ({sql}) q", params)[0]
+    return [min(max(len(c), m or 0) + 2, LARGURA_MAX) for c, m in zip(colunas, linha)]
+
+
+_FIM = object()
+
+
+def _entregar(fila: queue.Queue, item, parar: threading.Event) -> bool:
+    """put que desiste se o consumidor parou (erro ou cancelamento)."""
+    while not parar.is_set():
+        try:
+            fila.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produzir(b, sql: str, params, cabecalho, preparar, fila, parar) -> None:
+    try:
+        if not _entregar(fila, ("cabecalho", cabecalho(b, sql, params)), parar):
+            return
+        for parte in b.ler_em_partes(sql, params):
+            if not _entregar(fila, ("parte", len(parte), preparar(parte)), parar):
+                return
+    except Exception as exc:
+        _entregar(fila, exc, parar)
+    _entregar(fila, _FIM, parar)
+
+
+def _abas_em_paralelo(b, abas: dict[str, tuple[str, tuple]], cabecalho, preparar,
+                      trabalhadores: int | None = None):
+    """Gera (aba, item) na ordem das abas; item é ("cabecalho", cabecalho(b, sql, params))
+    e depois ("parte", linhas, preparar(parte)) para cada parte lida."""
+    parar = threading.Event()
+    filas = {aba: queue.Queue(maxsize=FILA_PARTES) for aba in abas}
+    with ThreadPoolExecutor(trabalhadores or TRABALHADORES_ABAS,
+                            thread_name_prefix="exportacao-aba") as pool:
+        # o pool pega as abas na ordem: a que o consumidor espera sempre
+        # já começou ou começa quando uma anterior (já consumida) termina
+        for aba, (sql, params) in abas.items():
+            pool.submit(_produzir, b, sql, params, cabecalho, preparar, filas[aba], parar)
+        try:
+            for aba in abas:
+                while (item := filas[aba].get()) is not _FIM:
+                    if isinstance(item, Exception):
+                        raise item
+                    yield aba, item
+        finally:
+            parar.set()
+
+
+def _contador(ao_avancar):
+    feitas = 0
+
+    def avancar(n: int) -> None:
+        nonlocal feitas
+        feitas += n
+        if ao_avancar:
+            ao_avancar(feitas)
+    return avancar
+
+
+def _cabecalho_xlsx(b, sql: str, params) -> tuple[list[str], list[int]]:
+    cols = colunas(b, sql, params)
+    return cols, larguras(b, sql, params, cols)
+
+
+def _linhas_xlsx(parte: pd.DataFrame) -> list[tuple]:
+    # NaN/NaT → None (célula vazia); int64 → int
+    return list(parte.astype(object).where(parte.notna(), None).itertuples(index=False, name=None))
+
+
+def exportar_xlsx(abas: dict[str, tuple[str, tuple]], destino: Path | None = None,
+                  ao_avancar=None, trabalhadores: int | None = None) -> tuple[Path, dict[str, int]]:
+    """abas = {"nome_aba": (sql, params), ...} → (arquivo .xlsx, {aba: linhas}).
+
+    Sem ``destino``, cria um arquivo novo em PASTA. ``ao_avancar(linhas)``
+    é chamada a cada parte gravada, com o total de linhas até ali.
+    """
+    b, avancar = backend.atual(), _contador(ao_avancar)
+    if destino is None:
+        PASTA.mkdir(parents=True, exist_ok=True)
+        fd, nome = tempfile.mkstemp(suffix=".xlsx", dir=PASTA)
+        os.close(fd)
+        destino = Path(nome)
+    wb = xlsxwriter.Workbook(str(destino), {"constant_memory": True})
+    linhas, ws = {}, None
+    try:
+        fmt_cab = wb.add_format(FORMATO_CABECALHO)
+        fmt_cel = wb.add_format(FORMATO_CELULA)
+        for aba, item in _abas_em_paralelo(b, abas, _cabecalho_xlsx, _linhas_xlsx, trabalhadores):
+            if item[0] == "cabecalho":
+                cols, largs = item[1]
+                ws, linhas[aba] = wb.add_worksheet(aba), 0
+                for col, largura in enumerate(largs):
+                    ws.set_column(col, col, largura, fmt_cel)
+                ws.write_row(0, 0, cols, fmt_cab)
+                continue
+            _, n, valores = item
+            for linha in valores:
+                linhas[aba] += 1
+                ws.write_row(linhas[aba], 0, linha)
+            avancar(n)
+    finally:
+        wb.close()
+    return destino, linhas
+
+
+# ------------------------------------------------------------------ #
+# Formatos colunares / texto: Parquet e CSV.gz                       #
+# ------------------------------------------------------------------ #
+# Mesmas abas (sql, params) do Excel, mas num arquivo só: as abas viram
+# linhas da mesma tabela (a coluna ano separa) e precisam ter as mesmas
+# colunas. As threads entregam cada parte já convertida (tabela Arrow,
+# ou CSV já comprimido: membros gzip concatenados formam um .gz válido).
+
+# tipos do Parquet por coluna; as que não estão aqui vão como texto
+TIPOS_PARQUET = {
+    "codigo": "int64", "ano": "int16", "centro_custo_uc": "int32",
+    "ano_fabricacao": "int16", "ano_modelo": "int16", "uso_km": "float64",
+}
+
+
+def _mesmas_colunas(atuais: list[str] | None, aba: str, cols: list[str]) -> list[str]:
+    if atuais is not None and cols != atuais:
+        raise ValueError(f"A aba {aba} tem colunas diferentes das anteriores.")
+    return cols
+
+
+def _tabela_parquet(parte: pd.DataFrame):
+    import pyarrow as pa
+
+    esquema = pa.schema([(c, pa.type_for_alias(TIPOS_PARQUET.get(c, "string")))
+                         for c in parte.columns])
+    return pa.Table.from_pandas(parte, schema=esquema, preserve_index=False)
+
+
+def exportar_parquet(abas: dict[str, tuple[str, tuple]], destino: Path,
+                     ao_avancar=None, trabalhadores: int | None = None) -> tuple[Path, dict[str, int]]:
+    """Como exportar_xlsx, em Parquet (pyarrow) com as colunas tipadas."""
+    import pyarrow.parquet as pq
+
+    b, avancar = backend.atual(), _contador(ao_avancar)
+    linhas, cols, escritor = {}, None, None
+    try:
+        for aba, item in _abas_em_paralelo(b, abas, colunas, _tabela_parquet, trabalhadores):
+            if item[0] == "cabecalho":
+                cols, linhas[aba] = _mesmas_colunas(cols, aba, item[1]), 0
+                if escritor is None:
+                    vazia = _tabela_parquet(pd.DataFrame(columns=cols))
+                    escritor = pq.ParquetWriter(destino, vazia.schema, compression="zstd")
+                continue
+            _, n, tabela = item
+            escritor.write_table(tabela)
+            linhas[aba] += n
+            avancar(n)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return destino, linhas
+
+
+def _csv_gz(parte: pd.DataFrame, cabecalho: bool = False) -> bytes:
+    return gzip.compress(parte.to_csv(index=False, header=cabecalho).encode("utf-8"),
+                         compresslevel=6, mtime=0)
+
+
+def exportar_csv_gz(abas: dict[str, tuple[str, tuple]], destino: Path,
+                    ao_avancar=None, trabalhadores: int | None = None) -> tuple[Path, dict[str, int]]:
+    """Como exportar_xlsx, em CSV (UTF-8, vírgula) comprimido com gzip."""
+    b, avancar = backend.atual(), _contador(ao_avancar)
+    linhas, cols = {}, None
+    with open(destino, "wb") as f:
+        for aba, item in _abas_em_paralelo(b, abas, colunas, _csv_gz, trabalhadores):
+            if item[0] == "cabecalho":
+                if cols is None:
+                    f.write(_csv_gz(pd.DataFrame(columns=item[1]), cabecalho=True))
+                cols, linhas[aba] = _mesmas_colunas(cols, aba, item[1]), 0
+                continue
+            _, n, comprimido = item
+            f.write(comprimido)
+            linhas[aba] += n
+            avancar(n)
+    return destino, linhas
+
+
+FORMATOS = {
+    "xlsx": {"rotulo": "Excel (.xlsx)", "sufixo": ".xlsx", "gerar": exportar_xlsx,
+             "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    "parquet": {"rotulo": "Parquet", "sufixo": ".parquet", "gerar": exportar_parquet,
+                "mime": "application/vnd.apache.parquet"},
+    "csv.gz": {"rotulo": "CSV compactado (.csv.gz)", "sufixo": ".csv.gz", "gerar": exportar_csv_gz,
+               "mime": "application/gzip"},
+}
+
+# ------------------------------------------------------------------ #
+# Tarefas em segundo plano                                           #
+# ------------------------------------------------------------------ #
+# solicitar() registra o pedido em exportacoes e entrega a geração a um
+# pool de threads; a página só lê a tabela (status, progresso, arquivo).
+# Pedidos iguais — mesmas abas e mesma versao_dados de equipamentos —
+# reaproveitam o arquivo pronto ou a tarefa em andamento: o trabalhador
+# atualiza todas as linhas da mesma (chave, versao). O arquivo vale por
+# VALIDADE e depois é apagado por limpar_expiradas().
+#
+# Cada atualização do trabalhador grava atualizado_em. Na subida do
+# processo (main.preparar_banco), recuperar_orfas() encerra só as tarefas
+# paradas há mais de ORFA — as de outros processos vivos seguem. ORFA é
+# folgado porque uma tarefa esperando na fila do pool também fica parada.
+
+TRABALHADORES = 2
+VALIDADE = timedelta(hours=24)
+ORFA = timedelta(minutes=30)
+
+_lock = threading.Lock()
+_pool: ThreadPoolExecutor | None = None
+
+
+def _agora(delta: timedelta = timedelta()) -> str:
+    return (datetime.now() + delta).isoformat(timespec="seconds")
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(TRABALHADORES, thread_name_prefix="exportacao")
+        return _pool
+
+
+def recuperar_orfas() -> int:
+    """Marca como 'erro' as tarefas em andamento sem sinal de vida há mais
+    de ORFA (o processo que as rodava caiu); devolve quantas."""
+    limite = _agora(-ORFA)
+    return backend.atual().escrever(lambda con: con.execute(
+        "UPDATE exportacoes SET status='erro', erro='interrompida', atualizado_em=? "
+        "WHERE status IN ('fila','rodando') AND COALESCE(atualizado_em, criado_em) < ?",
+        (_agora(), limite)).rowcount)
+
+
+def chave(abas: dict[str, tuple[str, tuple]], formato: str = "xlsx") -> str:
+    texto = json.dumps({aba: [sql, list(params)] for aba, (sql, params) in abas.items()},
+                       sort_keys=True, default=str)
+    return f"{formato}:{hashlib.sha1(texto.encode()).hexdigest()}"
+
+
+def _executar(tarefa: int, ch: str, versao: int, abas: dict, formato: str) -> None:
+    b = backend.atual()
+
+    def atualizar(sets: str, params=()) -> None:
+        b.escrever(lambda con: con.execute(
+            f"UPDATE exportacoes SET {sets}, atualizado_em=? WHERE chave=? AND versao=? "
+            "AND status IN ('fila','rodando')", (*params, _agora(), ch, versao)))
+
+    try:
+        atualizar("status='rodando'")
+        total = sum(b.linhas(f"SELECT COUNT(*) FROM ({sql}) q", params)[0][0]
+                    for sql, params in abas.values()) or 1
+        PASTA.mkdir(parents=True, exist_ok=True)
+        fmt = FORMATOS[formato]
+        arquivo, linhas = fmt["gerar"](
+            abas, PASTA / f"{tarefa}{fmt['sufixo']}",
+            ao_avancar=lambda n: atualizar("progresso=?", (n / total,)))
+        atualizar("status='pronto', progresso=1, linhas=?, arquivo=?, concluido_em=?, expira_em=?",
+                  (sum(linhas.values()), str(arquivo), _agora(), _agora(VALIDADE)))
+    except Exception as exc:
+        atualizar("status='erro', erro=?", (str(exc),))
+
+
+def solicitar(uid: int, abas: dict[str, tuple[str, tuple]], nome: str,
+              formato: str = "xlsx") -> int:
+    """Pede a exportação das ``abas`` no ``formato`` (ver FORMATOS) para o
+    usuário; devolve o id da tarefa.
+
+    Se já houver uma igual (pronta ou em andamento) para a versão atual dos
+    dados, o usuário recebe uma linha apontando para ela em vez de gerar outra.
+    """
+    b, pool = backend.atual(), _executor()
+    limpar_expiradas()
+    ch, versao = chave(abas, formato), repositorio.versao_dados("equipamentos")
+
+    # em andamento só conta com sinal de vida recente: a de um trabalhador
+    # que morreu depois da subida (recuperar_orfas) não é seguida para sempre
+    viva = ("(status='pronto' OR (status IN ('fila','rodando') "
+            "AND COALESCE(atualizado_em, criado_em) >= ?))")
+    limite = _agora(-ORFA)
+
+    def registrar(con) -> tuple[int, bool]:
+        propria = con.execute(
+            f"SELECT id FROM exportacoes WHERE usuario_id=? AND chave=? AND versao=? "
+            f"AND {viva} ORDER BY id DESC LIMIT 1", (uid, ch, versao, limite)).fetchone()
+        if propria:
+            return propria[0], False
+        ref = con.execute(
+            "SELECT status, progresso, linhas, arquivo, concluido_em, expira_em FROM exportacoes "
+            f"WHERE chave=? AND versao=? AND {viva} "
+            "ORDER BY id DESC LIMIT 1", (ch, versao, limite)).fetchone()
+        if ref and ref[0] == "pronto" and not Path(ref[3]).exists():
+            ref = None
+        status, progresso, linhas, arquivo, concluido, expira = ref or ("fila", 0, None, None, None, None)
+        nova = con.execute(
+            "INSERT INTO exportacoes (usuario_id, chave, versao, nome, status, progresso, linhas, "
+            "arquivo, criado_em, atualizado_em, concluido_em, expira_em) "
+            "VALUES (?,?,?,?,?,?,?,?,?,?,?,?) RETURNING id",
+            (uid, ch, versao, nome, status, progresso, linhas, arquivo, _agora(), _agora(),
+             concluido, expira),
+        ).fetchone()[0]
+        return nova, ref is None
+
+    tarefa, gerar = b.escrever(registrar)
+    if gerar:
+        pool.submit(_executar, tarefa, ch, versao, abas, formato)
+    return tarefa
+
+
+def minhas(uid: int, limite: int = 10):
+    """As últimas exportações do usuário (DataFrame), mais recentes primeiro."""
+    df = backend.atual().ler(
+        "SELECT id, nome, chave, status, progresso, linhas, arquivo, erro, criado_em, expira_em "
+        "FROM exportacoes WHERE usuario_id=? ORDER BY criado_em DESC, id DESC LIMIT ?",
+        (uid, limite))
+    df["formato"] = df["chave"].str.split(":").str[0]
+    return df
+
+
+def limpar_expiradas() -> int:
+    """Apaga os arquivos vencidos e marca as tarefas como 'expirada'."""
+    b, agora = backend.atual(), _agora()
+    vencidos = b.linhas("SELECT DISTINCT arquivo FROM exportacoes "
+                        "WHERE status='pronto' AND expira_em < ?", (agora,))
+    if not vencidos:
+        return 0
+    for (arquivo,) in vencidos:
+        Path(arquivo).unlink(missing_ok=True)
+    b.escrever(lambda con: con.execute(
+        "UPDATE exportacoes SET status='expirada', arquivo=NULL "
+        "WHERE status='pronto' AND expira_em < ?", (agora,)))
+    return len(vencidos)
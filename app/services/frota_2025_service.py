@@ -1,20 +1,12 @@
-# app/services/frota_service.py
+# app/services/frota_2025_service.py
 
-import sqlite3
+from app.services.frota_service import get_veiculos_by_setor
 
-def get_connection(db_path="app/database/veiculos.db"):
-    conn = sqlite3.connect(db_path, check_same_thread=False)
-    return conn
 
 def get_veiculos_by_setor_ano(setor):
     """
-    Retorna todas as colunas dos veículos da tabela 'frota' cujo
-    'centro_custo' seja igual ao setor informado.
+    Retorna todas as colunas dos equipamentos 2025 do setor (código ou
+    nome), como (linhas, colunas). A antiga 'frota_2025' do veiculos.db
+    foi consolidada em equipamentos.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM frota_2025 WHERE setor_id = ?", (setor,))
-    rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    conn.close()
-    return rows, columns
+    return get_veiculos_by_setor(setor, 2025)
@@ -1,18 +1,22 @@
-import sqlite3
+from app.services import repositorio
+from app.services.tipos import para_python
 
-def get_connection(db_path="app/database/veiculos.db"):
-    conn = sqlite3.connect(db_path, check_same_thread=False)
-    return conn
+# Consulta a frota 2024 no frota.db; a antiga tabela 'frota' do
+# veiculos.db foi consolidada em equipamentos (app/services/consolidacao.py).
 
-def get_veiculos_by_setor(setor):
+
+def _codigo(setor) -> int | None:
+    return setor if isinstance(setor, int) else repositorio.setor_por_nome(str(setor))
+
+
+def get_veiculos_by_setor(setor, ano: int = 2024):
     """
-    Retorna todas as colunas dos veículos da tabela 'frota' cujo
-    'centro_custo' seja igual ao setor informado.
+    Retorna todas as colunas dos equipamentos do setor (código ou nome,
+    inclusive o nome antigo do centro de custo) no ano, como (linhas, colunas).
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM frota WHERE centro_custo = ?", (setor,))
-    rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    conn.close()
-    return rows, columns
+    codigo = _codigo(setor)
+    if codigo is None:
+        return [], []
+    df = repositorio.equipamentos_setor_ano(codigo, ano)
+    # tuplas como as do sqlite3: tipos do Python e None nos vazios
+    return list(para_python(df).itertuples(index=False, name=None)), list(df.columns)
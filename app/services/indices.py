@@ -0,0 +1,24 @@
+import sqlite3
+
+from app.services import consultas
+
+# Os índices em si são criados pelas migrações (app/services/migracoes.py);
+# aqui fica só a checagem de que as consultas de produção os usam.
+
+# ------------------------------------------------------------------ #
+# Checagem de plano                                                  #
+# ------------------------------------------------------------------ #
+def plano(con: sqlite3.Connection, sql: str) -> list[str]:
+    params = (None,) * sql.count("?")
+    return [r[3] for r in con.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def varreduras(con: sqlite3.Connection,
+               sqls: dict[str, str] = consultas.FILTRADAS) -> dict[str, list[str]]:
+    """Consultas cujo plano varre uma tabela (ou um índice) inteira."""
+    falhas = {}
+    for nome, sql in sqls.items():
+        scans = [p for p in plano(con, sql) if p.startswith("SCAN")]
+        if scans:
+            falhas[nome] = scans
+    return falhas
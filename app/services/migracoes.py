@@ -0,0 +1,467 @@
+import time
+
+from app.services import duplicados
+
+# ------------------------------------------------------------------ #
+# Migrações de esquema numeradas                                     #
+# ------------------------------------------------------------------ #
+# Cada migração é (versao, descricao, passos). Um passo é um SQL ou uma
+# função f(con). Os passos rodam em ordem e cada um é commitado sozinho,
+# então precisam ser idempotentes (IF NOT EXISTS, checar antes de
+# alterar): se a migração cair no meio, rodar de novo termina o serviço.
+# Nunca edite uma migração já publicada — crie a próxima.
+#
+# O mesmo motor roda no SQLite e no PostgreSQL (conexão de
+# app/services/backend.py). SQL portátil vale para os dois; quando não
+# for, o passo é um dict {"sqlite": ..., "postgres": ...}.
+
+LOTE_BACKFILL = 5000
+
+
+def dialeto(con) -> str:
+    return getattr(con, "dialeto", "sqlite")
+
+
+def coluna_existe(con, tabela: str, coluna: str) -> bool:
+    if dialeto(con) == "postgres":
+        return con.execute(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = ? AND column_name = ?",
+            (tabela, coluna),
+        ).fetchone() is not None
+    return any(r[1] == coluna for r in con.execute(f"PRAGMA table_info({tabela})"))
+
+
+def adicionar_coluna(tabela: str, coluna: str, tipo: str):
+    """Passo: ALTER TABLE ADD COLUMN só se a coluna ainda não existir."""
+    def passo(con):
+        if not coluna_existe(con, tabela, coluna):
+            con.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+    return passo
+
+
+def backfill(tabela: str, set_sql: str, where_sql: str = "1=1", chave: str = "codigo",
+             lote: int = LOTE_BACKFILL, pausa_s: float = 0.0):
+    """Passo: UPDATE em faixas da chave inteira, um commit por faixa.
+
+    Evita uma transação gigante segurando o lock de escrita; entre as
+    faixas os escritores da aplicação conseguem entrar.
+    """
+    def passo(con):
+        lo, hi = con.execute(f"SELECT MIN({chave}), MAX({chave}) FROM {tabela}").fetchone()
+        if lo is None:
+            return
+        for ini in range(lo, hi + 1, lote):
+            con.execute(
+                f"UPDATE {tabela} SET {set_sql} "
+                f"WHERE {chave} BETWEEN ? AND ? AND ({where_sql})",
+                (ini, ini + lote - 1),
+            )
+            con.commit()
+            if pausa_s:
+                time.sleep(pausa_s)
+    return passo
+
+
+def _unificar_setores_duplicados(con):
+    """Aponta tudo para o menor código de cada nome repetido e apaga o resto."""
+    dup = """
+        SELECT s.codigo, m.codigo_final FROM setor s
+          JOIN (SELECT nome, MIN(codigo) AS codigo_final FROM setor
+                 GROUP BY nome HAVING COUNT(*) > 1) m ON m.nome = s.nome
+         WHERE s.codigo <> m.codigo_final
+    """
+    pares = con.execute(dup).fetchall()
+    for codigo, final in pares:
+        con.execute("UPDATE equipamentos SET centro_custo_uc=? WHERE centro_custo_uc=?", (final, codigo))
+        con.execute("UPDATE usuario SET setor_codigo=? WHERE setor_codigo=?", (final, codigo))
+        con.execute("DELETE FROM setor WHERE codigo=?", (codigo,))
+
+
+def versionar(tabela: str) -> dict:
+    """Passo: gatilhos que somam 1 em versao_dados a cada escrita na tabela.
+
+    Caches (listas do formulário, exportações) comparam essa versão para
+    saber se precisam recarregar, inclusive após escritas de outro
+    processo (importação, outra instância da aplicação).
+    """
+    semente = (f"INSERT INTO versao_dados (tabela, versao) VALUES ('{tabela}', 0) "
+               "ON CONFLICT DO NOTHING")
+    return {
+        "sqlite": [semente] + [
+            f"""
+            CREATE TRIGGER IF NOT EXISTS tg_{tabela}_versao_{evento[:3].lower()}
+            AFTER {evento} ON {tabela}
+            BEGIN
+                UPDATE versao_dados SET versao = versao + 1 WHERE tabela = '{tabela}';
+            END
+            """
+            for evento in ("INSERT", "UPDATE", "DELETE")
+        ],
+        "postgres": [
+            semente,
+            f"DROP TRIGGER IF EXISTS tg_{tabela}_versao ON {tabela}",
+            f"""
+            CREATE TRIGGER tg_{tabela}_versao
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {tabela}
+            FOR EACH STATEMENT EXECUTE PROCEDURE fn_versao_dados()
+            """,
+        ],
+    }
+
+
+MIGRACOES = [
+    (1, "esquema inicial", [{
+        "sqlite": [
+            """
+            CREATE TABLE IF NOT EXISTS setor (
+                codigo INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT NOT NULL,
+                sigla TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS usuario (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                nome TEXT NOT NULL,
+                cpf TEXT,
+                email TEXT NOT NULL,
+                senha TEXT NOT NULL,
+                setor_codigo INTEGER,
+                tipo_usuario TEXT NOT NULL CHECK (tipo_usuario IN ('admin', 'comum')),
+                FOREIGN KEY (setor_codigo) REFERENCES setor(codigo)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS equipamentos (
+                codigo INTEGER PRIMARY KEY AUTOINCREMENT,
+                ano INTEGER NOT NULL,
+                identificacao TEXT,
+                proprietario TEXT,
+                lotacao TEXT,
+                codigo_renavam TEXT,
+                numero_serie_chassi TEXT,
+                fabricante TEXT,
+                modelo TEXT,
+                ano_fabricacao INTEGER,
+                ano_modelo INTEGER,
+                tipo_acoplamento TEXT,
+                motorizacao TEXT,
+                tipo_bem TEXT,
+                subtipo_bem TEXT,
+                centro_custo_uc INTEGER NOT NULL,
+                status TEXT,
+                controle_desempenho TEXT,
+                uso_km NUMERIC,
+                campos_adicionais TEXT,
+                tipo_propriedade TEXT,
+                tipo_combustivel TEXT,
+                data_aquisicao DATE,
+                cor TEXT,
+                ordem_num_patrimonio TEXT,
+                observacoes TEXT,
+                FOREIGN KEY (centro_custo_uc) REFERENCES setor(codigo)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS historico_atualizacoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                usuario_id INTEGER,
+                equipamento_codigo INTEGER,
+                data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                acao TEXT,
+                detalhes TEXT,
+                FOREIGN KEY (usuario_id) REFERENCES usuario(id),
+                FOREIGN KEY (equipamento_codigo) REFERENCES equipamentos(codigo)
+            )
+            """,
+        ],
+        "postgres": [
+            """
+            CREATE TABLE IF NOT EXISTS setor (
+                codigo SERIAL PRIMARY KEY,
+                nome TEXT NOT NULL,
+                sigla TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS usuario (
+                id SERIAL PRIMARY KEY,
+                username TEXT UNIQUE NOT NULL,
+                nome TEXT NOT NULL,
+                cpf TEXT,
+                email TEXT NOT NULL,
+                senha TEXT NOT NULL,
+                setor_codigo INTEGER REFERENCES setor(codigo),
+                tipo_usuario TEXT NOT NULL CHECK (tipo_usuario IN ('admin', 'comum'))
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS equipamentos (
+                codigo SERIAL PRIMARY KEY,
+                ano INTEGER NOT NULL,
+                identificacao TEXT,
+                proprietario TEXT,
+                lotacao TEXT,
+                codigo_renavam TEXT,
+                numero_serie_chassi TEXT,
+                fabricante TEXT,
+                modelo TEXT,
+                ano_fabricacao INTEGER,
+                ano_modelo INTEGER,
+                tipo_acoplamento TEXT,
+                motorizacao TEXT,
+                tipo_bem TEXT,
+                subtipo_bem TEXT,
+                centro_custo_uc INTEGER NOT NULL REFERENCES setor(codigo),
+                status TEXT,
+                controle_desempenho TEXT,
+                uso_km NUMERIC,
+                campos_adicionais TEXT,
+                tipo_propriedade TEXT,
+                tipo_combustivel TEXT,
+                data_aquisicao TEXT,                -- vem da planilha como dd/mm/aaaa
+                cor TEXT,
+                ordem_num_patrimonio TEXT,
+                observacoes TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS historico_atualizacoes (
+                id SERIAL PRIMARY KEY,
+                usuario_id INTEGER REFERENCES usuario(id),
+                equipamento_codigo INTEGER REFERENCES equipamentos(codigo),
+                data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                acao TEXT,
+                detalhes TEXT
+            )
+            """,
+        ],
+    }]),
+    (2, "setor.cnuc", [
+        adicionar_coluna("setor", "cnuc", "TEXT"),
+    ]),
+    (3, "índices dos filtros das páginas", [
+        "CREATE INDEX IF NOT EXISTS ix_equipamentos_setor_ano "
+        "ON equipamentos (centro_custo_uc, ano)",
+        "CREATE INDEX IF NOT EXISTS ix_equipamentos_ano_identificacao "
+        "ON equipamentos (ano, identificacao)",
+        "CREATE INDEX IF NOT EXISTS ix_historico_usuario_equipamento "
+        "ON historico_atualizacoes (usuario_id, equipamento_codigo)",
+        "CREATE INDEX IF NOT EXISTS ix_usuario_cpf ON usuario (cpf)",
+        "ANALYZE",
+    ]),
+    (4, "setor.nome único (upsert em lote na importação)", [
+        _unificar_setores_duplicados,
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_setor_nome ON setor (nome)",
+    ]),
+    (5, "versao_dados (invalidação de caches)", [
+        """
+        CREATE TABLE IF NOT EXISTS versao_dados (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        {"postgres": """
+            CREATE OR REPLACE FUNCTION fn_versao_dados() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                UPDATE versao_dados SET versao = versao + 1 WHERE tabela = TG_TABLE_NAME;
+                RETURN NULL;
+            END
+            $$
+        """},
+        versionar("equipamentos"),
+    ]),
+    (6, "vw_migracao_pendente (2024 ainda não migrados para 2025)", [
+        # (setor, ano, identificacao) atende o filtro da página e a sonda
+        # do NOT EXISTS; o índice antigo (setor, ano) vira prefixo dele
+        "CREATE INDEX IF NOT EXISTS ix_equipamentos_setor_ano_ident "
+        "ON equipamentos (centro_custo_uc, ano, identificacao)",
+        "DROP INDEX IF EXISTS ix_equipamentos_setor_ano",
+        "DROP VIEW IF EXISTS vw_migracao_pendente",
+        """
+        CREATE VIEW vw_migracao_pendente AS
+        SELECT e.*
+          FROM equipamentos e
+         WHERE e.ano = 2024
+           AND NOT EXISTS (SELECT 1 FROM equipamentos n
+                            WHERE n.centro_custo_uc = e.centro_custo_uc
+                              AND n.ano = 2025
+                              AND n.identificacao = e.identificacao)
+        """,
+        "ANALYZE",
+    ]),
+    (7, "versao_dados de setor, usuario e histórico (cache de consultas)", [
+        versionar("setor"),
+        versionar("usuario"),
+        versionar("historico_atualizacoes"),
+    ]),
+    (8, "exportacoes (tarefas de exportação em segundo plano)", [
+        # datas em texto ISO (gravadas pela aplicação): comparam igual nos dois bancos
+        {dial: f"""
+            CREATE TABLE IF NOT EXISTS exportacoes (
+                id {chave},
+                usuario_id INTEGER REFERENCES usuario(id),
+                chave TEXT NOT NULL,
+                versao INTEGER NOT NULL,
+                nome TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'fila',
+                progresso REAL NOT NULL DEFAULT 0,
+                linhas INTEGER,
+                arquivo TEXT,
+                erro TEXT,
+                criado_em TEXT NOT NULL,
+                concluido_em TEXT,
+                expira_em TEXT
+            )
+            """ for dial, chave in (("sqlite", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+                                    ("postgres", "SERIAL PRIMARY KEY"))},
+        "CREATE INDEX IF NOT EXISTS ix_exportacoes_chave ON exportacoes (chave, versao)",
+        "CREATE INDEX IF NOT EXISTS ix_exportacoes_usuario ON exportacoes (usuario_id, criado_em)",
+        "CREATE INDEX IF NOT EXISTS ix_exportacoes_status ON exportacoes (status, expira_em)",
+    ]),
+    (9, "tabelas de referência do veiculos.db e controle da consolidação", [
+        # ids de origem preservados: a consolidação reinsere com ON CONFLICT
+        """
+        CREATE TABLE IF NOT EXISTS estrutura (
+            id INTEGER PRIMARY KEY,
+            sigla TEXT NOT NULL,
+            uorg TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_estrutura_sigla ON estrutura (sigla)",
+        # nomes de centro de custo das planilhas antigas → setor (NULL = sem correspondente)
+        """
+        CREATE TABLE IF NOT EXISTS centro_custo_legado (
+            nome TEXT PRIMARY KEY,
+            cnuc TEXT,
+            setor_codigo INTEGER REFERENCES setor(codigo)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_centro_custo_legado_setor ON centro_custo_legado (setor_codigo)",
+        """
+        CREATE TABLE IF NOT EXISTS dimensao_frota_2024 (
+            id INTEGER PRIMARY KEY,
+            gerencia_regional TEXT,
+            tipo_bem TEXT,
+            subtipo_bem TEXT,
+            identificacao TEXT,
+            numero_serie_chassi TEXT,
+            codigo_renavam TEXT,
+            ordem_num_patrimonio TEXT,
+            proprietario TEXT,
+            fabricante TEXT,
+            modelo TEXT,
+            cor TEXT,
+            tipo_combustivel TEXT,
+            status TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_dimensao_frota_2024_identificacao "
+        "ON dimensao_frota_2024 (identificacao)",
+        # linha de origem → linha de destino; é o que torna a consolidação repetível
+        """
+        CREATE TABLE IF NOT EXISTS consolidacao (
+            origem TEXT NOT NULL,
+            origem_id INTEGER NOT NULL,
+            destino TEXT NOT NULL,
+            destino_id INTEGER NOT NULL,
+            consolidado_em TEXT NOT NULL,
+            PRIMARY KEY (origem, origem_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_consolidacao_destino ON consolidacao (destino, destino_id)",
+        """
+        CREATE TABLE IF NOT EXISTS consolidacao_pendencias (
+            origem TEXT NOT NULL,
+            origem_id INTEGER NOT NULL,
+            coluna TEXT NOT NULL,
+            valor TEXT,
+            motivo TEXT NOT NULL,
+            PRIMARY KEY (origem, origem_id, coluna)
+        )
+        """,
+    ]),
+    (10, "chaves de duplicidade de equipamentos", [
+        # tabela à parte: SELECT * de equipamentos (grade, exportação) não muda
+        """
+        CREATE TABLE IF NOT EXISTS chaves_equipamento (
+            codigo INTEGER PRIMARY KEY REFERENCES equipamentos(codigo) ON DELETE CASCADE,
+            ano INTEGER NOT NULL,
+            placa TEXT,
+            chassi TEXT,
+            renavam TEXT,
+            patrimonio TEXT
+        )
+        """,
+        *(f"CREATE INDEX IF NOT EXISTS ix_chaves_equipamento_{tipo} "
+          f"ON chaves_equipamento ({tipo}, ano)" for tipo in duplicados.TIPOS),
+        duplicados.atualizar_chaves,
+        "ANALYZE",
+    ]),
+    (11, "exportacoes.atualizado_em (sinal de vida da tarefa)", [
+        # tarefa em 'fila'/'rodando' parada há mais de exportacao.ORFA não
+        # tem mais processo que a termine
+        adicionar_coluna("exportacoes", "atualizado_em", "TEXT"),
+    ]),
+    (12, "versao_dados de centro_custo_legado (cache de repositorio.setor_por_nome)", [
+        versionar("centro_custo_legado"),
+    ]),
+]
+
+
+# ------------------------------------------------------------------ #
+# Motor                                                              #
+# ------------------------------------------------------------------ #
+def _garantir_controle(con) -> None:
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versao INTEGER PRIMARY KEY,
+            descricao TEXT NOT NULL,
+            aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duracao_s REAL
+        )
+    """)
+    con.commit()
+
+
+def versao_atual(con) -> int:
+    _garantir_controle(con)
+    return con.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version").fetchone()[0]
+
+
+def pendentes(con, ate: int | None = None) -> list[tuple]:
+    atual = versao_atual(con)
+    return [m for m in MIGRACOES
+            if m[0] > atual and (ate is None or m[0] <= ate)]
+
+
+def _expandir(passos: list, dial: str) -> list:
+    """Troca os passos {"sqlite": ..., "postgres": ...} pela variante do dialeto."""
+    saida = []
+    for passo in passos:
+        if isinstance(passo, dict):
+            passo = passo.get(dial, [])
+        saida.extend(passo if isinstance(passo, list) else [passo])
+    return saida
+
+
+def migrar(con, ate: int | None = None, log=print) -> int:
+    """Aplica as migrações pendentes (até ``ate``) e devolve a versão final."""
+    for versao, descricao, passos in pendentes(con, ate):
+        log(f"→ migração {versao}: {descricao}")
+        inicio = time.perf_counter()
+        for passo in _expandir(passos, dialeto(con)):
+            if callable(passo):
+                passo(con)
+            else:
+                con.execute(passo)
+            con.commit()
+        con.execute(
+            "INSERT INTO schema_version (versao, descricao, duracao_s) VALUES (?, ?, ?)",
+            (versao, descricao, time.perf_counter() - inicio),
+        )
+        con.commit()
+    return versao_atual(con)
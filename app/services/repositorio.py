@@ -0,0 +1,323 @@
+import pandas as pd
+
+from app.services import backend, cache, consultas, duplicados
+from app.services.tipos import tipar
+from app.services.equipamentos import diferencas, gravar_alteracoes, inserir_itens_2025
+
+# ------------------------------------------------------------------ #
+# Repositório: todo acesso a dados das páginas passa por aqui        #
+# ------------------------------------------------------------------ #
+# As funções usam o backend configurado (SQLite ou PostgreSQL, ver
+# app/services/backend.py); leituras devolvem DataFrame/dict e escritas
+# rodam numa transação do backend.
+#
+# Leituras marcadas com @cache.em_cache ficam no cache compartilhado entre
+# sessões (app/services/cache.py), invalidado pela versao_dados das
+# tabelas lidas; não altere no lugar o DataFrame que elas devolvem.
+#
+# Linhas de equipamentos saem tipadas (app/services/tipos.py): category
+# no vocabulário, Int16/Int32 em anos e códigos, float em uso_km.
+
+
+def _b():
+    return backend.atual()
+
+
+def _escrever(func, *args):
+    try:
+        return _b().escrever(func, *args)
+    finally:
+        cache.tocar()
+
+
+# ---------- setor ----------
+@cache.em_cache("setor")
+def listar_setores() -> pd.DataFrame:
+    return _b().ler("SELECT codigo, nome, sigla, cnuc FROM setor ORDER BY nome")
+
+
+def criar_setor(nome: str, sigla: str, cnuc: str) -> bool:
+    """False se já existir setor com o nome (ux_setor_nome)."""
+    b = _b()
+    try:
+        _escrever(lambda con: con.execute(
+            "INSERT INTO setor (nome, sigla, cnuc) VALUES (?,?,?)", (nome, sigla, cnuc)))
+        return True
+    except b.erros_integridade:
+        return False
+
+
+def atualizar_setor(cod: int, nome: str, sigla: str, cnuc: str) -> bool:
+    """False se o nome novo já for de outro setor (ux_setor_nome)."""
+    b = _b()
+    try:
+        _escrever(lambda con: con.execute(
+            "UPDATE setor SET nome=?, sigla=?, cnuc=? WHERE codigo=?", (nome, sigla, cnuc, cod)))
+        return True
+    except b.erros_integridade:
+        return False
+
+
+def excluir_setor(cod: int) -> str | None:
+    """Exclui o setor; devolve a mensagem de erro se não puder."""
+    def excluir(con):
+        vinc = con.execute("SELECT COUNT(*) FROM usuario WHERE setor_codigo=?", (cod,)).fetchone()[0]
+        if vinc:
+            return "Setor com usuários vinculados não pode ser excluído."
+        equip = con.execute("SELECT COUNT(*) FROM equipamentos WHERE centro_custo_uc=?", (cod,)).fetchone()[0]
+        if equip:
+            return "Setor com equipamentos vinculados não pode ser excluído."
+        con.execute("DELETE FROM setor WHERE codigo=?", (cod,))
+
+    return _escrever(excluir)
+
+
+# ---------- usuario ----------
+def autenticar(cpf: str, senha_hash: str) -> bool:
+    return bool(_b().linhas(consultas.LOGIN, (cpf, senha_hash)))
+
+
+def usuario_por_cpf(cpf: str) -> dict | None:
+    rows = _b().linhas(consultas.USUARIO_POR_CPF, (cpf,))
+    if not rows:
+        return None
+    row = rows[0]
+    return {
+        "id": row[0],
+        "nome": row[1],
+        "cpf": row[2],
+        "setor_codigo": row[3],
+        "tipo_usuario": row[4],
+    }
+
+
+@cache.em_cache("usuario", "setor")
+def listar_usuarios() -> pd.DataFrame:
+    return _b().ler("""
+        SELECT u.id, u.username, u.nome, u.cpf, u.email, u.setor_codigo, u.tipo_usuario,
+               s.nome AS setor_nome, s.sigla AS setor_sigla
+          FROM usuario u
+          LEFT JOIN setor s ON s.codigo = u.setor_codigo
+         ORDER BY u.nome
+    """)
+
+
+def criar_usuario(username: str, nome: str, cpf: str, email: str, senha_hash: str,
+                  setor_codigo: int, tipo: str) -> bool:
+    """False se username/CPF já existir."""
+    b = _b()
+    try:
+        _escrever(lambda con: con.execute(
+            "INSERT INTO usuario (username, nome, cpf, email, senha, setor_codigo, tipo_usuario) "
+            "VALUES (?,?,?,?,?,?,?)",
+            (username, nome, cpf, email, senha_hash, setor_codigo, tipo)))
+        return True
+    except b.erros_integridade:
+        return False
+
+
+def atualizar_usuario(uid: int, campos: dict) -> None:
+    cols = ", ".join(f"{c}=?" for c in campos)
+    params = [*campos.values(), uid]
+    _escrever(lambda con: con.execute(f"UPDATE usuario SET {cols} WHERE id=?", params))
+
+
+def excluir_usuario(uid: int) -> str | None:
+    """Exclui o usuário; devolve a mensagem de erro se não puder."""
+    def excluir(con):
+        adm = con.execute("SELECT tipo_usuario FROM usuario WHERE id=?", (uid,)).fetchone()
+        if adm and adm[0] == "admin":
+            qtd = con.execute("SELECT COUNT(*) FROM usuario WHERE tipo_usuario='admin'").fetchone()[0]
+            if qtd <= 1:
+                return "Não dá pra excluir o último admin!"
+        hist = con.execute("SELECT COUNT(*) FROM historico_atualizacoes WHERE usuario_id=?", (uid,)).fetchone()[0]
+        if hist:
+            return "Usuário com histórico de atualizações não pode ser excluído."
+        con.execute("DELETE FROM usuario WHERE id=?", (uid,))
+
+    return _escrever(excluir)
+
+
+# ---------- equipamentos ----------
+@cache.em_cache("equipamentos", "setor")
+def frota_setor(setor: int) -> pd.DataFrame:
+    return tipar(_b().ler(consultas.FROTA_SETOR, (setor,)))
+
+
+@cache.em_cache("equipamentos")
+def resumo_setor(setor: int) -> pd.DataFrame:
+    """Contagens (ano, dimensao, valor, quantidade) do setor; ver consultas.RESUMO_SETOR."""
+    return _b().ler(consultas.RESUMO_SETOR, (setor,) * len(consultas.DIMENSOES_RESUMO))
+
+
+@cache.em_cache("equipamentos")
+def tabela_setor(setor: int) -> pd.DataFrame:
+    return tipar(_b().ler(consultas.TABELA_SETOR, (setor,)))
+
+
+@cache.em_cache("setor")
+def nome_setor(setor: int) -> str | None:
+    rows = _b().linhas("SELECT nome FROM setor WHERE codigo=?", (setor,))
+    return rows[0][0] if rows else None
+
+
+@cache.em_cache("setor", "centro_custo_legado")
+def setor_por_nome(nome: str) -> int | None:
+    """Código do setor pelo nome atual ou por um nome antigo já consolidado."""
+    rows = _b().linhas("""
+        SELECT codigo FROM setor WHERE nome = ?
+        UNION ALL
+        SELECT setor_codigo FROM centro_custo_legado WHERE nome = ? AND setor_codigo IS NOT NULL
+    """, (nome.strip(), nome.strip()))
+    return rows[0][0] if rows else None
+
+
+@cache.em_cache("equipamentos")
+def equipamentos_setor_ano(setor: int, ano: int) -> pd.DataFrame:
+    return tipar(_b().ler(consultas.EQUIP_SETOR_ANO, (setor, ano)))
+
+
+@cache.em_cache("equipamentos")
+def migracao_pendente(setor: int, excluir: list[str] = (), limite: int = 50,
+                      pagina: int = 0) -> tuple[pd.DataFrame, int]:
+    """Uma página dos itens 2024 do setor ainda não migrados, e o total.
+
+    ``excluir``: identificações já na lista temporária do formulário.
+    """
+    b = _b()
+    filtro, params = consultas.PENDENTES_SETOR, [setor]
+    # NOT IN com NULL de um lado ou do outro não é verdadeiro: item sem
+    # identificação continua pendente, e None na lista não zera o filtro
+    excluir = [i for i in excluir if i is not None]
+    if excluir:
+        filtro += (" AND (identificacao IS NULL OR identificacao NOT IN "
+                   f"({','.join('?' for _ in excluir)}))")
+        params += excluir
+    total = b.linhas(f"SELECT COUNT(*) FROM ({filtro}) p", params)[0][0]
+    df = b.ler(filtro + consultas.PENDENTES_PAGINA, params + [limite, pagina * limite])
+    return tipar(df), total
+
+
+@cache.em_cache("equipamentos")
+def equipamentos_ano(ano: int, setor: int | None = None) -> pd.DataFrame:
+    if setor is None:
+        return tipar(_b().ler(consultas.EQUIP_ANO, (ano,)))
+    return tipar(_b().ler(consultas.EQUIP_ANO + " AND centro_custo_uc=?", (ano, setor)))
+
+
+def _filtros_grade(filtros: dict) -> tuple[str, list]:
+    sql, params = "", []
+    for nome, valor in filtros.items():
+        if valor in (None, ""):
+            continue
+        sql += f" AND {consultas.FILTROS_GRADE[nome]}"
+        params.append(f"%{valor}%" if nome == "modelo" else valor)
+    return sql, params
+
+
+def _ordem_grade(ordem: str, desc: bool, apos: tuple | None) -> tuple[str, str, list]:
+    """(trecho do cursor, ORDER BY, params do cursor) da grade."""
+    if ordem not in consultas.ORDENS_GRADE:
+        raise ValueError(f"Coluna de ordenação inválida: {ordem!r}")
+    direcao, op = ("DESC", "<") if desc else ("ASC", ">")
+    if ordem == "codigo":
+        sql_ordem = consultas.ORDEM_CODIGO.format(dir=direcao)
+        if apos is None:
+            return "", sql_ordem, []
+        return consultas.APOS_CODIGO.format(op=op), sql_ordem, [apos[1]]
+    sql_ordem = consultas.ORDEM_COLUNA.format(col=ordem, dir=direcao)
+    if apos is None:
+        return "", sql_ordem, []
+    valor, codigo = apos
+    if valor is None:
+        return consultas.APOS_NULO.format(col=ordem, op=op), sql_ordem, [codigo]
+    return consultas.APOS_COLUNA.format(col=ordem, op=op), sql_ordem, [valor, valor, codigo]
+
+
+def cursor_grade(linha: pd.Series, ordem: str = "codigo") -> tuple:
+    """Cursor (valor da coluna de ordem, codigo) da última linha de uma
+    página, para pedir a seguinte."""
+    valor = linha[ordem]
+    valor = None if pd.isna(valor) else getattr(valor, "item", lambda: valor)()
+    return valor, int(linha["codigo"])
+
+
+@cache.em_cache("equipamentos", "historico_atualizacoes")
+def pagina_equipamentos(filtros: dict, apos: tuple | None = None, limite: int = 100,
+                        ordem: str = "codigo", desc: bool = False) -> tuple[pd.DataFrame, bool]:
+    """Uma página da grade do admin: equipamentos que passam nos filtros,
+    em ordem de ``ordem`` (uma de consultas.ORDENS_GRADE) e codigo, depois
+    do cursor ``apos`` (cursor_grade da última linha; None: do início).
+    Devolve (página, tem_mais)."""
+    sql, params = _filtros_grade(filtros)
+    sql_apos, sql_ordem, params_apos = _ordem_grade(ordem, desc, apos)
+    df = _b().ler(consultas.GRADE.format(filtros=sql, apos=sql_apos, ordem=sql_ordem),
+                  [*params, *params_apos, limite + 1])
+    # vocabulário como texto: a página vai para o data_editor
+    return tipar(df.iloc[:limite], categorias=False), len(df) > limite
+
+
+@cache.em_cache("equipamentos", "historico_atualizacoes")
+def contar_equipamentos(filtros: dict) -> int:
+    sql, params = _filtros_grade(filtros)
+    return _b().linhas(consultas.GRADE_CONTAGEM.format(filtros=sql), params)[0][0]
+
+
+@cache.em_cache("equipamentos")
+def anos() -> list[int]:
+    return [r[0] for r in _b().linhas("SELECT DISTINCT ano FROM equipamentos ORDER BY ano")]
+
+
+@cache.em_cache("equipamentos", "historico_atualizacoes")
+def equipamentos_do_usuario(uid: int) -> pd.DataFrame:
+    """Equipamentos que o usuário já atualizou (uma consulta, sem IN dinâmico)."""
+    return tipar(_b().ler(consultas.EQUIP_DO_USUARIO, (uid,)))
+
+
+@cache.em_cache("equipamentos")
+def valores_distintos(cols: list[str]) -> dict[str, list[str]]:
+    """Valores distintos de várias colunas numa consulta só: um SELECT
+    DISTINCT por coluna (UNION ALL), então só os valores voltam do banco,
+    não as combinações entre colunas."""
+    sql = "\nUNION ALL\n".join(
+        f"SELECT DISTINCT '{col}', CAST({col} AS TEXT) FROM equipamentos "
+        f"WHERE {col} IS NOT NULL" for col in cols)
+    saida = {col: [] for col in cols}
+    for col, valor in _b().linhas(sql):
+        saida[col].append(valor)
+    return {col: sorted(valores) for col, valores in saida.items()}
+
+
+def versao_dados(tabela: str = "equipamentos") -> int:
+    """Contador de escritas na tabela (gatilhos da migração 5)."""
+    rows = _b().linhas("SELECT versao FROM versao_dados WHERE tabela=?", (tabela,))
+    return rows[0][0] if rows else 0
+
+
+def conflitos(chaves: dict, ano: int = 2025) -> pd.DataFrame:
+    """Equipamentos do ``ano`` com alguma das ``chaves`` (duplicados.chaves_item),
+    em qualquer setor; ``em_comum`` diz quais bateram. Sem cache e sem
+    tipar (poucas linhas, só para mensagens): é uma busca pelos índices
+    de chaves_equipamento."""
+    if not chaves:
+        return pd.DataFrame(columns=["em_comum"])
+    params = [v for tipo in duplicados.TIPOS for v in (chaves.get(tipo), ano)]
+    df = _b().ler(consultas.CONFLITOS, params)
+    valores = zip(*(df.pop(t).tolist() for t in duplicados.TIPOS))
+    df["em_comum"] = [", ".join(t for t, v in zip(duplicados.TIPOS, linha)
+                                if v is not None and v == chaves.get(t))
+                      for linha in valores]
+    return df
+
+
+def salvar_itens_2025(setor: int, uid: int, itens: list[dict]) -> int:
+    return _escrever(inserir_itens_2025, setor, uid, itens)
+
+
+def atualizar_equipamentos(antes: pd.DataFrame, depois: pd.DataFrame, uid: int) -> int:
+    """Grava só as células que mudaram entre ``antes`` e ``depois`` (chave:
+    codigo), com antes/depois no histórico. Devolve quantos equipamentos mudaram."""
+    alteracoes = diferencas(antes, depois)
+    if not alteracoes:
+        return 0
+    return _escrever(gravar_alteracoes, uid, alteracoes)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+# ------------------------------------------------------------------ #
+# Esquema em memória de equipamentos                                 #
+# ------------------------------------------------------------------ #
+# O driver devolve texto repetido como um objeto Python por célula,
+# anos como float quando há NULL e uso_km (NUMERIC) misturando int e
+# float. As leituras de equipamentos do repositório passam por tipar(),
+# que aplica o esquema abaixo:
+#
+#   - vocabulário (poucos valores distintos): category
+#   - anos e códigos: inteiros com NULL (Int16/Int32)
+#   - uso_km: float
+#   - identificadores (placa, chassi, RENAVAM, patrimônio) e texto livre
+#     (observações, campos adicionais, data de aquisição — quase todo
+#     valor é único, category não economiza nada): string guardada em
+#     Arrow, sem um objeto Python por célula
+#
+# Colunas fora do esquema (setor_nome, colunas de consultas agregadas)
+# passam como vieram. A medição fica em banco/bench_memoria.py.
+
+VOCABULARIO = (
+    "status", "tipo_combustivel", "tipo_bem", "subtipo_bem", "modelo",
+    "fabricante", "proprietario", "lotacao", "tipo_acoplamento", "motorizacao",
+    "controle_desempenho", "tipo_propriedade", "cor",
+)
+IDENTIFICADORES = ("identificacao", "codigo_renavam", "numero_serie_chassi",
+                   "ordem_num_patrimonio")
+LIVRES = ("campos_adicionais", "data_aquisicao", "observacoes")
+TEXTO = "string[pyarrow]"
+
+ESQUEMA_EQUIPAMENTOS: dict[str, str] = {
+    "codigo": "Int32",
+    "ano": "Int16",
+    "centro_custo_uc": "Int32",
+    "ano_fabricacao": "Int16",
+    "ano_modelo": "Int16",
+    "uso_km": "float64",
+    **{c: TEXTO for c in IDENTIFICADORES + LIVRES},
+    **{c: "category" for c in VOCABULARIO},
+}
+
+
+def _inteiro(s: pd.Series, tipo: str) -> pd.Series:
+    n = pd.to_numeric(s, errors="coerce")
+    # valor digitado errado (ano 202019) não estoura o tipo: sobe para Int64
+    limite = np.iinfo(tipo.lower()).max
+    if n.notna().any() and (n.max() > limite or n.min() < -limite):
+        tipo = "Int64"
+    return n.astype(tipo)
+
+
+def tipar(df: pd.DataFrame, categorias: bool = True,
+          esquema: dict[str, str] = ESQUEMA_EQUIPAMENTOS) -> pd.DataFrame:
+    """``df`` com as colunas do ``esquema`` convertidas.
+
+    ``categorias=False`` deixa o vocabulário como texto (grade editável:
+    no data_editor uma coluna category só aceita os valores já presentes).
+    """
+    tipos = {}
+    for col in df.columns.intersection(list(esquema)):
+        tipo = esquema[col]
+        if tipo == "category" and not categorias:
+            tipo = TEXTO
+        if tipo.startswith("Int"):
+            df = df.assign(**{col: _inteiro(df[col], tipo)})
+        elif tipo == "float64":
+            df = df.assign(**{col: pd.to_numeric(df[col], errors="coerce").astype(tipo)})
+        else:
+            tipos[col] = tipo
+    return df.astype(tipos) if tipos else df
+
+
+def para_python(df: pd.DataFrame) -> pd.DataFrame:
+    """object com int/str/float do Python e None no lugar de NA/NaN/NaT
+    (compara com == e os dois drivers aceitam)."""
+    return df.astype(object).where(df.notna(), None)
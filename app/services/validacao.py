@@ -0,0 +1,244 @@
+from datetime import date
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from app.services.equipamentos import diferencas
+from app.services.vocabulario import STATUS_OFICIAIS
+
+# ------------------------------------------------------------------ #
+# Validação de linhas de equipamentos                                #
+# ------------------------------------------------------------------ #
+# Um conjunto só de regras para o formulário (preenchimento), a grade do
+# admin (veiculos) e as importações (banco/importacao.py). Cada regra
+# avalia um DataFrame inteiro de uma vez (operações de coluna do pandas)
+# e devolve a máscara das linhas que falham; validar() junta tudo num
+# relatório com uma linha por (linha do DataFrame, regra).
+#
+# Nível "erro" impede a gravação; "aviso" só é informado (formatos que a
+# base antiga não segue). Regra cujas colunas não estão no DataFrame não
+# se aplica.
+
+ANO_MINIMO = 1900
+# "Não se aplica"/"Não informado" valem como campo vazio
+VAZIOS = {"", "-", "nao se aplica", "não se aplica", "nao informado", "não informado"}
+# chassi: VIN de 17 caracteres, sem I, O e Q
+VIN = r"[A-HJ-NPR-Z0-9]{17}"
+PESOS_RENAVAM = np.array([3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+class Colunas:
+    """As colunas de ``df`` já convertidas (texto limpo, número, preenchido),
+    calculadas uma vez por validação e compartilhadas entre as regras."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._memo: dict = {}
+
+    def __contains__(self, col: str) -> bool:
+        return col in self.df.columns
+
+    def _lembrar(self, tipo: str, col: str, calcular):
+        try:
+            return self._memo[tipo, col]
+        except KeyError:
+            v = self._memo[tipo, col] = calcular()
+            return v
+
+    def bruta(self, col: str) -> pd.Series:
+        # object só com números (lista de dicts, grade) vira coluna numérica
+        s = self.df[col]
+        return self._lembrar("bruta", col, s.infer_objects) if s.dtype == object else s
+
+    def texto(self, col: str) -> pd.Series:
+        """Texto sem espaços nas pontas, "" no vazio; ".0" do Excel removido."""
+        return self._lembrar("texto", col, lambda: (
+            self.bruta(col).astype("string").fillna("").str.strip()
+            .str.replace(r"^(\d+)\.0$", r"\1", regex=True)))
+
+    def preenchido(self, col: str) -> pd.Series:
+        def calcular():
+            s = self.bruta(col)
+            if pd.api.types.is_numeric_dtype(s):
+                return s.notna()
+            return ~self.texto(col).str.lower().isin(VAZIOS)
+        return self._lembrar("preenchido", col, calcular)
+
+    def numero(self, col: str) -> pd.Series:
+        def calcular():
+            # coluna já numérica (leitura tipada, planilha) não passa por texto
+            s = self.bruta(col)
+            if pd.api.types.is_numeric_dtype(s):
+                return s.astype("float64")
+            return pd.to_numeric(self.texto(col).str.replace(",", ".", regex=False),
+                                 errors="coerce")
+        return self._lembrar("numero", col, calcular)
+
+
+def do_ano(ano: int) -> Callable[[Colunas], pd.Series]:
+    return lambda c: c.numero("ano").eq(ano)
+
+
+def do_tipo(tipo: str) -> Callable[[Colunas], pd.Series]:
+    return lambda c: c.texto("tipo_bem").str.upper().eq(tipo)
+
+
+class Regra:
+    """``falha(c)`` → máscara das linhas inválidas; ``quando(c)`` restringe
+    a regra a parte das linhas (ano, tipo de bem). ``c``: Colunas."""
+
+    def __init__(self, nome: str, colunas: Iterable[str], mensagem: str,
+                 falha: Callable[[Colunas], pd.Series], nivel: str = "erro",
+                 quando: Callable[[Colunas], pd.Series] | None = None,
+                 requer: Iterable[str] = ()):
+        self.nome, self.colunas, self.mensagem = nome, tuple(colunas), mensagem
+        self.falha, self.nivel, self.quando = falha, nivel, quando
+        # colunas que o filtro ``quando`` usa
+        self.requer = tuple(requer)
+
+    def aplica(self, c: Colunas) -> bool:
+        return all(col in c for col in (*self.colunas, *self.requer))
+
+    def mascara(self, c: Colunas) -> np.ndarray:
+        m = self.falha(c).fillna(False)
+        if self.quando is not None:
+            m &= self.quando(c).fillna(False)
+        return m.to_numpy(dtype=bool)
+
+
+# ---------- construtores das regras declarativas ----------
+def obrigatorio(col: str, mensagem: str, **kw) -> Regra:
+    return Regra(f"{col}_obrigatorio", (col,), mensagem,
+                 lambda c: ~c.preenchido(col), **kw)
+
+
+def formato(col: str, padrao: str, mensagem: str, **kw) -> Regra:
+    """Só confere o que foi preenchido."""
+    return Regra(f"{col}_formato", (col,), mensagem,
+                 lambda c: c.preenchido(col) & ~c.texto(col).str.fullmatch(padrao), **kw)
+
+
+def faixa(col: str, minimo, maximo, mensagem: str, **kw) -> Regra:
+    """Número entre ``minimo`` e ``maximo`` (None: sem limite; callable: na hora)."""
+    def falha(c):
+        n = c.numero(col)
+        hi = maximo() if callable(maximo) else maximo
+        fora = n.isna()
+        if minimo is not None:
+            fora |= n < minimo
+        if hi is not None:
+            fora |= n > hi
+        return c.preenchido(col) & fora
+    return Regra(f"{col}_faixa", (col,), mensagem, falha, **kw)
+
+
+def dominio(col: str, valores: Iterable[str], mensagem: str, **kw) -> Regra:
+    permitidos = list(valores)
+    return Regra(f"{col}_dominio", (col,), mensagem,
+                 lambda c: c.preenchido(col) & ~c.texto(col).isin(permitidos), **kw)
+
+
+# ---------- regras com mais de uma coluna ----------
+def _justificativa_vazia(c: Colunas) -> pd.Series:
+    return c.texto("ordem_num_patrimonio").str.fullmatch(r"JUST:\s*")
+
+
+def _renavam_invalido(c: Colunas) -> pd.Series:
+    """9 a 11 dígitos (os antigos, de 9, completam com zeros) e dígito
+    verificador: soma ponderada dos 10 primeiros × 10 mod 11."""
+    s = c.texto("codigo_renavam")
+    digitos = s.str.fullmatch(r"\d{9,11}")
+    ruim = c.preenchido("codigo_renavam") & ~digitos
+    if digitos.any():
+        texto = "".join(s[digitos].str.zfill(11))
+        d = np.frombuffer(texto.encode("ascii"), dtype=np.uint8).reshape(-1, 11) - 48
+        dv = (d[:, :10].astype(np.int64) @ PESOS_RENAVAM * 10) % 11
+        dv[dv == 10] = 0
+        ruim[digitos] = dv != d[:, 10]
+    return ruim
+
+
+def _ano_modelo_incoerente(c: Colunas) -> pd.Series:
+    fab, mod = c.numero("ano_fabricacao"), c.numero("ano_modelo")
+    return (mod < fab) | (mod > fab + 1)
+
+
+def _ano_maximo() -> int:
+    return date.today().year + 1
+
+
+REGRAS: tuple[Regra, ...] = (
+    obrigatorio("identificacao", "Identificação é obrigatória."),
+    obrigatorio("ordem_num_patrimonio", "Patrimônio é obrigatório.",
+                quando=do_ano(2025), requer=("ano",)),
+    Regra("justificativa_patrimonio", ("ordem_num_patrimonio",),
+          "Justifique ausência do patrimônio.", _justificativa_vazia),
+    faixa("ano_fabricacao", ANO_MINIMO, _ano_maximo,
+          f"Ano de fabricação fora da faixa ({ANO_MINIMO} ao ano que vem)."),
+    faixa("ano_modelo", ANO_MINIMO, _ano_maximo,
+          f"Ano modelo fora da faixa ({ANO_MINIMO} ao ano que vem)."),
+    faixa("uso_km", 0, None, "Uso (km/horas) deve ser um número maior ou igual a zero."),
+    dominio("status", STATUS_OFICIAIS, "Status fora da lista oficial de 2025.",
+            quando=do_ano(2025), requer=("ano",)),
+    Regra("ano_modelo_coerente", ("ano_fabricacao", "ano_modelo"),
+          "Ano modelo deve ser o de fabricação ou o seguinte.",
+          _ano_modelo_incoerente, nivel="aviso"),
+    Regra("codigo_renavam_formato", ("codigo_renavam",),
+          "RENAVAM inválido (9 a 11 dígitos, com dígito verificador).",
+          _renavam_invalido, nivel="aviso", quando=do_tipo("VEÍCULO"), requer=("tipo_bem",)),
+    formato("numero_serie_chassi", VIN,
+            "Chassi de veículo deve ter 17 caracteres (letras sem I/O/Q e números).",
+            nivel="aviso", quando=do_tipo("VEÍCULO"), requer=("tipo_bem",)),
+)
+
+# colunas que alguma regra lê (montar o DataFrame só com elas)
+COLUNAS = sorted({col for r in REGRAS for col in (*r.colunas, *r.requer)})
+COLUNAS_RELATORIO = ["linha", "regra", "colunas", "nivel", "mensagem"]
+
+
+def validar(df: pd.DataFrame, regras: Iterable[Regra] = REGRAS) -> pd.DataFrame:
+    """Relatório com uma linha por (rótulo do índice de ``df``, regra que falhou)."""
+    partes, c = [], Colunas(df)
+    for r in regras:
+        if df.empty or not r.aplica(c):
+            continue
+        linhas = df.index[r.mascara(c)]
+        if len(linhas):
+            partes.append(pd.DataFrame({
+                "linha": linhas, "regra": r.nome, "colunas": [r.colunas] * len(linhas),
+                "nivel": r.nivel, "mensagem": r.mensagem,
+            }))
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_RELATORIO)
+    return pd.concat(partes, ignore_index=True)
+
+
+def erros(relatorio: pd.DataFrame) -> pd.DataFrame:
+    return relatorio[relatorio["nivel"] == "erro"]
+
+
+def avisos(relatorio: pd.DataFrame) -> pd.DataFrame:
+    return relatorio[relatorio["nivel"] == "aviso"]
+
+
+def por_linha(relatorio: pd.DataFrame) -> dict:
+    """{linha: "mensagem; mensagem"} para relatórios por linha (quarentena)."""
+    saida = {}
+    for linha, msg in zip(relatorio["linha"].tolist(), relatorio["mensagem"].tolist()):
+        saida[linha] = f"{saida[linha]}; {msg}" if linha in saida else msg
+    return saida
+
+
+def validar_edicao(antes: pd.DataFrame, depois: pd.DataFrame) -> pd.DataFrame:
+    """Relatório da grade do admin (linha = codigo) só com as regras que
+    envolvem células alteradas: linha antiga com dado ruim que ninguém
+    mexeu não trava a gravação."""
+    mudou = {codigo: set(campos) for codigo, campos in diferencas(antes, depois)}
+    if not mudou:
+        return pd.DataFrame(columns=COLUNAS_RELATORIO)
+    linhas = depois.set_index("codigo")
+    relatorio = validar(linhas[linhas.index.isin(list(mudou))])
+    manter = [bool(mudou[linha] & set(cols))
+              for linha, cols in zip(relatorio["linha"], relatorio["colunas"])]
+    return relatorio[manter]
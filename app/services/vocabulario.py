@@ -0,0 +1,36 @@
+from app.services import repositorio
+
+# ------------------------------------------------------------------ #
+# Listas de opções do formulário                                     #
+# ------------------------------------------------------------------ #
+# Todas as listas saem de uma única consulta (repositorio.valores_distintos,
+# um SELECT DISTINCT por coluna), guardada no cache de consultas e
+# recarregado quando a versao_dados de equipamentos muda — escrita da
+# aplicação, da importação ou de outro processo.
+
+# status oficiais dos itens 2025: chave curta → texto gravado
+STATUS_MAP = {
+    "novo": "Novo (Bem em perfeito estado, sem uso ou com uso muito recente, sem sinais de desgaste.)",
+    "bom": "Bom (Bem usado, mas em boas condições físicas e de funcionamento.)",
+    "regular": "Regular (Bem com sinais evidentes de uso, algum desgaste, mas ainda funcional.)",
+    "ocioso": "Ocioso (Bem em bom estado, mas sem uso por falta de necessidade ou planejamento.)",
+    "ocioso_ocioso": "Ocioso Ocioso (Bem totalmente parado e sem previsão de uso. Pode ser considerado para desfazimento.)",
+    "antieconomico": "Antieconômico (Bem que gera mais custos de manutenção do que benefícios ou que é obsoleto.)",
+    "irrecuperavel": "Irrecuperável (Bem danificado ou inservível, sem possibilidade de recuperação ou reaproveitamento.)"
+}
+STATUS_OFICIAIS = sorted(set(STATUS_MAP.values()))
+
+CAMPOS = (
+    "tipo_bem", "subtipo_bem", "proprietario", "tipo_propriedade",
+    "controle_desempenho", "tipo_combustivel", "tipo_acoplamento", "motorizacao",
+    "status",
+)
+
+
+def listas() -> dict[str, list[str]]:
+    """{campo: valores distintos ordenados} para todos os CAMPOS."""
+    return repositorio.valores_distintos(list(CAMPOS))
+
+
+def opcoes(campo: str) -> list[str]:
+    return listas()[campo]
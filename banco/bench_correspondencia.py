@@ -0,0 +1,110 @@
+"""Benchmark e conferência do índice de correspondência de setores
+(app/services/correspondencia.py).
+
+  1. acerto: com o índice montado só com setor + estrutura, resolve os
+     nomes antigos da planilha de correspondência (veiculos.db) e compara
+     com o setor que ela indica; mostra também quantos o casamento exato
+     (o que a importação fazia) acharia;
+  2. vazão: monta o índice completo e resolve --linhas valores sorteados
+     entre nomes antigos, atuais e variações (caixa, acento, espaços).
+
+Uso (na raiz do projeto):
+    python banco/bench_correspondencia.py
+    python banco/bench_correspondencia.py --linhas 5000000
+
+Roda em CÓPIAS temporárias de app/database/frota.db e veiculos.db
+(consolidadas antes, para ter centro_custo_legado e estrutura).
+"""
+import argparse
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import unicodedata
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import consolidacao                        # noqa: E402
+from app.services.correspondencia import Correspondencia     # noqa: E402
+from app.services.db import _DB_PATH, VEICULOS_DB_PATH       # noqa: E402
+
+
+def variacoes(nome: str) -> list[str]:
+    sem_acento = "".join(c for c in unicodedata.normalize("NFKD", nome)
+                         if not unicodedata.combining(c))
+    return [nome, nome.lower(), f"  {nome.title()} ", sem_acento, nome.replace(" ", "  ")]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--veiculos", type=Path, default=VEICULOS_DB_PATH)
+    ap.add_argument("--linhas", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    pasta = Path(tempfile.mkdtemp())
+    shutil.copy(args.banco, pasta / "frota.db")
+    consolidacao.consolidar(pasta / "frota.db", args.veiculos, log=lambda _: None)
+    con = sqlite3.connect(pasta / "frota.db")
+    con.execute("ATTACH DATABASE ? AS legado", (str(args.veiculos),))
+    setores = con.execute("SELECT codigo, nome, cnuc FROM setor").fetchall()
+    estrutura = con.execute("SELECT sigla, uorg FROM estrutura").fetchall()
+
+    # 1. acerto contra a planilha de correspondência
+    gabarito = con.execute("""
+        SELECT c.centro_de_custo_uc, s.codigo FROM legado.correspondentes c
+          JOIN setor s ON s.nome = TRIM(c.nome_uc)""").fetchall()
+    exatos = {nome: codigo for codigo, nome, _ in setores}
+    sem_legado = Correspondencia(setores, (), estrutura)
+    resultado = Counter()
+    for nome, esperado in gabarito:
+        codigo, metodo = sem_legado.como(nome)
+        resultado[(metodo or "-", "sem setor" if codigo is None
+                   else "certo" if codigo == esperado else "ERRADO")] += 1
+    print(f"Planilha de correspondência: {len(gabarito)} nomes antigos")
+    print(f"   casamento exato (antes): {sum(n in exatos for n, _ in gabarito)}")
+    for (metodo, situacao), n in sorted(resultado.items()):
+        print(f"   {metodo:>10} {situacao:>9}: {n}")
+    erros = sum(n for (_, s), n in resultado.items() if s == "ERRADO")
+
+    # 2. vazão com o índice completo
+    pool = [r[0] for r in con.execute("""
+        SELECT centro_custo FROM legado.frota UNION SELECT centro_de_custo_uc FROM legado.correspondentes
+        UNION SELECT centro_custo_uc FROM legado.nao_correspondentes UNION SELECT nome FROM setor""")
+        if r[0]]
+    pool = [v for nome in pool for v in variacoes(nome)]
+    random.seed(0)
+    valores = random.choices(pool, k=args.linhas)
+    con.close()
+
+    con = sqlite3.connect(pasta / "frota.db")
+    t0 = time.perf_counter()
+    corr = Correspondencia.do_banco(lambda sql: con.execute(sql).fetchall())
+    montar = time.perf_counter() - t0
+    frio = Correspondencia.do_banco(lambda sql: con.execute(sql).fetchall())
+    con.close()
+    t0 = time.perf_counter()
+    distintos = [frio.como(v) for v in set(pool)]
+    t_distintos = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    codigos = corr.resolver_todos(valores)
+    t_linhas = time.perf_counter() - t0
+
+    print(f"\nÍndice montado em {montar * 1000:.0f} ms")
+    print(f"{len(distintos)} valores distintos sem memória: "
+          f"{len(distintos) / t_distintos:,.0f} valores/s")
+    print(f"{len(valores):,} linhas: {t_linhas:.2f}s = {len(valores) / t_linhas:,.0f} linhas/s; "
+          f"{sum(c is not None for c in codigos) / len(codigos):.1%} com setor")
+    print(f"   métodos (valores distintos): {dict(corr.metodos)}")
+
+    shutil.rmtree(pasta, ignore_errors=True)
+    sys.exit(1 if erros else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Benchmark e conferência das chaves de duplicidade (app/services/duplicados.py).
+
+  1. normalização: grafias diferentes do mesmo identificador dão a mesma
+     chave; "Não se aplica", "0000000", "JUST: ..." e códigos internos
+     de equipamento não dão chave;
+  2. gravações: itens salvos pelo formulário e edições do admin deixam
+     chaves_equipamento em dia, e repositorio.conflitos() acha o item de
+     outro setor escrito de outro jeito;
+  3. varredura: agrupar() junta as variantes num grupo só e deixa de
+     fora os blocos de valor de preenchimento;
+  4. escala: tempo de agrupar() dobrando as linhas (deve crescer linear)
+     contra a comparação par a par, e o tempo de uma busca de conflitos
+     na tabela multiplicada por --copias.
+
+Uso (na raiz do projeto):
+    python banco/bench_duplicados.py
+    python banco/bench_duplicados.py --linhas 1600000 --copias 50
+
+Roda numa CÓPIA temporária de app/database/frota.db.
+"""
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from itertools import combinations
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import backend, duplicados, repositorio   # noqa: E402
+from app.services.db import _DB_PATH                        # noqa: E402
+
+from bench_exportacao import multiplicar                      # noqa: E402
+
+# (tipo, [grafias que têm de dar a mesma chave])
+VARIANTES = [
+    ("placa", ["ABC1D23", "abc-1d23", "ABC 1323", "ABC1323"]),
+    ("chassi", ["9BWZZZ377VT004251", "9bwzzz377vt004251", "9BWZZZ377VTOO4251", "9BW ZZZ377 VT004251"]),
+    ("renavam", ["00639884962", "639884962", "639884962.0", "0639884962"]),
+    ("patrimonio", ["123456", "000123456", "123456.0", " 123456 "]),
+]
+SEM_CHAVE = [
+    ("placa", "Não se aplica"), ("chassi", "NÃO SE APLICA"), ("chassi", "00000000"),
+    ("renavam", "1111111111"), ("renavam", "123"), ("patrimonio", "JUST: doação sem tombo"),
+    ("patrimonio", "0"),
+]
+
+falhas = []
+
+
+def checar(nome: str, ok: bool) -> None:
+    print(("✅ " if ok else "❌ ") + nome)
+    if not ok:
+        falhas.append(nome)
+
+
+def sinteticas(n: int, duplicar: float = 0.02, seed: int = 1) -> pd.DataFrame:
+    """``n`` linhas de chaves únicas, com ``duplicar`` delas repetindo a
+    placa ou o chassi de outra."""
+    rnd = random.Random(seed)
+    df = pd.DataFrame({
+        "codigo": range(1, n + 1),
+        "ano": 2025,
+        "placa": [f"P{i:09d}" for i in range(n)],
+        "chassi": [f"C{i:016d}" for i in range(n)],
+        "renavam": [f"{i + 10**9:011d}" for i in range(n)],
+        "patrimonio": [None] * n,
+    })
+    for i in rnd.sample(range(n), int(n * duplicar)):
+        col = rnd.choice(["placa", "chassi"])
+        df.at[i, col] = df.at[rnd.randrange(n), col]
+    return df
+
+
+def par_a_par(df: pd.DataFrame) -> int:
+    """O que agrupar() evita: comparar cada par de linhas."""
+    linhas = df[list(duplicados.TIPOS)].to_numpy().tolist()
+    return sum(any(x is not None and x == y for x, y in zip(a, b))
+               for a, b in combinations(linhas, 2))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--linhas", type=int, default=800_000,
+                    help="maior tamanho sintético da varredura")
+    ap.add_argument("--copias", type=int, default=20,
+                    help="quantas vezes repetir a tabela para a busca de conflitos")
+    args = ap.parse_args()
+
+    # 1. normalização
+    for tipo, grafias in VARIANTES:
+        col = duplicados.CHAVES[tipo]
+        ks = {duplicados.chaves_item({"tipo_bem": "VEÍCULO", col: g}).get(tipo) for g in grafias}
+        checar(f"{tipo}: {len(grafias)} grafias, uma chave {ks}", len(ks) == 1 and None not in ks)
+    for tipo, valor in SEM_CHAVE:
+        k = duplicados.chaves_item({"tipo_bem": "VEÍCULO", duplicados.CHAVES[tipo]: valor})
+        checar(f"{tipo} {valor!r} não gera chave", tipo not in k)
+    checar("placa e RENAVAM só de veículo",
+           duplicados.chaves_item({"tipo_bem": "EQUIPAMENTO", "identificacao": "ROC0012",
+                                   "codigo_renavam": "00639884962"}) == {})
+    amostra = pd.DataFrame([{"tipo_bem": "VEÍCULO", "identificacao": p}
+                            for p in VARIANTES[0][1]] + [{"tipo_bem": "EQUIPAMENTO"}])
+    checar("chaves() do DataFrame = chaves_item() de cada linha",
+           [{t: v for t, v in r.items() if v is not None}
+            for r in duplicados.chaves(amostra).to_dict("records")]
+           == [duplicados.chaves_item(r) for r in amostra.to_dict("records")])
+
+    # 2. gravações (cópia do banco, pelo repositório)
+    pasta = Path(tempfile.mkdtemp())
+    shutil.copy(args.banco, pasta / "frota.db")
+    b = backend.BackendSqlite(pasta / "frota.db")
+    b.migrar(log=lambda _: None)
+    backend.definir(b)
+    checar("migração preenche chaves_equipamento para todo equipamento",
+           b.linhas("SELECT COUNT(*) FROM equipamentos")[0][0]
+           == b.linhas("SELECT COUNT(*) FROM chaves_equipamento")[0][0])
+    setores = [r[0] for r in b.linhas("SELECT codigo FROM setor ORDER BY codigo LIMIT 2")]
+    uid = b.linhas("SELECT id FROM usuario ORDER BY id LIMIT 1")[0][0]
+    base = b.ler("SELECT * FROM equipamentos WHERE ano = 2024 LIMIT 1").iloc[0].to_dict()
+    base.pop("codigo")
+    original = {**base, "tipo_bem": "VEÍCULO", "identificacao": "ABC1D23",
+                "codigo_renavam": "639884962.0", "numero_serie_chassi": "9BWZZZ377VT004251",
+                "ordem_num_patrimonio": "JUST: conferência"}
+    repositorio.salvar_itens_2025(setores[0], uid, [original])
+    codigo = b.linhas("SELECT codigo FROM equipamentos WHERE identificacao = 'ABC1D23'")[0][0]
+    checar("item salvo já tem chaves",
+           tuple(b.linhas("SELECT placa, renavam FROM chaves_equipamento WHERE codigo = ?",
+                          (codigo,))[0]) == ("ABC1323", "00639884962"))
+    outro = {**original, "identificacao": "abc-1323", "codigo_renavam": "00639884962",
+             "numero_serie_chassi": "Não se aplica"}
+    achados = repositorio.conflitos(duplicados.chaves_item(outro))
+    checar("conflitos() acha o item escrito de outro jeito, com as chaves em comum",
+           achados["codigo"].tolist() == [codigo] and achados["em_comum"].iloc[0] == "placa, renavam")
+    checar("conflitos() não mistura anos", repositorio.conflitos(
+        duplicados.chaves_item(outro), ano=2024).empty)
+    antes, _ = repositorio.pagina_equipamentos({"ano": 2025, "setor": setores[0]}, limite=500)
+    depois = antes.copy()
+    depois.loc[depois["codigo"] == codigo, "numero_serie_chassi"] = "9BWZZZ377VT00425O"
+    repositorio.atualizar_equipamentos(antes, depois, uid)
+    checar("edição do chassi recalcula a chave",
+           b.linhas("SELECT chassi FROM chaves_equipamento WHERE codigo = ?", (codigo,))[0][0]
+           == "9BWZZZ377VT004250")
+    checar("varredura completa logo depois não tem o que atualizar",
+           b.escrever(duplicados.atualizar_chaves) == 0)
+
+    # 3. varredura
+    repositorio.salvar_itens_2025(setores[1], uid, [outro])
+    chaves = b.ler("SELECT codigo, ano, placa, chassi, renavam, patrimonio FROM chaves_equipamento")
+    grupos, _ = duplicados.agrupar(chaves)
+    meus = grupos[grupos["ano"] == 2025]
+    checar("as duas grafias caem num grupo só, em setores diferentes",
+           meus.groupby("grupo")["codigo"].apply(len).max() >= 2
+           and codigo in set(meus["codigo"]))
+    lixo = pd.DataFrame({"codigo": range(1, 31), "ano": 2025, "placa": None,
+                         "chassi": "41192000034", "renavam": None, "patrimonio": None})
+    g, ignorados = duplicados.agrupar(lixo)
+    checar(f"bloco de {len(lixo)} com o mesmo chassi vai para ignorados, sem grupo",
+           g.empty and ignorados["quantidade"].tolist() == [len(lixo)])
+    encadeado = pd.DataFrame({"codigo": [1, 2, 3, 4], "ano": 2025,
+                              "placa": ["A1", "A1", None, None],
+                              "chassi": [None, "C1", "C1", None],
+                              "renavam": [None, None, None, "R1"], "patrimonio": None})
+    g, _ = duplicados.agrupar(encadeado)
+    checar("grupos transitivos (placa 1=2, chassi 2=3) e 4 sozinho fora",
+           g["codigo"].tolist() == [1, 2, 3] and g["grupo"].nunique() == 1)
+
+    # 4. escala
+    print(f"\n{'linhas':>10}{'agrupar':>12}{'por linha':>12}{'grupos':>9}")
+    n, anterior = 50_000, None
+    while n <= args.linhas:
+        df = sinteticas(n)
+        t0 = time.perf_counter()
+        grupos, _ = duplicados.agrupar(df)
+        dt = time.perf_counter() - t0
+        razao = f"  ({dt / anterior:.1f}x)" if anterior else ""
+        print(f"{n:>10,}{dt:>10.2f}s{dt / n * 1e6:>10.1f}µs{grupos['grupo'].nunique():>9,}{razao}")
+        anterior, n = dt, n * 2
+    pequeno = sinteticas(2_000)
+    t0 = time.perf_counter()
+    par_a_par(pequeno)
+    dt = time.perf_counter() - t0
+    print(f"par a par: {len(pequeno):,} linhas em {dt:.2f}s → {args.linhas:,} linhas levariam "
+          f"~{dt * (args.linhas / len(pequeno)) ** 2 / 3600:,.0f} h")
+
+    multiplicar(b, args.copias)
+    b.escrever(duplicados.atualizar_chaves)
+    total = b.linhas("SELECT COUNT(*) FROM chaves_equipamento")[0][0]
+    k = duplicados.chaves_item(outro)
+    t0 = time.perf_counter()
+    for _ in range(200):
+        repositorio.conflitos(k)
+    print(f"\nconflitos() com {total:,} equipamentos: "
+          f"{(time.perf_counter() - t0) / 200 * 1000:.1f} ms por busca")
+
+    shutil.rmtree(pasta, ignore_errors=True)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
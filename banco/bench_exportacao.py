@@ -0,0 +1,124 @@
+"""Benchmark da exportação Excel do admin (2024 + 2025): tempo e pico de
+memória Python da montagem antiga (DataFrame inteiro → BytesIO, larguras
+por astype(str)) × exportacao.exportar_xlsx (partes → constant_memory,
+larguras por MAX(LENGTH())), e conferência de que as duas planilhas têm
+o mesmo conteúdo.
+
+Uso (na raiz do projeto):
+    python banco/bench_exportacao.py
+    python banco/bench_exportacao.py --copias 10    # multiplica as linhas
+
+Roda numa CÓPIA temporária de app/database/frota.db.
+"""
+import argparse
+import io
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import backend, consultas, exportacao    # noqa: E402
+from app.services.db import _DB_PATH                          # noqa: E402
+
+
+def montar_excel_antigo(planilhas: dict[str, pd.DataFrame]) -> bytes:
+    """A montagem anterior da página, para comparação."""
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="xlsxwriter") as wr:
+        wb = wr.book
+        header_fmt = wb.add_format(exportacao.FORMATO_CABECALHO)
+        cell_fmt = wb.add_format(exportacao.FORMATO_CELULA)
+        for aba, df in planilhas.items():
+            df.to_excel(wr, sheet_name=aba, index=False, startrow=1, header=False)
+            ws = wr.sheets[aba]
+            for col, nome in enumerate(df.columns):
+                ws.write(0, col, nome, header_fmt)
+                # .astype(str) no original; com o tipo string do pandas novo o
+                # NaN continua NaN e len() falha, então map(str), que é o mesmo
+                largura = max(len(nome), df.iloc[:, col].map(str).map(len).max()) + 2
+                ws.set_column(col, col, largura, cell_fmt)
+    return buf.getvalue()
+
+
+def antigo(pasta: Path) -> Path:
+    # leitura crua, como a página fazia (sem a tipagem do repositório)
+    dados = {f"equipamentos_{ano}": backend.atual().ler(consultas.EQUIP_ANO, (ano,))
+             for ano in (2024, 2025)}
+    arquivo = pasta / "antigo.xlsx"
+    arquivo.write_bytes(montar_excel_antigo(dados))
+    return arquivo
+
+
+def novo(pasta: Path) -> Path:
+    abas = {f"equipamentos_{ano}": exportacao.consulta_ano(ano) for ano in (2024, 2025)}
+    return exportacao.exportar_xlsx(abas, pasta / "novo.xlsx")[0]
+
+
+def multiplicar(b, copias: int) -> None:
+    """Repete as linhas de 2024/2025 até haver ``copias`` de cada."""
+    if copias <= 1:
+        return
+    cols = [c for c in b.ler("SELECT * FROM equipamentos LIMIT 0").columns if c != "codigo"]
+    lista = ", ".join(cols)
+    ultimo = b.linhas("SELECT MAX(codigo) FROM equipamentos")[0][0]
+    b.escrever(lambda con: [con.execute(
+        f"INSERT INTO equipamentos ({lista}) SELECT {lista} FROM equipamentos "
+        "WHERE ano IN (2024, 2025) AND codigo <= ?", (ultimo,))
+        for _ in range(copias - 1)])
+
+
+def medir(func, pasta: Path) -> tuple[Path, float, float]:
+    """Tempo numa rodada limpa; pico de memória noutra, com tracemalloc
+    (que deixa tudo bem mais lento)."""
+    t0 = time.perf_counter()
+    func(pasta)
+    dt = time.perf_counter() - t0
+    tracemalloc.start()
+    arquivo = func(pasta)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return arquivo, dt, pico / 2**20
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--copias", type=int, default=1,
+                    help="quantas vezes repetir as linhas de 2024/2025")
+    args = ap.parse_args()
+
+    pasta = Path(tempfile.mkdtemp())
+    shutil.copy(args.banco, pasta / "frota.db")
+    b = backend.BackendSqlite(pasta / "frota.db")
+    backend.definir(b)
+    b.migrar(log=lambda _: None)
+    multiplicar(b, args.copias)
+    linhas = b.linhas("SELECT COUNT(*) FROM equipamentos WHERE ano IN (2024, 2025)")[0][0]
+    print(f"Linhas exportadas: {linhas}")
+
+    resultados = {}
+    for nome, func in (("antigo", antigo), ("streaming", novo)):
+        arquivo, dt, pico = medir(func, pasta)
+        resultados[nome] = arquivo
+        print(f"{nome:>10}: {dt:6.2f}s, pico {pico:7.1f} MB, arquivo {arquivo.stat().st_size / 2**20:.1f} MB")
+
+    ok = True
+    for aba in ("equipamentos_2024", "equipamentos_2025"):
+        a = pd.read_excel(resultados["antigo"], sheet_name=aba)
+        n = pd.read_excel(resultados["streaming"], sheet_name=aba)
+        igual = a.shape == n.shape and a.equals(n)
+        ok &= igual
+        print(f"{'✅' if igual else '❌'} {aba}: {len(n)} linhas")
+    shutil.rmtree(pasta, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark da exportação de vários anos (uma aba por ano): abas geradas
+uma de cada vez (1 trabalhador) × em paralelo (exportacao.TRABALHADORES_ABAS
+threads, cada uma com sua conexão de leitura), nos três formatos, e
+conferência de que os arquivos trazem o mesmo conteúdo.
+
+Cria --anos anos sintéticos (cópias das linhas de 2024 com ano trocado),
+cada um com --copias cópias.
+
+Uso (na raiz do projeto):
+    python banco/bench_exportacao_anos.py
+    python banco/bench_exportacao_anos.py --anos 10 --copias 3 --trabalhadores 4
+
+O ganho depende dos núcleos da máquina: leitura do SQLite, compressão e
+conversão para Arrow soltam o GIL; a escrita do xlsx é Python puro e
+fica na thread que monta o arquivo.
+
+Roda numa CÓPIA temporária de app/database/frota.db.
+"""
+import argparse
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import backend, exportacao   # noqa: E402
+from app.services.db import _DB_PATH            # noqa: E402
+
+
+def semear_anos(b, anos: list[int], copias: int) -> None:
+    cols = [c for c in b.ler("SELECT * FROM equipamentos LIMIT 0").columns
+            if c not in ("codigo", "ano")]
+    lista = ", ".join(cols)
+    b.escrever(lambda con: [con.execute(
+        f"INSERT INTO equipamentos (ano, {lista}) SELECT ?, {lista} FROM equipamentos WHERE ano = 2024",
+        (ano,)) for ano in anos for _ in range(copias)])
+
+
+def conteudo(formato: str, arquivo: Path):
+    if formato == "xlsx":
+        return {aba: df.shape for aba, df in pd.read_excel(arquivo, sheet_name=None).items()}
+    if formato == "parquet":
+        return pd.read_parquet(arquivo)
+    return gzip.decompress(arquivo.read_bytes())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--anos", type=int, default=10)
+    ap.add_argument("--copias", type=int, default=1)
+    ap.add_argument("--trabalhadores", type=int, default=exportacao.TRABALHADORES_ABAS)
+    args = ap.parse_args()
+
+    pasta = Path(tempfile.mkdtemp())
+    shutil.copy(args.banco, pasta / "frota.db")
+    b = backend.BackendSqlite(pasta / "frota.db")
+    backend.definir(b)
+    b.migrar(log=lambda _: None)
+    anos = list(range(2000, 2000 + args.anos))
+    semear_anos(b, anos, args.copias)
+    abas = exportacao.abas_por_ano(anos)
+    total = b.linhas(f"SELECT COUNT(*) FROM equipamentos WHERE ano < {2000 + args.anos}")[0][0]
+    print(f"{len(abas)} abas, {total} linhas; {os.cpu_count()} núcleo(s)")
+
+    ok = True
+    print(f"{'formato':>8} {'1 trabalhador':>14} {f'{args.trabalhadores} trabalhadores':>16} {'ganho':>6}")
+    for formato, fmt in exportacao.FORMATOS.items():
+        tempos, saidas = {}, {}
+        for n in (1, args.trabalhadores):
+            destino = pasta / f"{n}{fmt['sufixo']}"
+            t0 = time.perf_counter()
+            _, linhas = fmt["gerar"](abas, destino, trabalhadores=n)
+            tempos[n] = time.perf_counter() - t0
+            saidas[n] = conteudo(formato, destino)
+            ok &= sum(linhas.values()) == total
+        a, p = saidas[1], saidas[args.trabalhadores]
+        igual = a.equals(p) if isinstance(a, pd.DataFrame) else a == p
+        ok &= igual
+        print(f"{formato:>8} {tempos[1]:>13.2f}s {tempos[args.trabalhadores]:>15.2f}s "
+              f"{tempos[1] / tempos[args.trabalhadores]:>5.1f}x {'✅' if igual else '❌ diferente'}")
+    shutil.rmtree(pasta, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
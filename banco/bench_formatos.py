@@ -0,0 +1,81 @@
+"""Benchmark dos formatos de exportação do admin (2024 + 2025): tempo de
+gravação, tamanho do arquivo e tempo de leitura de volta (pandas) para
+xlsx, Parquet e CSV.gz, e conferência de que os três trazem os mesmos
+dados do banco.
+
+Uso (na raiz do projeto):
+    python banco/bench_formatos.py
+    python banco/bench_formatos.py --copias 10    # multiplica as linhas
+
+Roda numa CÓPIA temporária de app/database/frota.db.
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import backend, exportacao   # noqa: E402
+from app.services.db import _DB_PATH            # noqa: E402
+from bench_exportacao import multiplicar        # noqa: E402
+
+
+def ler_de_volta(formato: str, arquivo: Path) -> pd.DataFrame:
+    if formato == "xlsx":
+        return pd.concat(pd.read_excel(arquivo, sheet_name=None).values(), ignore_index=True)
+    if formato == "parquet":
+        return pd.read_parquet(arquivo)
+    return pd.read_csv(arquivo, low_memory=False)
+
+
+def normalizar(df: pd.DataFrame) -> pd.DataFrame:
+    # cada formato devolve seus tipos (Int16, float, object); compara como
+    # texto. xlsx e CSV não distinguem texto vazio de nulo.
+    df = df.astype(object).where(df.notna() & (df != ""), None)
+    df = df.map(lambda v: None if v is None else str(float(v)) if isinstance(v, (int, float)) else str(v))
+    return df.sort_values("codigo").reset_index(drop=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--copias", type=int, default=1,
+                    help="quantas vezes repetir as linhas de 2024/2025")
+    args = ap.parse_args()
+
+    pasta = Path(tempfile.mkdtemp())
+    shutil.copy(args.banco, pasta / "frota.db")
+    b = backend.BackendSqlite(pasta / "frota.db")
+    backend.definir(b)
+    b.migrar(log=lambda _: None)
+    multiplicar(b, args.copias)
+    abas = {f"equipamentos_{ano}": exportacao.consulta_ano(ano) for ano in (2024, 2025)}
+    esperado = normalizar(b.ler("SELECT * FROM equipamentos WHERE ano IN (2024, 2025)"))
+    print(f"Linhas exportadas: {len(esperado)}")
+
+    ok = True
+    print(f"{'formato':>8} {'gravação':>9} {'tamanho':>10} {'leitura':>8}")
+    for formato, fmt in exportacao.FORMATOS.items():
+        destino = pasta / f"saida{fmt['sufixo']}"
+        t0 = time.perf_counter()
+        fmt["gerar"](abas, destino)
+        gravacao = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        lido = ler_de_volta(formato, destino)
+        leitura = time.perf_counter() - t0
+        igual = normalizar(lido).equals(esperado)
+        ok &= igual
+        print(f"{formato:>8} {gravacao:>8.2f}s {destino.stat().st_size / 2**20:>7.2f} MB "
+              f"{leitura:>7.2f}s {'✅' if igual else '❌ dados diferentes'}")
+    shutil.rmtree(pasta, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
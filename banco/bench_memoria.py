@@ -0,0 +1,98 @@
+"""Benchmark da memória das leituras de equipamentos: pd.read_sql (como as
+páginas liam), o DataFrame cru do backend e o tipado de
+app/services/tipos.py (o que o repositório devolve agora).
+
+Mede memory_usage(deep=True) da tabela inteira e das leituras de uma
+sessão (setor com mais equipamentos: equipamentos_setor_ano 2024/2025,
+tabela_setor, frota_setor), confere que a tipagem não muda nenhum valor
+e mostra quanto custa tipar.
+
+Uso (na raiz do projeto):
+    python banco/bench_memoria.py
+    python banco/bench_memoria.py --copias 10    # multiplica as linhas
+    python banco/bench_memoria.py --objeto       # texto como object (pandas 2)
+
+Roda numa CÓPIA temporária de app/database/frota.db.
+"""
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import backend, consultas                  # noqa: E402
+from app.services.db import _DB_PATH                         # noqa: E402
+from app.services.tipos import para_python, tipar            # noqa: E402
+
+from bench_exportacao import multiplicar                      # noqa: E402
+
+
+def mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--copias", type=int, default=1,
+                    help="quantas vezes repetir as linhas de 2024/2025")
+    ap.add_argument("--objeto", action="store_true",
+                    help="texto como object, como no pandas 2 (sem infer_string)")
+    args = ap.parse_args()
+    if args.objeto:
+        pd.set_option("future.infer_string", False)
+
+    pasta = Path(tempfile.mkdtemp())
+    shutil.copy(args.banco, pasta / "frota.db")
+    b = backend.BackendSqlite(pasta / "frota.db")
+    b.migrar(log=lambda _: None)
+    multiplicar(b, args.copias)
+    setor = b.linhas("""SELECT centro_custo_uc FROM equipamentos GROUP BY 1
+                        ORDER BY COUNT(*) DESC LIMIT 1""")[0][0]
+    leituras = {
+        "equipamentos (tudo)": ("SELECT * FROM equipamentos", ()),
+        "equipamentos_setor_ano 2024": (consultas.EQUIP_SETOR_ANO, (setor, 2024)),
+        "equipamentos_setor_ano 2025": (consultas.EQUIP_SETOR_ANO, (setor, 2025)),
+        "tabela_setor": (consultas.TABELA_SETOR, (setor,)),
+        "frota_setor": (consultas.FROTA_SETOR, (setor,)),
+    }
+
+    con = sqlite3.connect(pasta / "frota.db")
+    print(f"pandas {pd.__version__}; setor {setor}\n")
+    print(f"{'leitura':<30}{'linhas':>8}{'read_sql':>11}{'backend':>10}{'tipado':>10}{'redução':>9}")
+    ok, sessao = True, [0.0, 0.0]
+    for nome, (sql, params) in leituras.items():
+        lido = pd.read_sql(sql, con, params=params)
+        cru = b.ler(sql, params)
+        t0 = time.perf_counter()
+        tipado = tipar(cru)
+        dt = time.perf_counter() - t0
+        igual = para_python(cru).equals(para_python(tipado))
+        ok &= igual
+        if nome != "equipamentos (tudo)":
+            sessao[0] += mb(lido)
+            sessao[1] += mb(tipado)
+        print(f"{'✅' if igual else '❌'} {nome:<28}{len(cru):>8}{mb(lido):>9.2f}MB"
+              f"{mb(cru):>8.2f}MB{mb(tipado):>8.2f}MB{mb(lido) / mb(tipado):>8.1f}x"
+              f"   (tipar {dt * 1000:.0f} ms)")
+    con.close()
+    print(f"\nLeituras de uma sessão: {sessao[0]:.2f} MB → {sessao[1]:.2f} MB "
+          f"({sessao[0] / sessao[1]:.1f}x)")
+    tipado = tipar(b.ler("SELECT * FROM equipamentos"))
+    print("\nColunas do tipado:")
+    for col, tipo in tipado.dtypes.items():
+        print(f"   {col:<22}{str(tipo):<18}{tipado[col].memory_usage(deep=True) / 2**10:8.0f} KB")
+
+    shutil.rmtree(pasta, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Benchmark e conferência da validação de equipamentos
+(app/services/validacao.py).
+
+  1. regras: linhas montadas à mão, cada uma quebrando uma regra, têm de
+     sair no relatório com a regra certa (e a linha boa, sem nada);
+  2. vazão: repete as linhas da planilha até --linhas e valida em lotes
+     como a importação (banco/importacao.validar_lote), gravando a
+     quarentena e os avisos em CSV;
+  3. a base atual (frota.db) inteira, lida tipada pelo repositório.
+
+Uso (na raiz do projeto):
+    python banco/bench_validacao.py
+    python banco/bench_validacao.py --linhas 500000
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from itertools import cycle, islice
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import validacao                    # noqa: E402
+from app.services.db import _DB_PATH                  # noqa: E402
+from app.services.tipos import tipar                  # noqa: E402
+from app.services.vocabulario import STATUS_OFICIAIS  # noqa: E402
+
+from importacao import (TAMANHO_LOTE, Quarentena, em_lotes,   # noqa: E402
+                        ler_planilha, validar_lote)
+
+BOA = dict(
+    ano=2025, identificacao="ABC1D23", ordem_num_patrimonio="123456",
+    tipo_bem="VEÍCULO", codigo_renavam="00639884962", numero_serie_chassi="9BWZZZ377VT004251",
+    ano_fabricacao=2020, ano_modelo=2021, uso_km="1200",
+    status=STATUS_OFICIAIS[0],
+)
+CASOS = {
+    "identificacao_obrigatorio": dict(identificacao="  "),
+    "ordem_num_patrimonio_obrigatorio": dict(ordem_num_patrimonio=""),
+    "justificativa_patrimonio": dict(ordem_num_patrimonio="JUST: "),
+    "ano_fabricacao_faixa": dict(ano_fabricacao=20219, ano_modelo=None),
+    "ano_modelo_faixa": dict(ano_modelo="198", ano_fabricacao=None),
+    "uso_km_faixa": dict(uso_km="-5"),
+    "status_dominio": dict(status="Ativo"),
+    "ano_modelo_coerente": dict(ano_modelo=2018),
+    "codigo_renavam_formato": dict(codigo_renavam="00639884961"),
+    "numero_serie_chassi_formato": dict(numero_serie_chassi="9BWZZZ377VT00425I"),
+}
+# o que não pode dar nada
+LIVRES = [
+    dict(ano=2024, status="Ativo", ordem_num_patrimonio=None),       # regras de 2025
+    dict(tipo_bem="EQUIPAMENTO", numero_serie_chassi="123"),         # chassi só de veículo
+    dict(codigo_renavam="639884962.0"),                              # 9 dígitos + ".0" do Excel
+    dict(codigo_renavam="Não se aplica", numero_serie_chassi="não se aplica"),
+    dict(uso_km="1200,5"),
+]
+
+falhas = []
+
+
+def checar(nome: str, ok: bool) -> None:
+    print(("✅ " if ok else "❌ ") + nome)
+    if not ok:
+        falhas.append(nome)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--planilha", type=Path, default=Path(__file__).parent / "ve.xlsx")
+    ap.add_argument("--linhas", type=int, default=100_000)
+    args = ap.parse_args()
+
+    # 1. regras
+    linhas = [BOA] + [{**BOA, **m} for m in CASOS.values()] + [{**BOA, **m} for m in LIVRES]
+    rel = validacao.validar(pd.DataFrame(linhas))
+    regras = rel.groupby("linha")["regra"].apply(set).to_dict()
+    checar("linha boa passa sem erro nem aviso", 0 not in regras)
+    for i, esperada in enumerate(CASOS, start=1):
+        checar(f"{esperada}: pego", regras.get(i) == {esperada})
+    for i, m in enumerate(LIVRES, start=1 + len(CASOS)):
+        checar(f"sem falso positivo em {m}", i not in regras)
+
+    # 2. vazão em lotes, como a importação
+    t0 = time.perf_counter()
+    base = list(ler_planilha(args.planilha, ano=2024))
+    leitura = time.perf_counter() - t0
+    pasta = Path(tempfile.mkdtemp())
+    entrada = [{**l, "_linha": n} for n, l in enumerate(islice(cycle(base), args.linhas), 1)]
+    rejeitos = Quarentena(pasta / "rejeitados.csv")
+    alertas = Quarentena(pasta / "avisos.csv")
+    t0 = time.perf_counter()
+    validas = sum(len(validar_lote(lote, rejeitos, alertas))
+                  for lote in em_lotes(entrada, TAMANHO_LOTE))
+    dt = time.perf_counter() - t0
+    rejeitos.fechar()
+    alertas.fechar()
+    print(f"\n{len(base)} linhas da planilha lidas em {leitura:.1f}s; repetidas até {len(entrada):,}")
+    print(f"Validação em lotes de {TAMANHO_LOTE}: {dt:.2f}s = {len(entrada) / dt:,.0f} linhas/s")
+    print(f"   {validas:,} válidas, {rejeitos.total:,} na quarentena, {alertas.total:,} com aviso")
+    relatorio = pd.read_csv(pasta / "rejeitados.csv") if rejeitos.total else pd.DataFrame()
+    checar("quarentena tem uma linha por linha recusada, com o nº da planilha e o motivo",
+           len(relatorio) == rejeitos.total and validas + rejeitos.total == len(entrada)
+           and (relatorio.empty or relatorio["erro"].notna().all()))
+    if not relatorio.empty:
+        print(relatorio["erro"].value_counts().head().to_string())
+
+    # 3. a base atual
+    con = sqlite3.connect(f"file:{args.banco}?mode=ro", uri=True)
+    df = tipar(pd.read_sql("SELECT * FROM equipamentos", con))
+    con.close()
+    t0 = time.perf_counter()
+    rel = validacao.validar(df)
+    print(f"\nfrota.db: {len(df)} linhas em {(time.perf_counter() - t0) * 1000:.0f} ms")
+    print(rel.groupby(["nivel", "regra"]).size().to_string())
+
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Teste de carga da campanha 2025: N usuários de setores diferentes
+salvando lotes ao mesmo tempo enquanto outros leem a home/veículos.
+
+Uso (na raiz do projeto):
+    python banco/carga.py --usuarios 30 --lotes 5 --itens 40 --leitores 10
+
+Por padrão roda numa CÓPIA temporária de app/database/frota.db.
+"""
+import argparse
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import db                                   # noqa: E402
+from app.services.escrita import com_retentativa, executar_escrita   # noqa: E402
+from app.services.equipamentos import inserir_itens_2025      # noqa: E402
+
+SQL_HOME = """
+    SELECT e.*, s.nome AS setor_nome, s.sigla AS setor_sigla
+      FROM equipamentos e JOIN setor s ON s.codigo = e.centro_custo_uc
+     WHERE e.centro_custo_uc = ?
+"""
+SQL_VEICULOS = """
+    SELECT * FROM equipamentos WHERE codigo IN (
+        SELECT equipamento_codigo FROM historico_atualizacoes WHERE usuario_id = ?)
+"""
+
+
+def item_falso(usuario: int, lote: int, n: int) -> dict:
+    return dict(
+        identificacao=f"CARGA-{usuario}-{lote}-{n}", codigo_renavam="Não se aplica",
+        numero_serie_chassi="Não se aplica", ordem_num_patrimonio=str(n),
+        fabricante="Teste", modelo="Carga", tipo_bem="", subtipo_bem="",
+        proprietario="", tipo_propriedade="", tipo_acoplamento="Não se aplica",
+        motorizacao="Não se aplica", controle_desempenho="Não se aplica", uso_km="0",
+        tipo_combustivel="", status="", cor="Não informado", campos_adicionais="",
+        observacoes="", ano_fabricacao="", ano_modelo="",
+    )
+
+
+def preparar_usuarios(banco: Path, n: int) -> list[tuple[int, int]]:
+    """Cria n usuários de teste, cada um num setor diferente."""
+    con = sqlite3.connect(banco)
+    setores = [r[0] for r in con.execute("SELECT codigo FROM setor ORDER BY codigo")]
+    pares = []
+    for i in range(n):
+        setor = setores[i % len(setores)]
+        cur = con.execute(
+            "INSERT INTO usuario (username, nome, email, senha, setor_codigo, tipo_usuario) "
+            "VALUES (?, ?, ?, 'x', ?, 'comum')",
+            (f"carga_{i}_{time.time_ns()}", f"Carga {i}", f"carga{i}@teste", setor),
+        )
+        pares.append((cur.lastrowid, setor))
+    con.commit()
+    con.close()
+    return pares
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--usuarios", type=int, default=20)
+    ap.add_argument("--lotes", type=int, default=5, help="lotes salvos por usuário")
+    ap.add_argument("--itens", type=int, default=20, help="itens por lote")
+    ap.add_argument("--leitores", type=int, default=5)
+    ap.add_argument("--banco", type=Path, help="banco alvo (padrão: cópia temporária)")
+    ap.add_argument("--sem-fila", action="store_true",
+                    help="cada usuário grava direto na própria conexão (comparação)")
+    args = ap.parse_args()
+
+    if args.banco is None:
+        tmp = Path(tempfile.mkdtemp()) / "frota_carga.db"
+        shutil.copy(db._DB_PATH, tmp)
+        args.banco = tmp
+    print(f"Banco: {args.banco}")
+
+    pares = preparar_usuarios(args.banco, args.usuarios)
+    latencias_escrita, latencias_leitura, erros = [], [], []
+    lock = threading.Lock()
+    fim_escrita = threading.Event()
+
+    def escritor(uid: int, setor: int):
+        for lote in range(args.lotes):
+            itens = [item_falso(uid, lote, n) for n in range(args.itens)]
+            t0 = time.perf_counter()
+            try:
+                if args.sem_fila:
+                    con = db.get_connection(args.banco)
+
+                    def gravar():
+                        with con:
+                            inserir_itens_2025(con, setor, uid, itens)
+                    com_retentativa(gravar)
+                else:
+                    executar_escrita(inserir_itens_2025, setor, uid, itens,
+                                     db_path=args.banco)
+            except Exception as exc:
+                with lock:
+                    erros.append(f"escrita {uid}/{lote}: {exc}")
+                continue
+            with lock:
+                latencias_escrita.append(time.perf_counter() - t0)
+
+    def leitor(uid: int, setor: int):
+        con = db.get_connection(args.banco)
+        while not fim_escrita.is_set():
+            t0 = time.perf_counter()
+            try:
+                con.execute(SQL_HOME, (setor,)).fetchall()
+                con.execute(SQL_VEICULOS, (uid,)).fetchall()
+            except Exception as exc:
+                with lock:
+                    erros.append(f"leitura {uid}: {exc}")
+                continue
+            with lock:
+                latencias_leitura.append(time.perf_counter() - t0)
+
+    escritores = [threading.Thread(target=escritor, args=p) for p in pares]
+    leitores = [threading.Thread(target=leitor, args=pares[i % len(pares)])
+                for i in range(args.leitores)]
+
+    t0 = time.perf_counter()
+    for t in leitores + escritores:
+        t.start()
+    for t in escritores:
+        t.join()
+    duracao = time.perf_counter() - t0
+    fim_escrita.set()
+    for t in leitores:
+        t.join()
+
+    esperado = args.usuarios * args.lotes * args.itens
+    con = sqlite3.connect(args.banco)
+    gravados = con.execute(
+        "SELECT COUNT(*) FROM equipamentos WHERE identificacao LIKE 'CARGA-%'"
+    ).fetchone()[0]
+    logs = con.execute(
+        "SELECT COUNT(*) FROM historico_atualizacoes h JOIN equipamentos e "
+        "ON e.codigo = h.equipamento_codigo WHERE e.identificacao LIKE 'CARGA-%'"
+    ).fetchone()[0]
+    con.close()
+
+    def resumo(lat):
+        if not lat:
+            return "-"
+        lat = sorted(lat)
+        p95 = lat[int(len(lat) * 0.95) - 1] if len(lat) > 1 else lat[0]
+        return f"n={len(lat)} p50={statistics.median(lat)*1000:.1f}ms p95={p95*1000:.1f}ms"
+
+    print(f"Modo: {'direto' if args.sem_fila else 'fila de escrita'}")
+    print(f"Duração: {duracao:.2f}s  ({gravados / duracao:.0f} itens/s)")
+    print(f"Escritas: {resumo(latencias_escrita)}")
+    print(f"Leituras: {resumo(latencias_leitura)}")
+    print(f"Itens gravados: {gravados}/{esperado}  logs: {logs}/{esperado}")
+    print(f"Erros: {len(erros)}")
+    for e in erros[:10]:
+        print("  ", e)
+    sys.exit(0 if gravados == esperado == logs and not erros else 1)
+
+
+if __name__ == "__main__":
+    main()
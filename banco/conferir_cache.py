@@ -0,0 +1,130 @@
+"""Confere o cache de consultas (app/services/cache.py).
+
+  - a segunda leitura igual é acerto e devolve o mesmo resultado;
+  - escrita pela aplicação (repositorio) invalida na hora só as consultas
+    das tabelas escritas;
+  - escrita por fora (outra conexão, como a importação) invalida após
+    no máximo cache.VERIFICAR_S;
+  - TTL e limite de entradas (LRU);
+  - tempo de uma página lida do banco × do cache.
+
+Uso (na raiz do projeto):
+    python banco/conferir_cache.py
+
+Roda numa CÓPIA temporária de app/database/frota.db.
+"""
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import backend, cache, repositorio   # noqa: E402
+from app.services.db import _DB_PATH                    # noqa: E402
+
+falhas = []
+
+
+def checar(nome: str, ok: bool) -> None:
+    print(("✅ " if ok else "❌ ") + nome)
+    if not ok:
+        falhas.append(nome)
+
+
+def acertos(func: str) -> int:
+    return cache.stats()["por_funcao"].get(func, {}).get("acertos", 0)
+
+
+def medir(func, *args, vezes: int = 20) -> float:
+    t0 = time.perf_counter()
+    for _ in range(vezes):
+        func(*args)
+    return (time.perf_counter() - t0) / vezes
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    args = ap.parse_args()
+
+    pasta = Path(tempfile.mkdtemp())
+    shutil.copy(args.banco, pasta / "frota.db")
+    b = backend.BackendSqlite(pasta / "frota.db")
+    backend.definir(b)
+    b.migrar(log=lambda _: None)
+    setor = b.linhas("SELECT centro_custo_uc FROM equipamentos GROUP BY 1 "
+                     "ORDER BY COUNT(*) DESC LIMIT 1")[0][0]
+
+    # acerto
+    df1 = repositorio.tabela_setor(setor)
+    df2 = repositorio.tabela_setor(setor)
+    checar("segunda leitura é acerto", df2 is df1 and acertos("tabela_setor") == 1)
+    usuarios = repositorio.listar_usuarios()
+
+    # escrita pela aplicação: setor muda, equipamentos não
+    cod = b.linhas("SELECT MIN(codigo) FROM setor")[0][0]
+    nome = repositorio.nome_setor(cod)
+    repositorio.atualizar_setor(cod, nome + " (cache)", "CCH", "")
+    checar("atualizar_setor invalida nome_setor",
+           repositorio.nome_setor(cod) == nome + " (cache)")
+    checar("atualizar_setor invalida listar_usuarios (lê setor)",
+           repositorio.listar_usuarios() is not usuarios)
+    checar("tabela_setor continua no cache", repositorio.tabela_setor(setor) is df1)
+
+    # escrita por fora: outra conexão, sem passar pelo repositório
+    con = sqlite3.connect(pasta / "frota.db")
+    con.execute("UPDATE equipamentos SET status = status WHERE centro_custo_uc = ?", (setor,))
+    con.commit()
+    con.close()
+    time.sleep(cache.VERIFICAR_S + 0.1)
+    checar("escrita de outro processo invalida", repositorio.tabela_setor(setor) is not df1)
+
+    # setor_por_nome lê também os nomes antigos da consolidação
+    antigo = "Nome Antigo (conferência do cache)"
+    checar("nome antigo ainda sem setor", repositorio.setor_por_nome(antigo) is None)
+    con = sqlite3.connect(pasta / "frota.db")
+    con.execute("INSERT INTO centro_custo_legado (nome, setor_codigo) VALUES (?, ?)",
+                (antigo, setor))
+    con.commit()
+    con.close()
+    time.sleep(cache.VERIFICAR_S + 0.1)
+    checar("centro_custo_legado novo invalida setor_por_nome",
+           repositorio.setor_por_nome(antigo) == setor)
+
+    # TTL
+    ttl = cache.em_cache("setor", ttl=0.2)(repositorio.listar_setores.sem_cache)
+    a = ttl()
+    checar("antes do TTL é acerto", ttl() is a)
+    time.sleep(0.3)
+    checar("depois do TTL recarrega", ttl() is not a)
+
+    # LRU
+    antigo = cache.MAX_ENTRADAS
+    cache.limpar()
+    cache.MAX_ENTRADAS = 3
+    for s in b.linhas("SELECT codigo FROM setor ORDER BY codigo LIMIT 5"):
+        repositorio.nome_setor(s[0])
+    checar("LRU respeita o limite de entradas", cache.stats()["entradas"] == 3)
+    cache.MAX_ENTRADAS = antigo
+
+    # tempo
+    cache.limpar()
+    banco = medir(repositorio.equipamentos_ano.sem_cache, 2024)
+    repositorio.equipamentos_ano(2024)
+    em_cache = medir(repositorio.equipamentos_ano, 2024)
+    print(f"equipamentos_ano(2024): banco {banco * 1000:.1f} ms, cache {em_cache * 1000:.3f} ms")
+
+    s = cache.stats()
+    print(f"Acertos {s['acertos']}, falhas {s['falhas']}, {s['entradas']} entradas, "
+          f"{s['bytes'] / 2**20:.1f} MB")
+    shutil.rmtree(pasta, ignore_errors=True)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
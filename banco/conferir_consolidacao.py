@@ -0,0 +1,132 @@
+"""Confere a consolidação do veiculos.db no frota.db (app/services/consolidacao.py).
+
+  - toda linha de frota/frota_2025 fica consolidada ou com pendência;
+  - linha que já existe em equipamentos é vinculada, a que falta é inserida;
+  - rodar de novo não muda nada (nem equipamentos, nem vínculos);
+  - nenhuma linha de equipamentos recebe duas linhas de origem;
+  - os serviços antigos respondem a partir do frota.db.
+
+Uso (na raiz do projeto):
+    python banco/conferir_consolidacao.py
+
+Roda em CÓPIAS temporárias de app/database/frota.db e veiculos.db.
+"""
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import backend, consolidacao               # noqa: E402
+from app.services.db import _DB_PATH, VEICULOS_DB_PATH      # noqa: E402
+
+falhas = []
+APAGAR = 25          # linhas 2024 tiradas da cópia para a consolidação recriar
+
+
+def checar(nome: str, ok: bool) -> None:
+    print(("✅ " if ok else "❌ ") + nome)
+    if not ok:
+        falhas.append(nome)
+
+
+def contagens(caminho: Path) -> tuple:
+    con = sqlite3.connect(caminho)
+    try:
+        return con.execute("""
+            SELECT (SELECT COUNT(*) FROM equipamentos), (SELECT COUNT(*) FROM consolidacao),
+                   (SELECT COUNT(*) FROM estrutura), (SELECT COUNT(*) FROM centro_custo_legado),
+                   (SELECT COUNT(*) FROM dimensao_frota_2024)
+        """).fetchone()
+    finally:
+        con.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--veiculos", type=Path, default=VEICULOS_DB_PATH)
+    args = ap.parse_args()
+
+    pasta = Path(tempfile.mkdtemp())
+    frota, veiculos = pasta / "frota.db", pasta / "veiculos.db"
+    shutil.copy(args.banco, frota)
+    shutil.copy(args.veiculos, veiculos)
+
+    # tira da cópia algumas linhas 2024 da frota antiga (sem histórico)
+    con = sqlite3.connect(frota)
+    con.execute(f"ATTACH DATABASE '{veiculos}' AS legado")
+    apagadas = [r[0] for r in con.execute("""
+        SELECT e.codigo FROM equipamentos e JOIN setor s ON s.codigo = e.centro_custo_uc
+         WHERE e.ano = 2024
+           AND NOT EXISTS (SELECT 1 FROM historico_atualizacoes h WHERE h.equipamento_codigo = e.codigo)
+           AND e.identificacao IN (SELECT identificacao FROM legado.frota f WHERE f.centro_custo = s.nome
+                                    GROUP BY identificacao HAVING COUNT(*) = 1)
+         ORDER BY e.codigo LIMIT ?""", (APAGAR,))]
+    con.execute(f"DELETE FROM equipamentos WHERE codigo IN ({','.join('?' * len(apagadas))})", apagadas)
+    con.commit()
+    legado = {t: con.execute(f"SELECT COUNT(*) FROM legado.{t}").fetchone()[0]
+              for t in consolidacao.EQUIPAMENTOS}
+    con.close()
+
+    r1 = consolidacao.consolidar(frota, veiculos, log=lambda _: None)
+    depois1 = contagens(frota)
+    print(r1["frota"], r1["frota_2025"])
+    checar("as linhas apagadas da frota 2024 voltam como inseridas",
+           r1["frota"]["inseridas"] == len(apagadas))
+
+    con = sqlite3.connect(frota)
+    for tabela, total in legado.items():
+        tratadas = con.execute("""
+            SELECT COUNT(*) FROM consolidacao WHERE origem = ?""", (tabela,)).fetchone()[0]
+        sem_setor = con.execute("""
+            SELECT COUNT(*) FROM consolidacao_pendencias WHERE origem = ? AND coluna = 'setor'""",
+                                (tabela,)).fetchone()[0]
+        checar(f"{tabela}: {tratadas} consolidadas + {sem_setor} pendentes = {total} lidas",
+               tratadas + sem_setor == total)
+    repetidos = con.execute("""
+        SELECT COUNT(*) FROM (SELECT destino_id FROM consolidacao WHERE destino = 'equipamentos'
+                               GROUP BY destino_id HAVING COUNT(*) > 1)""").fetchone()[0]
+    checar("nenhum equipamento com duas linhas de origem", repetidos == 0)
+    tipos = con.execute("""
+        SELECT COUNT(*) FROM equipamentos
+         WHERE typeof(ano_fabricacao) NOT IN ('integer', 'null')
+            OR typeof(uso_km) NOT IN ('integer', 'real', 'null')""").fetchone()[0]
+    checar("anos e uso_km tipados em equipamentos", tipos == 0)
+    con.close()
+
+    r2 = consolidacao.consolidar(frota, veiculos, log=lambda _: None)
+    checar("segunda rodada não insere nem vincula nada",
+           all(r.get("inseridas", 0) == 0 and r.get("vinculadas", 0) == 0
+               for t, r in r2.items() if t != "correspondentes"))
+    checar("segunda rodada deixa as tabelas iguais", contagens(frota) == depois1)
+
+    backend.definir(backend.BackendSqlite(frota))
+    from app.services import frota_2025_service, frota_service
+    con = sqlite3.connect(frota)
+    codigo, nome = con.execute("""
+        SELECT s.codigo, s.nome FROM equipamentos e JOIN setor s ON s.codigo = e.centro_custo_uc
+         WHERE e.ano = 2024 GROUP BY s.codigo ORDER BY COUNT(*) DESC LIMIT 1""").fetchone()
+    esperado = con.execute("SELECT COUNT(*) FROM equipamentos WHERE ano=2024 AND centro_custo_uc=?",
+                           (codigo,)).fetchone()[0]
+    con.close()
+    linhas, colunas = frota_service.get_veiculos_by_setor(nome)
+    checar(f"frota_service pelo nome '{nome}' lê do frota.db",
+           len(linhas) == esperado and "numero_serie_chassi" in colunas)
+    checar("frota_service pelo código dá o mesmo",
+           [l[0] for l in frota_service.get_veiculos_by_setor(codigo)[0]] == [l[0] for l in linhas])
+    checar("frota_2025_service responde (linhas, colunas)",
+           isinstance(frota_2025_service.get_veiculos_by_setor_ano(1), tuple))
+    checar("setor desconhecido devolve vazio",
+           frota_service.get_veiculos_by_setor("NÃO EXISTE") == ([], []))
+
+    shutil.rmtree(pasta, ignore_errors=True)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Confere as exportações em segundo plano (app/services/exportacao.py).
+
+  - o pedido volta na hora e a tarefa termina sozinha, com progresso;
+  - o mesmo pedido (mesmas abas, mesma versão dos dados) de outro usuário
+    reaproveita o arquivo; depois de uma escrita em equipamentos, gera outro;
+  - o arquivo vencido é apagado e a tarefa fica 'expirada';
+  - um erro na geração fica registrado na tarefa;
+  - recuperar_orfas() encerra só a tarefa sem sinal de vida há mais de
+    ORFA, não a de outro processo que segue rodando; um pedido igual a
+    uma tarefa parada gera outra em vez de segui-la.
+
+Uso (na raiz do projeto):
+    python banco/conferir_exportacoes.py
+
+Roda numa CÓPIA temporária de app/database/frota.db.
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import backend, exportacao, repositorio   # noqa: E402
+from app.services.db import _DB_PATH                          # noqa: E402
+
+falhas = []
+
+
+def checar(nome: str, ok: bool) -> None:
+    print(("✅ " if ok else "❌ ") + nome)
+    if not ok:
+        falhas.append(nome)
+
+
+def tarefa(b, tid: int) -> dict:
+    df = b.ler("SELECT * FROM exportacoes WHERE id=?", (tid,))
+    return df.iloc[0].to_dict()
+
+
+def esperar(b, tid: int, limite_s: float = 120) -> tuple[dict, list[float]]:
+    progresso, fim = [], time.monotonic() + limite_s
+    while time.monotonic() < fim:
+        t = tarefa(b, tid)
+        progresso.append(t["progresso"])
+        if t["status"] not in ("fila", "rodando"):
+            return t, progresso
+        time.sleep(0.05)
+    return tarefa(b, tid), progresso
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    args = ap.parse_args()
+
+    pasta = Path(tempfile.mkdtemp())
+    shutil.copy(args.banco, pasta / "frota.db")
+    exportacao.PASTA = pasta / "exportacoes"
+    b = backend.BackendSqlite(pasta / "frota.db")
+    backend.definir(b)
+    b.migrar(log=lambda _: None)
+    u1, u2 = [r[0] for r in b.linhas("SELECT id FROM usuario ORDER BY id LIMIT 2")]
+    abas = {"equipamentos_2024": exportacao.consulta_ano(2024),
+            "equipamentos_2025": exportacao.consulta_ano(2025)}
+
+    t0 = time.perf_counter()
+    t1 = exportacao.solicitar(u1, abas, "completo.xlsx")
+    print(f"Pedido registrado em {(time.perf_counter() - t0) * 1000:.0f} ms")
+    r1, progresso = esperar(b, t1)
+    print(f"Gerado em {time.perf_counter() - t0:.1f}s; progresso visto: "
+          f"{sorted(set(round(p, 2) for p in progresso))}")
+    esperado = b.linhas("SELECT COUNT(*) FROM equipamentos WHERE ano IN (2024, 2025)")[0][0]
+    checar("tarefa termina pronta com todas as linhas",
+           r1["status"] == "pronto" and r1["linhas"] == esperado and Path(r1["arquivo"]).exists())
+    checar("progresso só avança", progresso == sorted(progresso))
+    checar("o mesmo usuário pedindo de novo recebe a mesma tarefa",
+           exportacao.solicitar(u1, abas, "completo.xlsx") == t1)
+
+    t2 = exportacao.solicitar(u2, abas, "completo.xlsx")
+    r2 = tarefa(b, t2)
+    checar("outro usuário reaproveita o arquivo pronto",
+           t2 != t1 and r2["status"] == "pronto" and r2["arquivo"] == r1["arquivo"])
+    checar("'minhas' lista a tarefa do usuário", t2 in exportacao.minhas(u2)["id"].tolist())
+
+    # escrita em equipamentos: versão nova, arquivo novo
+    setor, ano = b.linhas("SELECT centro_custo_uc, ano FROM equipamentos WHERE ano=2024 LIMIT 1")[0]
+    antes, _ = repositorio.pagina_equipamentos({"setor": setor, "ano": ano})
+    depois = antes.copy()
+    depois.loc[depois.index[0], "cor"] = "Conferida"
+    repositorio.atualizar_equipamentos(antes, depois, u1)
+    t3 = exportacao.solicitar(u2, abas, "completo.xlsx")
+    r3, _ = esperar(b, t3)
+    checar("após escrita em equipamentos gera outro arquivo",
+           r3["status"] == "pronto" and r3["arquivo"] != r1["arquivo"])
+
+    # dois pedidos iguais seguidos, o primeiro ainda na fila/rodando
+    t4 = exportacao.solicitar(u1, {"so_2024": exportacao.consulta_ano(2024)}, "2024.xlsx")
+    t5 = exportacao.solicitar(u2, {"so_2024": exportacao.consulta_ano(2024)}, "2024.xlsx")
+    r4, _ = esperar(b, t4)
+    r5, _ = esperar(b, t5)
+    checar("pedido igual em andamento é acompanhado, não repetido",
+           r5["status"] == "pronto" and r5["arquivo"] == r4["arquivo"]
+           and len(list(exportacao.PASTA.glob(f"{t5}.xlsx"))) == 0)
+
+    # outro formato é outra tarefa
+    t7 = exportacao.solicitar(u1, abas, "completo.parquet", "parquet")
+    r7, _ = esperar(b, t7)
+    checar("Parquet gera arquivo próprio com as mesmas linhas",
+           r7["status"] == "pronto" and r7["arquivo"].endswith(".parquet")
+           and r7["linhas"] == esperado)
+
+    # expiração
+    b.escrever(lambda con: con.execute(
+        "UPDATE exportacoes SET expira_em='2000-01-01T00:00:00' WHERE arquivo=?", (r1["arquivo"],)))
+    exportacao.limpar_expiradas()
+    checar("arquivo vencido é apagado",
+           not Path(r1["arquivo"]).exists() and tarefa(b, t1)["status"] == "expirada"
+           and tarefa(b, t2)["status"] == "expirada")
+
+    # erro
+    t6 = exportacao.solicitar(u1, {"ruim": ("SELECT * FROM nao_existe", ())}, "ruim.xlsx")
+    r6, _ = esperar(b, t6)
+    checar("erro fica registrado", r6["status"] == "erro" and "nao_existe" in r6["erro"])
+
+    # órfãs: uma parada desde antes de ORFA, outra com sinal de vida recente
+    def rodando(con, quando: str) -> int:
+        return con.execute(
+            "INSERT INTO exportacoes (usuario_id, chave, versao, nome, status, criado_em, "
+            "atualizado_em) VALUES (?, 'x', 0, 'x.xlsx', 'rodando', ?, ?) RETURNING id",
+            (u1, quando, quando)).fetchone()[0]
+    parada = b.escrever(rodando, exportacao._agora(-2 * exportacao.ORFA))
+    viva = b.escrever(rodando, exportacao._agora())
+    checar("recuperar_orfas() encerra só a tarefa parada",
+           exportacao.recuperar_orfas() == 1
+           and tarefa(b, parada)["status"] == "erro" and tarefa(b, parada)["erro"] == "interrompida"
+           and tarefa(b, viva)["status"] == "rodando")
+
+    # tarefa parada depois da subida: solicitar() não a segue, gera outra
+    abas9 = {"so_2025": exportacao.consulta_ano(2025)}
+    b.escrever(lambda con: con.execute(
+        "INSERT INTO exportacoes (usuario_id, chave, versao, nome, status, criado_em, "
+        "atualizado_em) VALUES (?, ?, ?, 'x.xlsx', 'rodando', ?, ?)",
+        (u1, exportacao.chave(abas9), repositorio.versao_dados("equipamentos"),
+         exportacao._agora(-2 * exportacao.ORFA), exportacao._agora(-2 * exportacao.ORFA))))
+    r9, _ = esperar(b, exportacao.solicitar(u1, abas9, "2025.xlsx"))
+    checar("pedido igual a uma tarefa parada gera outra", r9["status"] == "pronto")
+
+    shutil.rmtree(pasta, ignore_errors=True)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
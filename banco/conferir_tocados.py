@@ -0,0 +1,100 @@
+"""Confere a consulta "equipamentos tocados pelo usuário" com histórico grande.
+
+Cria um usuário com --historico linhas de histórico (padrão 100 mil)
+espalhadas por --equipamentos equipamentos novos, e compara:
+  - a consulta antiga: busca os códigos e monta IN (?,?,...) com um
+    parâmetro por código (falha acima do limite de variáveis do SQLite,
+    32766 no padrão; alguns builds sobem para 250000);
+  - consultas.EQUIP_DO_USUARIO: uma semijunção indexada.
+
+Uso (na raiz do projeto):
+    python banco/conferir_tocados.py
+    python banco/conferir_tocados.py --historico 200000 --equipamentos 50000
+
+Roda numa CÓPIA temporária de app/database/frota.db.
+"""
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import backend, consultas, indices, repositorio   # noqa: E402
+from app.services.db import _DB_PATH                                # noqa: E402
+
+
+def consulta_antiga(con, uid: int) -> int:
+    codes = [r[0] for r in con.execute(
+        "SELECT DISTINCT equipamento_codigo FROM historico_atualizacoes WHERE usuario_id = ?",
+        (uid,)).fetchall()]
+    placeholders = ",".join("?" for _ in codes)
+    return len(con.execute(f"SELECT * FROM equipamentos WHERE codigo IN ({placeholders})",
+                           codes).fetchall())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--historico", type=int, default=100_000)
+    ap.add_argument("--equipamentos", type=int, default=40_000)
+    args = ap.parse_args()
+
+    pasta = Path(tempfile.mkdtemp())
+    shutil.copy(args.banco, pasta / "frota.db")
+    b = backend.BackendSqlite(pasta / "frota.db")
+    backend.definir(b)
+    b.migrar(log=lambda _: None)
+
+    def semear(con):
+        setor = con.execute("SELECT MIN(codigo) FROM setor").fetchone()[0]
+        uid = con.execute(
+            "INSERT INTO usuario (username, nome, email, senha, setor_codigo, tipo_usuario) "
+            "VALUES ('tocados', 'Histórico grande', 't@t', 'x', ?, 'comum') RETURNING id",
+            (setor,)).fetchone()[0]
+        inicio = con.execute("SELECT COALESCE(MAX(codigo), 0) FROM equipamentos").fetchone()[0] + 1
+        con.executemany(
+            "INSERT INTO equipamentos (codigo, ano, centro_custo_uc, identificacao) VALUES (?, 2025, ?, ?)",
+            ((inicio + i, setor, f"TOCADO-{i}") for i in range(args.equipamentos)))
+        con.executemany(
+            "INSERT INTO historico_atualizacoes (usuario_id, equipamento_codigo, acao, detalhes) "
+            "VALUES (?, ?, 'edicao', '')",
+            ((uid, inicio + i % args.equipamentos) for i in range(args.historico)))
+        return uid
+
+    t0 = time.perf_counter()
+    uid = b.escrever(semear)
+    print(f"Semeado: {args.historico} linhas de histórico, {args.equipamentos} equipamentos "
+          f"({time.perf_counter() - t0:.1f}s)")
+
+    con = sqlite3.connect(pasta / "frota.db")
+    print("Plano:", " | ".join(indices.plano(con, consultas.EQUIP_DO_USUARIO)))
+    print("Limite de variáveis deste SQLite:", con.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER))
+
+    t0 = time.perf_counter()
+    try:
+        n = consulta_antiga(con, uid)
+        print(f"Antiga (IN dinâmico): {n} linhas em {time.perf_counter() - t0:.3f}s")
+    except sqlite3.OperationalError as exc:
+        print(f"Antiga (IN dinâmico): falhou — {exc}")
+
+    t0 = time.perf_counter()
+    n = len(con.execute(consultas.EQUIP_DO_USUARIO, (uid,)).fetchall())
+    print(f"Nova (semijunção):    {n} linhas em {time.perf_counter() - t0:.3f}s")
+
+    # e pelo repositório, como a página chama
+    df = repositorio.equipamentos_do_usuario(uid)
+
+    ok = len(df) == args.equipamentos and df["codigo"].is_unique
+    con.close()
+    shutil.rmtree(pasta, ignore_errors=True)
+    print("✅ Resultado confere." if ok else "❌ Resultado não confere.")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
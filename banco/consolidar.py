@@ -0,0 +1,43 @@
+"""Consolida o veiculos.db (planilhas antigas) no frota.db.
+
+Mapeia frota/frota_2025 para equipamentos e as tabelas de referência
+para as tabelas tipadas do frota.db (ver app/services/consolidacao.py).
+Pode rodar quantas vezes quiser: o que já foi consolidado não é repetido.
+
+Uso (na raiz do projeto):
+    python banco/consolidar.py
+    python banco/consolidar.py --pendencias pendencias.csv
+    python banco/consolidar.py --banco outro.db --veiculos outro_veiculos.db
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import consolidacao                   # noqa: E402
+from app.services.db import _DB_PATH, VEICULOS_DB_PATH  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--veiculos", type=Path, default=VEICULOS_DB_PATH)
+    ap.add_argument("--pendencias", type=Path, help="CSV com o que não foi mapeado")
+    args = ap.parse_args()
+
+    consolidacao.consolidar(args.banco, args.veiculos)
+    pend = consolidacao.pendencias(args.banco)
+    if pend.empty:
+        print("✅ Tudo consolidado.")
+        return
+    print(f"🚨 {len(pend)} pendências:")
+    print(pend.groupby(["origem", "coluna", "motivo"]).size().to_string())
+    if args.pendencias:
+        pend.to_csv(args.pendencias, index=False)
+        print(f"   → {args.pendencias}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Varredura de prováveis duplicados em equipamentos (app/services/duplicados.py).
+
+Atualiza chaves_equipamento (as cargas por planilha gravam direto em
+equipamentos, sem passar pelo repositório) e agrupa os equipamentos do
+mesmo ano que dividem placa, chassi, RENAVAM ou patrimônio normalizados.
+Junta por hash (ano, tipo de chave, chave), sem comparar pares: o tempo
+cresce linear com a tabela.
+
+Blocos com mais de --limite equipamentos são valores de preenchimento
+("1111111111", código de modelo no chassi) e saem numa lista à parte.
+
+Uso (na raiz do projeto):
+    python banco/duplicados.py                          # backend configurado (FROTA_BACKEND)
+    python banco/duplicados.py --banco outro.db --ano 2025
+    python banco/duplicados.py --csv duplicados.csv     # um equipamento por linha, com o grupo
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import backend, duplicados   # noqa: E402
+
+DETALHES = """
+    SELECT e.codigo, e.centro_custo_uc, s.nome AS setor_nome, e.identificacao, e.tipo_bem,
+           e.modelo, e.codigo_renavam, e.numero_serie_chassi, e.ordem_num_patrimonio
+      FROM equipamentos e
+      LEFT JOIN setor s ON s.codigo = e.centro_custo_uc
+"""
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, help="arquivo SQLite (padrão: backend configurado)")
+    ap.add_argument("--ano", type=int, help="só um ano")
+    ap.add_argument("--limite", type=int, default=duplicados.LIMITE_BLOCO,
+                    help="tamanho máximo de um bloco para contar como duplicidade")
+    ap.add_argument("--csv", type=Path, help="grava os grupos neste arquivo")
+    ap.add_argument("--exemplos", type=int, default=5, help="grupos mostrados na tela")
+    args = ap.parse_args()
+
+    b = backend.BackendSqlite(args.banco) if args.banco else backend.atual()
+    b.migrar(log=print)
+
+    t0 = time.perf_counter()
+    n = b.escrever(duplicados.atualizar_chaves)
+    print(f"✅ chaves_equipamento: {n} linhas atualizadas ({time.perf_counter() - t0:.2f}s)")
+
+    sql = f"SELECT codigo, ano, {', '.join(duplicados.TIPOS)} FROM chaves_equipamento"
+    chaves = b.ler(sql + " WHERE ano = ?", (args.ano,)) if args.ano else b.ler(sql)
+    t0 = time.perf_counter()
+    grupos, ignorados = duplicados.agrupar(chaves, args.limite)
+    dt = time.perf_counter() - t0
+    n_grupos = grupos["grupo"].nunique()
+    print(f"{len(chaves):,} equipamentos varridos em {dt * 1000:.0f} ms: "
+          f"{n_grupos} grupos com {len(grupos)} prováveis duplicados")
+
+    if ignorados.size:
+        print(f"\n🚨 {len(ignorados)} valores repetidos em mais de {args.limite} "
+              "equipamentos (ignorados):")
+        print(ignorados.head(10).to_string(index=False))
+    if grupos.empty:
+        return
+
+    detalhes = grupos.merge(b.ler(DETALHES), on="codigo", how="left")
+    entre_setores = (detalhes.groupby("grupo")["centro_custo_uc"].nunique() > 1).sum()
+    print(f"\nGrupos com equipamentos de setores diferentes: {entre_setores}")
+    print("Chaves em comum:")
+    print(detalhes["em_comum"].value_counts().to_string())
+    for g in detalhes["grupo"].unique()[:args.exemplos]:
+        print()
+        print(detalhes[detalhes["grupo"] == g]
+              .drop(columns=["grupo", "centro_custo_uc"]).to_string(index=False))
+    if args.csv:
+        detalhes.to_csv(args.csv, index=False)
+        print(f"\n✅ {len(detalhes)} linhas em {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
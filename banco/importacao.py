@@ -0,0 +1,448 @@
+"""Pipeline de importação da planilha de frota (ve.xlsx) em streaming.
+
+Lê a planilha linha a linha com openpyxl em modo read-only e grava em
+lotes de tamanho fixo (executemany, uma transação por lote). A memória
+fica constante independente do tamanho do arquivo. Um lote que falha é
+refeito linha a linha; as linhas recusadas vão para um CSV de quarentena
+com o motivo, e o resto da carga segue.
+
+O centro de custo de cada linha é casado com um setor existente pelo
+índice de app/services/correspondencia.py (nome normalizado, CNUC, sigla
+ou aproximado); só o que não casa vira setor novo.
+
+Antes de gravar, cada lote passa pelas regras de app/services/validacao.py
+(as mesmas do formulário e da grade do admin), avaliadas no lote inteiro:
+linha com erro vai para a quarentena com as mensagens, linha com aviso é
+gravada e listada no CSV de avisos.
+
+No fim da carga, chaves_equipamento (app/services/duplicados.py) é posta
+em dia, para a busca de conflitos do formulário já ver as linhas novas.
+
+Usado por banco/sqlite.py e banco/pg.py.
+"""
+import csv
+import io
+import sqlite3
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services import duplicados, validacao            # noqa: E402
+from app.services.backend import _ConexaoPg               # noqa: E402
+from app.services.correspondencia import Correspondencia  # noqa: E402
+
+# Cabeçalho da planilha → coluna do banco
+RENOMEAR = {
+    'Identificação': 'identificacao',
+    'Proprietário': 'proprietario',
+    'Lotação': 'lotacao',
+    'Código (RENAVAM)': 'codigo_renavam',
+    'Número Serie Chassi': 'numero_serie_chassi',
+    'Fabricante': 'fabricante',
+    'Modelo': 'modelo',
+    'Ano Fabricação': 'ano_fabricacao',
+    'Ano Modelo': 'ano_modelo',
+    'Tipo Acoplamento': 'tipo_acoplamento',
+    'Motorização': 'motorizacao',
+    'Tipo de Bem': 'tipo_bem',
+    'Subtipo do Bem': 'subtipo_bem',
+    'Centro de Custo (UC)': 'centro_custo_uc',
+    'Status': 'status',
+    'Controle Desempenho': 'controle_desempenho',
+    'Uso (KM)': 'uso_km',
+    'Campos Adicionais': 'campos_adicionais',
+    'Tipo Propriedade': 'tipo_propriedade',
+    'Tipo Combustível': 'tipo_combustivel',
+    'Data Aquisição': 'data_aquisicao',
+    'Cor': 'cor',
+    'Ordem (Nº Patrimônio)': 'ordem_num_patrimonio',
+    'Observações': 'observacoes',
+}
+
+COLUNAS = [
+    'identificacao', 'proprietario', 'lotacao', 'codigo_renavam',
+    'numero_serie_chassi', 'fabricante', 'modelo', 'ano_fabricacao',
+    'ano_modelo', 'tipo_acoplamento', 'motorizacao', 'tipo_bem',
+    'subtipo_bem', 'centro_custo_uc', 'status', 'controle_desempenho',
+    'uso_km', 'campos_adicionais', 'tipo_propriedade', 'tipo_combustivel',
+    'data_aquisicao', 'cor', 'ordem_num_patrimonio', 'observacoes', 'ano'
+]
+
+SETOR_PADRAO = ("Setor Genérico", "GEN")
+TAMANHO_LOTE = 5000
+
+
+# ------------------------------------------------------------------ #
+# Leitura                                                            #
+# ------------------------------------------------------------------ #
+def ler_planilha(caminho: str | Path, ano: int, linha_cabecalho: int = 2) -> Iterator[dict]:
+    """Gera um dict por linha da planilha, já com os nomes das colunas do banco.
+
+    ``linha_cabecalho`` é 1-based (a ve.xlsx tem um título na linha 1).
+    Células vazias viram None; a chave ``_linha`` guarda o nº da linha.
+    """
+    wb = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        linhas = ws.iter_rows(min_row=linha_cabecalho, values_only=True)
+        cabecalho = [RENOMEAR.get(str(c).strip()) if c is not None else None
+                     for c in next(linhas)]
+        print("Colunas encontradas:", [c for c in cabecalho if c])
+        for n, valores in enumerate(linhas, start=linha_cabecalho + 1):
+            linha = {}
+            for col, v in zip(cabecalho, valores):
+                if col is None:
+                    continue
+                if isinstance(v, str):
+                    v = v.strip() or None
+                elif col == 'centro_custo_uc' and v is not None:
+                    v = _nome_setor(v)         # UC numérica: o setor é pelo nome
+                linha[col] = v
+            if not any(v is not None for v in linha.values()):
+                continue                      # linha em branco
+            linha['ano'] = ano
+            linha['_linha'] = n
+            yield linha
+    finally:
+        wb.close()
+
+
+def em_lotes(linhas: Iterable[dict], tamanho: int) -> Iterator[list[dict]]:
+    it = iter(linhas)
+    while lote := list(islice(it, tamanho)):
+        yield lote
+
+
+# ------------------------------------------------------------------ #
+# Destinos                                                           #
+# ------------------------------------------------------------------ #
+SQL_INSERIR = (f"INSERT INTO {{tabela}} ({', '.join(COLUNAS)}) "
+               f"VALUES ({', '.join(':' + c for c in COLUNAS)})")
+
+
+def _nome_setor(n) -> str:
+    """Nome gravado em setor.nome para o valor da planilha (None: o padrão).
+    Centro de custo numérico (12345 ou 12345.0 do Excel) vira texto."""
+    if n is None:
+        return SETOR_PADRAO[0]
+    if isinstance(n, float) and n.is_integer():
+        n = int(n)
+    return str(n).strip()
+
+
+def _setores_entrada(nomes: Iterable) -> list[tuple[str, str]]:
+    """(nome, sigla) a resolver; None (sem setor) vira o setor padrão."""
+    return [SETOR_PADRAO if n is None else (_nome_setor(n), _nome_setor(n)[:5].upper())
+            for n in nomes]
+
+
+def _correspondidos(destino, nomes: Iterable) -> list:
+    """Resolve pelo índice de correspondência (nome normalizado, CNUC, sigla,
+    aproximado) e devolve só os nomes que ainda precisam do upsert."""
+    novos = []
+    for n in nomes:
+        if n in destino._setores:
+            continue
+        codigo = destino.correspondencia.resolver(n)
+        if codigo is None:
+            novos.append(n)
+        else:
+            destino._setores[n] = codigo
+    return novos
+
+
+class DestinoSqlite:
+    """Grava no frota.db via sqlite3 puro."""
+
+    def __init__(self, con: sqlite3.Connection):
+        self.con = con
+        self.sql = SQL_INSERIR.format(tabela="equipamentos")
+        self._setores: dict[str, int] = {}
+        self.correspondencia = Correspondencia.do_banco(lambda sql: con.execute(sql).fetchall())
+
+    def resolver_setores(self, nomes: Iterable) -> dict:
+        """Setores já conhecidos saem do índice de correspondência; os demais
+        num upsert de uma vez (tabela temporária + INSERT…SELECT ON CONFLICT)
+        e um único JOIN para pegar os códigos."""
+        novos = _correspondidos(self, nomes)
+        if not novos:
+            return self._setores
+        with self.con:
+            self.con.execute("CREATE TEMP TABLE IF NOT EXISTS _setor_entrada (nome TEXT, sigla TEXT)")
+            self.con.execute("DELETE FROM _setor_entrada")
+            self.con.executemany("INSERT INTO _setor_entrada VALUES (?, ?)", _setores_entrada(novos))
+            self.con.execute("""
+                INSERT INTO setor (nome, sigla)
+                SELECT nome, sigla FROM _setor_entrada WHERE true
+                ON CONFLICT (nome) DO NOTHING
+            """)
+            codigos = dict(self.con.execute(
+                "SELECT s.nome, s.codigo FROM setor s JOIN _setor_entrada e ON e.nome = s.nome"
+            ).fetchall())
+        for n in novos:
+            self._setores[n] = codigos[_nome_setor(n)]
+        return self._setores
+
+    def gravar(self, linhas: list[dict]) -> None:
+        with self.con:
+            self.con.executemany(self.sql, linhas)
+
+    def atualizar_chaves(self) -> int:
+        with self.con:
+            return duplicados.atualizar_chaves(self.con)
+
+
+class DestinoPostgres:
+    """Grava em frota.* via SQLAlchemy (executemany por lote)."""
+
+    def __init__(self, engine, schema: str = "frota"):
+        from sqlalchemy import text
+        self.engine = engine
+        self.schema = schema
+        self.sql = text(SQL_INSERIR.format(tabela=f"{schema}.equipamentos"))
+        self.sql_setores = text(f"""
+            WITH entrada (nome, sigla) AS (
+                SELECT * FROM unnest(CAST(:nomes AS text[]), CAST(:siglas AS text[]))
+            ), novos AS (
+                INSERT INTO {schema}.setor (nome, sigla)
+                SELECT nome, sigla FROM entrada
+                ON CONFLICT (nome) DO NOTHING
+                RETURNING nome, codigo
+            )
+            SELECT nome, codigo FROM novos
+            UNION ALL
+            SELECT s.nome, s.codigo FROM {schema}.setor s JOIN entrada e ON e.nome = s.nome
+        """)
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS ux_setor_nome "
+                              f"ON {schema}.setor (nome)"))
+        self._setores: dict[str, int] = {}
+
+        def consultar(sql):
+            with engine.begin() as conn:
+                conn.execute(text(f"SET LOCAL search_path TO {schema}"))
+                return conn.execute(text(sql)).fetchall()
+        self.correspondencia = Correspondencia.do_banco(consultar)
+
+    def resolver_setores(self, nomes: Iterable) -> dict:
+        """Índice de correspondência e, para o resto, upsert + leitura dos
+        códigos numa única instrução (CTE com RETURNING)."""
+        novos = _correspondidos(self, nomes)
+        if not novos:
+            return self._setores
+        entrada = _setores_entrada(novos)
+        with self.engine.begin() as conn:
+            codigos = dict(conn.execute(self.sql_setores, {
+                "nomes": [n for n, _ in entrada],
+                "siglas": [s for _, s in entrada],
+            }).fetchall())
+        for n in novos:
+            self._setores[n] = codigos[_nome_setor(n)]
+        return self._setores
+
+    def gravar(self, linhas: list[dict]) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(self.sql, linhas)
+
+    def atualizar_chaves(self) -> int:
+        """chaves_equipamento pela mesma função da aplicação (SQL com "?"),
+        numa conexão crua com o schema no search_path."""
+        raw = self.engine.raw_connection()
+        try:
+            con = _ConexaoPg(raw)
+            con.execute(f"SET LOCAL search_path TO {self.schema}")
+            n = duplicados.atualizar_chaves(con)
+            raw.commit()
+            return n
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+
+class DestinoPostgresCopy(DestinoPostgres):
+    """Grava com COPY FROM STDIN a partir de um CSV montado em memória.
+
+    ``merge=True`` é para reimportar um ano: o lote vai para uma tabela
+    temporária e é mesclado em equipamentos pela chave (ano, identificacao)
+    — atualiza o que já existe e insere o resto. Se a chave se repete no
+    lote, vale a última linha da planilha; ``gravar`` devolve as outras
+    para a quarentena.
+    """
+
+    def __init__(self, engine, schema: str = "frota", merge: bool = False):
+        super().__init__(engine, schema)
+        self.merge = merge
+        colunas = ", ".join(COLUNAS)
+        self.sql_copy = f"COPY {{tabela}} ({colunas}{{extra}}) FROM STDIN WITH (FORMAT csv)"
+        # _ordem: posição no lote (= ordem na planilha)
+        self.sql_stage = (
+            f"CREATE TEMP TABLE IF NOT EXISTS _equip_stage ON COMMIT DELETE ROWS AS "
+            f"SELECT {colunas}, 0 AS _ordem FROM {schema}.equipamentos WITH NO DATA"
+        )
+        self.sql_repetidas = """
+            DELETE FROM _equip_stage s USING (
+                SELECT DISTINCT ON (ano, identificacao) ano, identificacao, _ordem
+                  FROM _equip_stage WHERE identificacao IS NOT NULL
+                 ORDER BY ano, identificacao, _ordem DESC
+            ) u
+            WHERE s.ano = u.ano AND s.identificacao = u.identificacao AND s._ordem <> u._ordem
+            RETURNING s._ordem, u._ordem
+        """
+        sets = ", ".join(f"{c} = s.{c}" for c in COLUNAS if c not in ("ano", "identificacao"))
+        self.sql_merge = (
+            f"UPDATE {schema}.equipamentos e SET {sets} FROM _equip_stage s "
+            f"WHERE e.ano = s.ano AND e.identificacao = s.identificacao;"
+            f"INSERT INTO {schema}.equipamentos ({colunas}) "
+            f"SELECT {colunas} FROM _equip_stage s WHERE s.identificacao IS NULL "
+            f"OR NOT EXISTS (SELECT 1 FROM {schema}.equipamentos e "
+            f"WHERE e.ano = s.ano AND e.identificacao = s.identificacao);"
+        )
+
+    @staticmethod
+    def _csv(linhas: list[dict], ordem: bool = False) -> io.StringIO:
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        for i, l in enumerate(linhas):
+            campos = [l.get(c) for c in COLUNAS]   # None → campo vazio → NULL
+            w.writerow(campos + [i] if ordem else campos)
+        buf.seek(0)
+        return buf
+
+    def gravar(self, linhas: list[dict]) -> dict[int, int]:
+        """Com ``merge``, devolve {posição descartada: posição que ficou}."""
+        raw = self.engine.raw_connection()
+        try:
+            cur = raw.cursor()
+            descartadas = {}
+            if self.merge:
+                cur.execute(self.sql_stage)
+                cur.copy_expert(self.sql_copy.format(tabela="_equip_stage", extra=", _ordem"),
+                                self._csv(linhas, ordem=True))
+                cur.execute(self.sql_repetidas)
+                descartadas = dict(cur.fetchall())
+                cur.execute(self.sql_merge)
+            else:
+                cur.copy_expert(self.sql_copy.format(tabela=f"{self.schema}.equipamentos",
+                                                     extra=""), self._csv(linhas))
+            raw.commit()
+            return descartadas
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+
+# ------------------------------------------------------------------ #
+# Pipeline                                                           #
+# ------------------------------------------------------------------ #
+class Quarentena:
+    """CSV de linhas com o motivo — recusadas ou com aviso (aberto só se
+    houver alguma)."""
+
+    def __init__(self, caminho: str | Path | None):
+        self.caminho = caminho
+        self.total = 0
+        self._arq = None
+        self._csv = None
+
+    def registrar(self, linha: dict, erro: str) -> None:
+        self.total += 1
+        if self.caminho is None:
+            return
+        if self._csv is None:
+            self._arq = open(self.caminho, "w", newline="", encoding="utf-8")
+            self._csv = csv.DictWriter(self._arq, fieldnames=["_linha", *COLUNAS, "erro"],
+                                       extrasaction="ignore")
+            self._csv.writeheader()
+        self._csv.writerow({**linha, "erro": erro})
+
+    def fechar(self) -> None:
+        if self._arq:
+            self._arq.close()
+
+
+def validar_lote(lote: list[dict], rejeitos: Quarentena, alertas: Quarentena) -> list[dict]:
+    """Regras de validacao.REGRAS no lote inteiro; devolve só as linhas sem erro."""
+    # coluna a coluna e só as que as regras leem: bem mais rápido que DataFrame(lote)
+    relatorio = validacao.validar(pd.DataFrame(
+        {c: [l.get(c) for l in lote] for c in validacao.COLUNAS}))
+    for i, msg in validacao.por_linha(validacao.avisos(relatorio)).items():
+        alertas.registrar(lote[i], msg)
+    ruins = validacao.por_linha(validacao.erros(relatorio))
+    for i, msg in ruins.items():
+        rejeitos.registrar(lote[i], msg)
+    return [l for i, l in enumerate(lote) if i not in ruins] if ruins else lote
+
+
+def importar(linhas: Iterable[dict], destino, tamanho_lote: int = TAMANHO_LOTE,
+             quarentena: str | Path | None = None, avisos: str | Path | None = None,
+             validar: bool = True, log=print) -> dict:
+    """Importa ``linhas`` no ``destino`` em lotes e devolve o relatório.
+
+    ``validar=False`` grava sem passar pelas regras (só o banco recusa).
+    """
+    rejeitos = Quarentena(quarentena)
+    alertas = Quarentena(avisos)
+    gravadas = invalidas = 0
+    inicio = time.perf_counter()
+
+    try:
+        for lote in em_lotes(linhas, tamanho_lote):
+            if validar:
+                n = len(lote)
+                lote = validar_lote(lote, rejeitos, alertas)
+                invalidas += n - len(lote)
+                if not lote:
+                    continue
+            # dict.fromkeys: únicos na ordem em que aparecem na planilha
+            mapa = destino.resolver_setores(dict.fromkeys(l.get('centro_custo_uc') for l in lote))
+            prontas = [{**l, 'centro_custo_uc': mapa[l.get('centro_custo_uc')]} for l in lote]
+
+            try:
+                # merge: linhas com (ano, identificacao) repetido no lote
+                repetidas = destino.gravar(prontas) or {}
+                for i, ficou in sorted(repetidas.items()):
+                    rejeitos.registrar(lote[i], "identificação repetida no ano; vale a "
+                                       f"linha {lote[ficou].get('_linha')}")
+                gravadas += len(prontas) - len(repetidas)
+            except Exception:
+                # refaz linha a linha para isolar as ruins
+                for original, l in zip(lote, prontas):
+                    try:
+                        destino.gravar([l])
+                        gravadas += 1
+                    except Exception as exc:
+                        rejeitos.registrar(original, str(exc))
+
+            decorrido = time.perf_counter() - inicio
+            log(f"   … {gravadas} linhas gravadas, {rejeitos.total} rejeitadas "
+                f"({invalidas} na validação), {alertas.total} com aviso "
+                f"({gravadas / decorrido:.0f} linhas/s)")
+    finally:
+        rejeitos.fechar()
+        alertas.fechar()
+
+    # uma passada no fim (só grava o que mudou): cobre inserções e o merge
+    chaves = destino.atualizar_chaves() if gravadas else 0
+    decorrido = time.perf_counter() - inicio
+    return {
+        "gravadas": gravadas,
+        "rejeitadas": rejeitos.total,            # inclui as invalidas
+        "invalidas": invalidas,
+        "avisos": alertas.total,
+        "segundos": decorrido,
+        "linhas_por_s": gravadas / decorrido if decorrido else 0.0,
+        "quarentena": str(quarentena) if rejeitos.total and quarentena else None,
+        "arquivo_avisos": str(avisos) if alertas.total and avisos else None,
+        "setores": dict(destino.correspondencia.metodos),   # valores distintos por método
+        "chaves": chaves,                        # linhas de chaves_equipamento gravadas
+    }
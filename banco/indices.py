@@ -0,0 +1,47 @@
+"""Aplica as migrações pendentes e confere o plano das consultas de produção.
+
+Uso (na raiz do projeto):
+    python banco/indices.py                     # aplica em app/database/frota.db
+    python banco/indices.py --banco outro.db --so-verificar
+
+Sai com código 1 se alguma consulta filtrada ainda varrer a tabela inteira.
+"""
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import consultas, indices, migracoes   # noqa: E402
+from app.services.db import _DB_PATH          # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--so-verificar", action="store_true",
+                    help="não aplica migrações, só confere os planos")
+    args = ap.parse_args()
+
+    con = sqlite3.connect(args.banco)
+    if not args.so_verificar:
+        versao = migracoes.migrar(con)
+        print(f"✅ Esquema na versão {versao}")
+
+    for nome, sql in consultas.FILTRADAS.items():
+        print(f"{nome}: {' | '.join(indices.plano(con, sql))}")
+
+    falhas = indices.varreduras(con)
+    con.close()
+    if falhas:
+        print("🚨 Consultas com varredura completa:")
+        for nome, scans in falhas.items():
+            print(f"   {nome}: {scans}")
+        sys.exit(1)
+    print("✅ Nenhuma consulta filtrada varre tabela inteira.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Migrações de esquema do frota.db.
+
+Uso (na raiz do projeto):
+    python banco/migrar.py                 # aplica todas as pendentes
+    python banco/migrar.py --status        # mostra versão atual e pendentes
+    python banco/migrar.py --ate 3         # aplica só até a versão 3
+    python banco/migrar.py --banco outro.db
+
+Pode rodar com a aplicação no ar: cada passo é commitado sozinho e os
+backfills andam em lotes.
+"""
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import migracoes          # noqa: E402
+from app.services.db import _DB_PATH        # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--banco", type=Path, default=_DB_PATH)
+    ap.add_argument("--ate", type=int, help="versão máxima a aplicar")
+    ap.add_argument("--status", action="store_true", help="só mostra o estado")
+    args = ap.parse_args()
+
+    con = sqlite3.connect(args.banco)
+    con.execute("PRAGMA busy_timeout = 5000")
+    print(f"Banco: {args.banco}  (versão {migracoes.versao_atual(con)})")
+
+    faltam = migracoes.pendentes(con, args.ate)
+    if args.status:
+        for versao, descricao, _ in faltam:
+            print(f"   pendente {versao}: {descricao}")
+        if not faltam:
+            print("✅ Nenhuma migração pendente.")
+        return
+
+    versao = migracoes.migrar(con, args.ate)
+    con.close()
+    print(f"✅ Esquema na versão {versao}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import streamlit as st
 import hydralit_components as hc
 from app.services.auth import login_user, get_user_info
+from app.services import backend
+from app.services.exportacao import recuperar_orfas
 from app.pages import home, preenchimento, sobre, veiculos, register, usuarios, exportacao
 
 # ------------------------------------------------------------------ #
@@ -77,10 +79,19 @@ button[kind]:hover {
 """
 st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 
+# Migrações pendentes do banco configurado e exportações órfãs (uma vez por processo)
+@st.cache_resource
+def preparar_banco() -> int:
+    versao = backend.atual().migrar(log=lambda _: None)
+    recuperar_orfas()
+    return versao
+
 # Função principal (main) - Lógica de Login e Navegação
 
 # ------------------------------------------------------------------ #
 def main():
+    preparar_banco()
+
     # ---------- sessão ----------
     st.session_state.setdefault("user", None)
     st.session_state.setdefault("show_registration", False)